@@ -1,3 +1,5 @@
+import json, os, time
+from typing import Dict, List, Optional, Sequence
 import numpy as np
 try:
     import faiss
@@ -5,38 +7,303 @@ except Exception as e:
     # Make import safe when module is imported but not used.
     raise ImportError("faiss is required for FaissIndex (pip install faiss-cpu)") from e
 
+from core.config import faiss_options_from_env, vector_precision_from_env
+from core import quantize
+from core.trace import traced
+
+KINDS = ("flat", "ivf", "hnsw")
+# FAISS scalar quantizers; QT_8bit trains a per-dimension range rather than a per-vector scale
+_SQ_TYPES = {"float16": faiss.ScalarQuantizer.QT_fp16, "int8": faiss.ScalarQuantizer.QT_8bit}
+INDEX_FILE = "index.faiss"
+META_FILE = "meta.json"
+
+def _as_f32(vectors) -> np.ndarray:
+    if not isinstance(vectors, np.ndarray):
+        vectors = np.asarray(vectors, dtype="float32")
+    if vectors.dtype != np.float32:
+        vectors = vectors.astype("float32", copy=False)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    return np.ascontiguousarray(vectors)
+
 class FaissIndex:
-    def __init__(self):
+    """
+    Inner-product FAISS index (cosine for normalized inputs) with stable
+    int64 ids, incremental add/remove and save/load.
+
+    kind: "flat" (exact), "ivf" (IVFFlat, trained on the first batch added;
+    `index()` retrains on the full set) or "hnsw" (HNSWFlat; removals are
+    tombstoned and the graph is rebuilt once a quarter of it is dead).
+    HNSW stores vectors under internal row ids, never reused, so an id that
+    is removed and added again gets a fresh row and its old vector stays dead.
+    precision: float32 | float16 | int8 vector storage (scalar-quantized
+    codes; int8 is trained on the first batch like IVF).
+    Unset options come from JR_FAISS_* (see `faiss_options_from_env`) and
+    JR_VECTOR_PRECISION.
+
+    `index(vectors, meta)` replaces the contents and numbers rows 0..n-1,
+    so `search()` ids double as row positions for callers that index once.
+    """
+    def __init__(self, kind: Optional[str] = None, nlist: Optional[int] = None,
+                 nprobe: Optional[int] = None, hnsw_m: Optional[int] = None,
+                 ef_search: Optional[int] = None, precision: Optional[str] = None):
+        env = faiss_options_from_env()
+        self.precision = quantize.check(precision or vector_precision_from_env())
+        self.kind = (kind or env["kind"]).lower()
+        if self.kind not in KINDS:
+            raise ValueError(f"unknown faiss index kind: {self.kind}")
+        self.nlist = env["nlist"] if nlist is None else nlist
+        self.nprobe = env["nprobe"] if nprobe is None else nprobe
+        self.hnsw_m = env["hnsw_m"] if hnsw_m is None else hnsw_m
+        self.ef_search = env["ef_search"] if ef_search is None else ef_search
+        self.dim: Optional[int] = None
+        self._index = None
+        self._meta: Dict[int, object] = {}
+        self._dead = set()   # hnsw tombstones (internal rows)
+        self._next_id = 0
+        self._row_of: Dict[int, int] = {}                 # hnsw: id -> live internal row
+        self._ext_of = np.zeros((0,), dtype=np.int64)      # hnsw: internal row -> id
+
+    def __len__(self):
+        return len(self._meta)
+
+    # ---------------- building ----------------
+
+    def _build(self, d: int):
+        self.dim = d
+        ip = faiss.METRIC_INNER_PRODUCT
+        sq = _SQ_TYPES.get(self.precision)
+        if self.kind == "flat":
+            inner = faiss.IndexFlatIP(d) if sq is None else faiss.IndexScalarQuantizer(d, sq, ip)
+            self._index = faiss.IndexIDMap2(inner)
+        elif self.kind == "hnsw":
+            inner = (faiss.IndexHNSWFlat(d, self.hnsw_m, ip) if sq is None
+                     else faiss.IndexHNSWSQ(d, sq, self.hnsw_m, ip))
+            self._index = faiss.IndexIDMap2(inner)
+        else:
+            self._index = None  # built at training time, when n is known
+
+    def _train(self, vectors: np.ndarray):
+        if self.kind != "ivf":
+            self._index.train(vectors)  # no-op for float32 / float16
+            return
+        n = len(vectors)
+        nlist = self.nlist if self.nlist > 0 else int(4 * np.sqrt(n))
+        nlist = max(1, min(nlist, n))
+        quantizer = faiss.IndexFlatIP(self.dim)
+        sq = _SQ_TYPES.get(self.precision)
+        if sq is None:
+            self._index = faiss.IndexIVFFlat(quantizer, self.dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            self._index = faiss.IndexIVFScalarQuantizer(quantizer, self.dim, nlist, sq, faiss.METRIC_INNER_PRODUCT)
+        self._index.train(vectors)
+
+    def _tune(self):
+        if self.kind == "ivf":
+            self._index.nprobe = self.nprobe
+        elif self.kind == "hnsw":
+            faiss.downcast_index(self._index.index).hnsw.efSearch = max(self.ef_search, 1)
+
+    def clear(self):
+        self.dim = None
         self._index = None
-        self._meta = []
+        self._meta = {}
+        self._dead = set()
+        self._next_id = 0
+        self._row_of = {}
+        self._ext_of = np.zeros((0,), dtype=np.int64)
 
+    @traced("index")
     def index(self, vectors: np.ndarray, meta):
-        if not isinstance(vectors, np.ndarray):
-            vectors = np.asarray(vectors, dtype="float32")
-        if vectors.dtype != np.float32:
-            vectors = vectors.astype("float32", copy=False)
-        if vectors.ndim != 2:
-            raise ValueError("vectors must be 2D array of shape (n, d)")
+        vectors = _as_f32(vectors)
         if len(meta) != vectors.shape[0]:
             raise ValueError("meta length must match number of vectors")
-        d = vectors.shape[1]
-        self._index = faiss.IndexFlatIP(d)  # cosine if inputs normalized
-        self._index.add(np.ascontiguousarray(vectors))
-        self._meta = list(meta)
+        self.clear()
+        if len(vectors):
+            self.add(vectors, meta)
+
+    @traced("index")
+    def add(self, vectors: np.ndarray, meta, ids: Optional[Sequence[int]] = None) -> np.ndarray:
+        """Append vectors; returns their ids (new ones unless `ids` is given)."""
+        vectors = _as_f32(vectors)
+        if len(meta) != vectors.shape[0]:
+            raise ValueError("meta length must match number of vectors")
+        if not len(vectors):
+            return np.zeros((0,), dtype=np.int64)
+        if self.dim is None:
+            self._build(vectors.shape[1])
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"expected {self.dim}-d vectors, got {vectors.shape[1]}")
+        if self._index is None or not self._index.is_trained:
+            self._train(vectors)
+        if ids is None:
+            ids = np.arange(self._next_id, self._next_id + len(vectors), dtype=np.int64)
+        else:
+            ids = np.asarray(ids, dtype=np.int64)
+            if len(ids) != len(vectors):
+                raise ValueError("ids length must match number of vectors")
+            stale = [i for i in ids.tolist() if i in self._meta]
+            if stale:
+                self.remove(stale)
+        if self.kind == "hnsw":
+            rows = np.arange(len(self._ext_of), len(self._ext_of) + len(ids), dtype=np.int64)
+            self._index.add_with_ids(vectors, rows)
+            self._ext_of = np.concatenate([self._ext_of, ids])
+            self._row_of.update(zip(ids.tolist(), rows.tolist()))
+        else:
+            self._index.add_with_ids(vectors, ids)
+        for i, m in zip(ids.tolist(), meta):
+            self._meta[i] = m
+        self._next_id = max(self._next_id, int(ids.max()) + 1)
+        return ids
+
+    def remove(self, ids: Sequence[int]) -> int:
+        """Drop vectors by id; returns how many were present."""
+        ids = [int(i) for i in ids if int(i) in self._meta]
+        if not ids or self._index is None:
+            return 0
+        for i in ids:
+            del self._meta[i]
+        if self.kind == "hnsw":
+            # HNSW graphs do not support deletion
+            self._dead.update(self._row_of.pop(i) for i in ids)
+            if len(self._dead) * 4 > self._index.ntotal:
+                self._compact()
+        else:
+            self._index.remove_ids(np.asarray(ids, dtype=np.int64))
+        return len(ids)
+
+    def _compact(self):
+        # rows keep their numbers, so _ext_of stays valid
+        inner = faiss.downcast_index(self._index.index)
+        all_ids = faiss.vector_to_array(self._index.id_map)
+        live = np.isin(all_ids, np.fromiter(self._dead, dtype=np.int64), invert=True)
+        X = inner.reconstruct_n(0, self._index.ntotal)[live]
+        self._build(self.dim)
+        if len(X):
+            X = np.ascontiguousarray(X)
+            self._index.train(X)
+            self._index.add_with_ids(X, all_ids[live])
+        self._dead = set()
+
+    def nbytes(self) -> int:
+        """Serialized size of the index (vectors plus IVF lists / HNSW graph)."""
+        return 0 if self._index is None else int(faiss.serialize_index(self._index).nbytes)
+
+    # ---------------- persistence ----------------
+
+    def save(self, path: str):
+        """Index + metadata into directory `path` (meta.json is written last)."""
+        os.makedirs(path, exist_ok=True)
+        state = {"kind": self.kind, "precision": self.precision, "nlist": self.nlist, "nprobe": self.nprobe,
+                 "hnsw_m": self.hnsw_m, "ef_search": self.ef_search, "dim": self.dim,
+                 "next_id": self._next_id, "dead": sorted(self._dead),
+                 "meta": [[i, m] for i, m in self._meta.items()], "rows": self._ext_of.tolist()}
+        if self._index is not None:
+            tmp = os.path.join(path, INDEX_FILE + ".tmp")
+            faiss.write_index(self._index, tmp)
+            os.replace(tmp, os.path.join(path, INDEX_FILE))
+        tmp = os.path.join(path, META_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, os.path.join(path, META_FILE))
+
+    @classmethod
+    def load(cls, path: str, nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> "FaissIndex":
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            state = json.load(f)
+        idx = cls(kind=state["kind"], precision=state.get("precision", "float32"),
+                  nlist=state["nlist"], hnsw_m=state["hnsw_m"],
+                  nprobe=state["nprobe"] if nprobe is None else nprobe,
+                  ef_search=state["ef_search"] if ef_search is None else ef_search)
+        idx.dim = state["dim"]
+        idx._next_id = state["next_id"]
+        idx._dead = set(state["dead"])
+        idx._meta = {int(i): m for i, m in state["meta"]}
+        if idx.kind == "hnsw":
+            # stores saved before internal rows used the ids themselves as rows
+            rows = state.get("rows")
+            if rows is None:
+                rows = list(range(max(idx._meta, default=-1) + 1))
+            idx._ext_of = np.asarray(rows, dtype=np.int64)
+            idx._row_of = {int(e): r for r, e in enumerate(rows) if r not in idx._dead and int(e) in idx._meta}
+        if idx.dim is not None and os.path.exists(os.path.join(path, INDEX_FILE)):
+            idx._index = faiss.read_index(os.path.join(path, INDEX_FILE))
+        return idx
+
+    # ---------------- search ----------------
+
+    @traced("query")
+    def search(self, vectors: np.ndarray, k: int = 5):
+        """Raw faiss search: (scores, ids) arrays, -1 where fewer than k rows."""
+        vectors = _as_f32(vectors)
+        if self._index is None or not self._meta:
+            return np.zeros((len(vectors), 0), dtype="float32"), np.zeros((len(vectors), 0), dtype=np.int64)
+        self._tune()
+        if self.kind == "hnsw":
+            D, I = self._search_rows(vectors, k)
+            return D, np.where(I >= 0, self._ext_of[np.maximum(I, 0)], -1)
+        return self._index.search(vectors, k)
+
+    def _search_rows(self, vectors: np.ndarray, k: int):
+        """HNSW search over internal rows, skipping tombstones."""
+        if not self._dead:
+            return self._index.search(vectors, k)
+        kk = min(self._index.ntotal, k + len(self._dead))
+        D, I = self._index.search(vectors, kk)
+        Dout = np.full((len(vectors), k), -np.inf, dtype="float32")
+        Iout = np.full((len(vectors), k), -1, dtype=np.int64)
+        dead = np.fromiter(self._dead, dtype=np.int64)
+        for r in range(len(vectors)):
+            ok = (I[r] >= 0) & np.isin(I[r], dead, invert=True)
+            d, i = D[r][ok][:k], I[r][ok][:k]
+            Dout[r, :len(d)], Iout[r, :len(i)] = d, i
+        return Dout, Iout
 
     def query(self, vector: np.ndarray, k: int = 5):
-        if self._index is None:
-            return []
-        if not isinstance(vector, np.ndarray):
-            vector = np.asarray(vector, dtype="float32")
-        if vector.dtype != np.float32:
-            vector = vector.astype("float32", copy=False)
-        if vector.ndim == 1:
-            vector = vector.reshape(1, -1)
-        D, I = self._index.search(np.ascontiguousarray(vector), k)
-        out = []
-        for s, i in zip(D[0].tolist(), I[0].tolist()):
-            if i == -1:
-                continue
-            out.append((float(s), self._meta[i]))
-        return out
+        return self.query_batch(vector, k)[0] if self._meta else []
+
+    def query_batch(self, vectors: np.ndarray, k: int = 5):
+        """Single faiss search for all query rows."""
+        D, I = self.search(vectors, k)
+        return [
+            [(float(s), self._meta[i]) for s, i in zip(drow, irow) if i != -1]
+            for drow, irow in zip(D.tolist(), I.tolist())
+        ]
+
+
+def recall_report(vectors: np.ndarray, queries: np.ndarray, k: int = 10,
+                  configs: Optional[List[dict]] = None) -> List[dict]:
+    """
+    Build time, per-query latency, index bytes and recall@k of each config
+    against an exact float32 flat index over the same vectors. A config is
+    FaissIndex kwargs.
+    """
+    vectors, queries = _as_f32(vectors), _as_f32(queries)
+    if configs is None:
+        configs = [{"kind": "flat"}, {"kind": "flat", "precision": "float16"},
+                   {"kind": "flat", "precision": "int8"},
+                   {"kind": "ivf", "nprobe": 1}, {"kind": "ivf", "nprobe": 8}, {"kind": "ivf", "nprobe": 32},
+                   {"kind": "hnsw", "ef_search": 16}, {"kind": "hnsw", "ef_search": 64},
+                   {"kind": "hnsw", "ef_search": 256}]
+    meta = list(range(len(vectors)))
+    rows = []
+    for cfg in configs:
+        idx = FaissIndex(**{"precision": "float32", **cfg})
+        t0 = time.perf_counter()
+        idx.index(vectors, meta)
+        build = time.perf_counter() - t0
+        idx.search(queries[:1], k)  # warm
+        t0 = time.perf_counter()
+        _, I = idx.search(queries, k)
+        per_query = (time.perf_counter() - t0) / max(1, len(queries))
+        rows.append({"config": cfg, "build_s": build, "query_ms": per_query * 1e3,
+                     "bytes": idx.nbytes(), "I": I})
+    exact = FaissIndex(kind="flat", precision="float32")
+    exact.index(vectors, meta)
+    _, T = exact.search(queries, k)
+    for row in rows:
+        I = row.pop("I")
+        hits = sum(len(set(a[a >= 0].tolist()) & set(b[b >= 0].tolist())) for a, b in zip(I, T))
+        row["recall"] = hits / max(1, int((T >= 0).sum()))
+    return rows
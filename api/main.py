@@ -1,165 +1,309 @@
-# App.py — Streamlit UI with pluggable vector backends (inmem / sqlite / faiss)
+# api/main.py — ASGI service (uvicorn api.main:app)
+"""
+JR Match over HTTP.
 
-import os, sys, tempfile, uuid
+  GET  /health       readiness, pool sizes, in-flight count, latency percentiles
+  POST /extract      one document -> ParsedDoc
+  POST /match        resume + jd -> MatchDetail
+  POST /match/batch  one jd + many resumes -> MatchDetails, best first
 
-# Make sure "core" is importable whether App.py lives at repo root or in /ui
-THIS_DIR = os.path.dirname(os.path.abspath(__file__))
-REPO_ROOT = os.path.dirname(THIS_DIR)
-if REPO_ROOT not in sys.path:
-    sys.path.append(REPO_ROOT)
+Request bodies are capped while they arrive (JR_API_MAX_MB per upload the
+route takes): a larger Content-Length gets 413 before any of the body is
+read, and a body without one is cut off at the cap. Uploads are then
+copied to temp files; parsing runs on a process pool and embedding/scoring
+on a thread pool, so the event loop only does I/O.
+Requests beyond JR_API_INFLIGHT, or arriving while JR_API_QUEUE pool jobs
+are queued or running, get 503; requests slower than JR_API_TIMEOUT get
+504 (see `api_options_from_env`).
+"""
+import asyncio, os, sys, tempfile, threading, time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
 
-import streamlit as st
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+import numpy as np
+from fastapi import FastAPI, File, HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse
 
 from core.extractor import extract
-from core.embed import embed
-from core.search_inmem import InMemIndex
-from core.scoring import score
-from core.ontology_loader import load_ontology, id_to_label_map
-from core.explain import find_evidence_for_matches, suggest_gap_phrases
-from core.config import load_weights
-
-# ---- Optional backends (tolerate missing modules) ----
-FaissIndex = None
-try:
-    # Try both potential locations, depending on where you placed the file
-    from core.search_faiss import FaissIndex
-except Exception:
+from core.embed_batcher import get_scheduler
+from core.scoring import score, score_matrix, similarity_matrix
+from core.ontology_loader import get_ontology
+from core.hierarchy import get_hierarchy
+from core.config import api_options_from_env, load_weights
+from core.pipeline import embed_docs, pair_top_sims
+from core.schemas import MatchDetail, ParsedDoc
+
+ONTOLOGY_CSV = os.path.join(ROOT, "ontology", "skills.csv")
+DOC_EXTS = (".pdf", ".docx", ".txt")
+CHUNK = 1 << 20
+LATENCY_WINDOW = 2048   # most recent requests kept per endpoint
+
+OPTS = api_options_from_env()
+
+
+# ---------------- pools ----------------
+
+def _parser_init():
+    # pool workers are leaves: no nested PDF page pool inside them
+    os.environ["JR_PDF_WORKERS"] = "1"
+    get_ontology(ONTOLOGY_CSV)
+
+def _parse(path: str, tag: str) -> ParsedDoc:
+    return extract(path, ONTOLOGY_CSV, dump_tag=tag)
+
+class _State:
+    threads: Optional[ThreadPoolExecutor] = None
+    parsers: Optional[ProcessPoolExecutor] = None
+    ready = False
+    inflight = 0
+
+state = _State()
+
+
+class _Jobs:
+    """
+    Bound on executor work. A slot is taken before submitting and given back
+    when the job finishes, not when its request ends: a request that timed
+    out (504) keeps its slot until its parse or score actually completes, so
+    the executor queues can never grow past `limit`.
+    """
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.running = 0
+        self._lock = threading.Lock()
+
+    def _release(self, _fut=None):
+        with self._lock:
+            self.running -= 1
+
+    async def run(self, pool, fn, *args):
+        with self._lock:
+            if self.running >= self.limit:
+                raise HTTPException(503, "server busy", headers={"Retry-After": "1"})
+            self.running += 1
+        try:
+            fut = pool.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        fut.add_done_callback(self._release)
+        return await asyncio.wrap_future(fut)
+
+jobs = _Jobs(OPTS["queue"])
+
+
+# ---------------- latency ----------------
+
+class _Latency:
+    """Per-endpoint sliding window of request durations (ms)."""
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._d: Dict[str, deque] = {}
+        self._n: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, ms: float):
+        with self._lock:
+            self._d.setdefault(route, deque(maxlen=self.window)).append(ms)
+            self._n[route] = self._n.get(route, 0) + 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            snap = {r: (np.asarray(d), self._n[r]) for r, d in self._d.items()}
+        return {r: {"count": n, "p50_ms": float(np.percentile(a, 50)), "p90_ms": float(np.percentile(a, 90)),
+                    "p99_ms": float(np.percentile(a, 99)), "max_ms": float(a.max())}
+                for r, (a, n) in snap.items()}
+
+latency = _Latency()
+
+
+# ---------------- app ----------------
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    state.threads = ThreadPoolExecutor(max_workers=OPTS["threads"], thread_name_prefix="jr-api")
+    if OPTS["parsers"] > 0:
+        state.parsers = ProcessPoolExecutor(max_workers=OPTS["parsers"], initializer=_parser_init)
+    loop = asyncio.get_running_loop()
+    # warm up: ontology + matcher, the embedding model, and every parser process
+    await loop.run_in_executor(state.threads, get_ontology, ONTOLOGY_CSV)
+    await get_scheduler().aembed(["warm up"])
+    if state.parsers is not None:
+        await asyncio.gather(*[loop.run_in_executor(state.parsers, get_ontology, ONTOLOGY_CSV)
+                               for _ in range(OPTS["parsers"])])
+    state.ready = True
     try:
-        from search_faiss import FaissIndex
-    except Exception:
-        FaissIndex = None
+        yield
+    finally:
+        state.ready = False
+        if state.parsers is not None:
+            state.parsers.shutdown(cancel_futures=True)
+        state.threads.shutdown(wait=False, cancel_futures=True)
+        get_scheduler().close()
 
-SQLiteIndex = None
-try:
-    from core.search_sqlite import SQLiteIndex  # requires you added core/search_sqlite.py
-except Exception:
-    SQLiteIndex = None
+app = FastAPI(title="JR Match", lifespan=lifespan)
 
-# ---- Streamlit setup ----
-st.set_page_config(page_title="JR Match", layout="wide")
-st.title("JR Match")
+@app.middleware("http")
+async def limits(request: Request, call_next):
+    route = request.url.path
+    if route == "/health":
+        return await call_next(request)
+    if state.inflight >= OPTS["inflight"]:
+        return JSONResponse({"detail": "server busy"}, status_code=503, headers={"Retry-After": "1"})
+    state.inflight += 1
+    t0 = time.perf_counter()
+    try:
+        return await asyncio.wait_for(call_next(request), OPTS["timeout"])
+    except asyncio.TimeoutError:
+        return JSONResponse({"detail": "request timed out"}, status_code=504)
+    finally:
+        state.inflight -= 1
+        latency.record(route, (time.perf_counter() - t0) * 1e3)
 
-ROOT = REPO_ROOT
-ONTOLOGY_CSV = os.path.join(ROOT, "ontology", "skills.csv")
-os.makedirs(os.path.join(ROOT, "data"), exist_ok=True)
-
-# -------- Sidebar controls --------
-backend_choice = st.sidebar.radio(
-    "Vector backend",
-    options=["inmem", "sqlite", "faiss"],
-    index=0,
-    help="SQLite persists vectors (zero external deps). FAISS is fastest if available."
-)
-
-if backend_choice == "sqlite" and SQLiteIndex is None:
-    st.sidebar.warning("SQLite backend not found. Did you add core/search_sqlite.py?")
-if backend_choice == "faiss" and FaissIndex is None:
-    st.sidebar.warning("FAISS not available. Install faiss-cpu or switch backend.")
-
-db_path = st.sidebar.text_input(
-    "SQLite DB path",
-    value=os.getenv("JR_SQLITE_PATH", os.path.join(ROOT, "data", "jr_match.sqlite3")),
-    help="Only used when backend = sqlite"
-)
-
-sim_w, cov_w = load_weights()
-st.sidebar.caption(f"Scoring weights → Semantic: **{sim_w:.2f}**  |  Coverage: **{cov_w:.2f}**")
-
-# -------- Load ontology --------
-skills = load_ontology(ONTOLOGY_CSV)
-id2label = id_to_label_map(skills)
-
-# -------- Inputs --------
-resume_file = st.file_uploader("Upload Resume (.pdf/.docx)", type=["pdf", "docx"], key="resume")
-jd_file = st.file_uploader("Upload Job Description (.pdf/.docx)", type=["pdf", "docx"], key="jd")
-
-run = st.button("Run Match", type="primary")
-
-if run and resume_file and jd_file:
-    # Save uploads to temp files
-    r_ext = os.path.splitext(resume_file.name)[1].lower() or ".pdf"
-    j_ext = os.path.splitext(jd_file.name)[1].lower() or ".pdf"
-    with tempfile.NamedTemporaryFile(delete=False, suffix=r_ext) as rf:
-        rf.write(resume_file.read())
-        rpath = rf.name
-    with tempfile.NamedTemporaryFile(delete=False, suffix=j_ext) as jf:
-        jf.write(jd_file.read())
-        jpath = jf.name
-
-    # Parse docs
-    res = extract(rpath, ONTOLOGY_CSV, dump_tag="resume")
-    job = extract(jpath, ONTOLOGY_CSV, dump_tag="jd")
-
-    # Prepare bullet texts (with sensible fallbacks)
-    res_bullets = [b.text for b in res.bullets if b.text.strip()] or (
-        [" ".join(res.sections.skills)] if res.sections.skills else [res.text[:1000] or ""]
-    )
-    jd_bullets = [b.text for b in job.bullets if b.text.strip()] or (
-        [" ".join(job.sections.skills)] if job.sections.skills else [job.text[:1000] or ""]
-    )
-
-    # -------- Select backend --------
-    backend_name = "inmem"
-    if backend_choice == "sqlite" and SQLiteIndex is not None:
-        idx_name = f"ui_{uuid.uuid4().hex[:8]}"          # short-lived index per run
-        idx = SQLiteIndex(db_path=db_path, index_name=idx_name)
-        backend_name = "sqlite"
-    elif backend_choice == "faiss" and FaissIndex is not None:
-        idx = FaissIndex()
-        backend_name = "faiss"
-    else:
-        if backend_choice != "inmem":
-            st.info("Falling back to InMem backend.")
-        idx = InMemIndex()
-
-    # -------- Index JD bullets --------
-    jd_vecs = embed(jd_bullets)
-    idx.index(jd_vecs, meta=jd_bullets)
-
-    # -------- Compute best semantic similarity --------
-    sims = []
-    for bt in res_bullets:
-        q = embed([bt])[0]
-        ans = idx.query(q, k=1)
-        if ans:
-            sims.append(ans[0][0])
-    top_sim = max(sims) if sims else 0.0
-
-    # -------- Score --------
-    detail = score(res, job, top_sim)
-
-    # -------- Display --------
-    st.metric("Total Score", f"{detail.total:.3f}")
-    st.caption(f"Backend: **{backend_name}**  ·  Resume bullets: {len(res_bullets)}  ·  JD bullets: {len(jd_bullets)}")
-
-    matched_pairs = sorted([(sid, id2label.get(sid, sid)) for sid in detail.matched_skills], key=lambda x: x[1].lower())
-    gap_pairs = sorted([(sid, id2label.get(sid, sid)) for sid in detail.gaps], key=lambda x: x[1].lower())
-
-    col1, col2 = st.columns(2)
-    with col1:
-        st.subheader("Matched Skills")
-        st.write([f"{sid} — {lbl}" for sid, lbl in matched_pairs] or "—")
-    with col2:
-        st.subheader("Gaps")
-        st.write([f"{sid} — {lbl}" for sid, lbl in gap_pairs] or "—")
-
-    st.caption(f"Weights — Semantic: {sim_w:.2f}, Coverage: {cov_w:.2f}")
-
-    # -------- Explainability --------
-    st.subheader("Evidence & Suggestions")
-
-    evidence = find_evidence_for_matches(res.bullets, detail.matched_skills, ONTOLOGY_CSV)
-    if any(evidence.values()):
-        with st.expander("Evidence sentences (from resume bullets)"):
-            for sid, lbl in matched_pairs:
-                ev = evidence.get(sid)
-                if ev:
-                    st.markdown(f"- **{lbl}**: {ev}")
-    else:
-        st.caption("No direct alias hits found in bullets for matched skills.")
-
-    gap_suggestions = suggest_gap_phrases(detail.gaps, ONTOLOGY_CSV)
-    if gap_suggestions:
-        with st.expander("Suggested phrasing for missing skills"):
-            for sid, lbl in gap_pairs:
-                st.markdown(f"- **{lbl}**: {gap_suggestions.get(sid)}")
+
+def _body_limit(route: str) -> int:
+    """Largest body a route accepts: JR_API_MAX_MB per upload it takes, plus multipart framing."""
+    files = {"/extract": 1, "/match": 2, "/match/batch": OPTS["max_batch"] + 1}.get(route, 0)
+    return int(files * OPTS["max_mb"] * 2**20) + 64 * 1024
+
+class BodyLimit:
+    """
+    ASGI middleware in front of multipart parsing, which would otherwise
+    spool the whole body to disk before a handler sees it.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        limit = _body_limit(scope["path"])
+        too_large = JSONResponse({"detail": f"request body larger than {limit / 2**20:.1f} MB"}, status_code=413)
+        length = dict(scope["headers"]).get(b"content-length", b"")
+        if length.isdigit() and int(length) > limit:
+            return await too_large(scope, receive, send)
+        seen, over = 0, False
+
+        async def capped():
+            # past the cap the app sees a client disconnect and stops reading
+            nonlocal seen, over
+            if over:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                seen += len(message.get("body", b""))
+                if seen > limit:
+                    over = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded(message):
+            if not over:
+                await send(message)
+
+        try:
+            await self.app(scope, capped, guarded)
+        except Exception:
+            if not over:
+                raise
+        if over:
+            await too_large(scope, receive, send)
+
+app.add_middleware(BodyLimit)   # added last, so it runs first: before `limits` counts the request
+
+
+async def _save_upload(upload: UploadFile) -> str:
+    """
+    Copy an upload (already spooled by the multipart parser, within the
+    body cap) to a temp file keeping its extension; enforces JR_API_MAX_MB
+    per file.
+    """
+    ext = os.path.splitext(upload.filename or "")[1].lower()
+    if ext not in DOC_EXTS:
+        raise HTTPException(415, f"unsupported file type {ext!r}; expected one of {', '.join(DOC_EXTS)}")
+    limit = int(OPTS["max_mb"] * 2**20)
+    size = 0
+    fd, path = tempfile.mkstemp(suffix=ext)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = await upload.read(CHUNK)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > limit:
+                    raise HTTPException(413, f"{upload.filename}: larger than {OPTS['max_mb']:g} MB")
+                f.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+async def _parse_upload(upload: UploadFile, tag: str) -> ParsedDoc:
+    path = await _save_upload(upload)
+    try:
+        return await jobs.run(state.parsers or state.threads, _parse, path, tag)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(422, f"{upload.filename}: could not parse ({type(e).__name__}: {e})")
+    finally:
+        os.remove(path)
+
+def _rank(resumes: List[ParsedDoc], jd: ParsedDoc) -> List[MatchDetail]:
+    """
+    Score every resume against one JD with one GEMM. Texts go through the
+    shared micro-batcher, so concurrent requests share model batches.
+    """
+    V, starts = embed_docs(list(resumes) + [jd], embed_fn=get_scheduler().embed)
+    cut = starts[-1]
+    sims = pair_top_sims(V[:cut], starts[:-1], V[cut:], np.zeros(1, dtype=np.int64))[:, 0]
+    weights = load_weights()
+    hier = get_hierarchy(get_ontology(ONTOLOGY_CSV))
+    return [score(r, jd, float(s), weights=weights, hierarchy=hier) for r, s in zip(resumes, sims.tolist())]
+
+
+@app.get("/health")
+async def health():
+    return {
+        "status": "ok" if state.ready else "starting",
+        "ontology_version": get_ontology(ONTOLOGY_CSV).version if state.ready else None,
+        "inflight": state.inflight,
+        "jobs": jobs.running,
+        "embed_batches": get_scheduler().stats(),
+        "limits": OPTS,
+        "latency": latency.summary(),
+    }
+
+@app.post("/extract", response_model=ParsedDoc)
+async def extract_doc(file: UploadFile = File(...)):
+    return await _parse_upload(file, "api")
+
+def _match_one(resume: ParsedDoc, jd: ParsedDoc) -> MatchDetail:
+    """One pair from its full bullet similarity matrix: all metrics plus best match per JD bullet."""
+    V, starts = embed_docs([resume, jd], embed_fn=get_scheduler().embed)
+    cut = starts[1]
+    return score_matrix(resume, jd, similarity_matrix(V[:cut], V[cut:]), weights=load_weights(),
+                        hierarchy=get_hierarchy(get_ontology(ONTOLOGY_CSV)))
+
+@app.post("/match", response_model=MatchDetail)
+async def match(resume: UploadFile = File(...), jd: UploadFile = File(...)):
+    r, j = await asyncio.gather(_parse_upload(resume, "resume"), _parse_upload(jd, "jd"))
+    return await jobs.run(state.threads, _match_one, r, j)
+
+@app.post("/match/batch")
+async def match_batch(jd: UploadFile = File(...), resumes: List[UploadFile] = File(...), top: int = 0):
+    """All resumes against one JD, best first; top > 0 keeps only the best N."""
+    if len(resumes) > OPTS["max_batch"]:
+        raise HTTPException(413, f"at most {OPTS['max_batch']} resumes per batch")
+    docs = await asyncio.gather(_parse_upload(jd, "jd"), *[_parse_upload(r, "resume") for r in resumes])
+    details = await jobs.run(state.threads, _rank, list(docs[1:]), docs[0])
+    out = sorted(({"resume": u.filename, **d.model_dump()} for u, d in zip(resumes, details)),
+                 key=lambda row: -row["total"])
+    return out[:top] if top > 0 else out
@@ -0,0 +1,198 @@
+# bench/harness.py
+"""
+Throughput benchmark over synthetic corpora (see bench/synth.py).
+
+For each corpus size, every pipeline stage is timed through the trace
+histogram (core/trace.py):
+
+  read.<fmt>        file reading, on a fixed sample per format
+  sections, skills  section split and skill matching of every document
+  embed             all resume units (build), then JD units per query
+  index             loading the embedded corpus into each backend
+  query, score      ResumeCorpus.top_k per JD; `match` is the whole call
+  explain           evidence + gap phrasing for the returned matches
+
+Results are one JSON document; `compare()` checks them against a stored
+baseline and flags stages whose latency grew beyond a tolerance. Latencies
+only compare on the machine that produced them, so the baseline is local
+(bench/baseline.json is gitignored; create it with --save-baseline).
+"""
+from __future__ import annotations
+import importlib.util, os, platform, shutil, subprocess, tempfile, time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from core import trace
+from core.corpus import ResumeCorpus
+from core.explain import find_evidence_for_matches, suggest_gap_phrases
+from core.extractor import extract, parse_text
+from .synth import FORMATS, Generator, SynthSpec, write_doc
+
+BACKENDS = ("inmem", "sqlite", "faiss")
+RESULTS_VERSION = 1
+METRICS = ("mean_ms", "p50_ms", "p90_ms", "p99_ms")
+
+
+@contextmanager
+def _bench_env(workdir: str, model: str):
+    """Stub-able embedder, no persistent caches, stores under workdir; restored afterwards."""
+    env = {"JR_EMBED_MODEL": model, "JR_EMBED_CACHE": "off", "JR_DOC_CACHE": "off",
+           "JR_SQLITE_PATH": os.path.join(workdir, "bench.sqlite3"),
+           "JR_VECTOR_STORE": os.path.join(workdir, "vector_store")}
+    old = {k: os.environ.get(k) for k in env}
+    os.environ.update(env)
+    try:
+        yield
+    finally:
+        for k, v in old.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+def _collect(size: Optional[int], backend: Optional[str], stages: Optional[Iterable[str]] = None,
+             rename: Optional[Dict[str, str]] = None) -> List[dict]:
+    """Rows from the trace histogram (then reset), optionally limited to `stages`."""
+    rows = []
+    for stage, s in trace.stats().items():
+        if stages is not None and stage not in stages:
+            continue
+        rows.append({"size": size, "backend": backend, "stage": (rename or {}).get(stage, stage), **s})
+    trace.HIST.reset()
+    return rows
+
+def _available(backend: str) -> bool:
+    return backend != "faiss" or importlib.util.find_spec("faiss") is not None
+
+def _env_info(model: str) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+            "cpus": os.cpu_count(), "model": model, "commit": commit, "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def run(ontology_csv: str, sizes: Sequence[int], backends: Sequence[str] = BACKENDS,
+        formats: Sequence[str] = FORMATS, spec: Optional[SynthSpec] = None, n_jds: int = 10, k: int = 10,
+        parse_sample: int = 20, model: str = "hash", seed: int = 0, log=print) -> dict:
+    """Benchmark every size × backend; returns the results document."""
+    spec = spec or SynthSpec()
+    workdir = tempfile.mkdtemp(prefix="jr_bench_")
+    rows: List[dict] = []
+    quality: List[dict] = []
+    skipped = [b for b in backends if not _available(b)]
+    backends = [b for b in backends if _available(b)]
+    try:
+        with _bench_env(workdir, model):
+            trace.HIST.reset()
+
+            # file reading per format, on a fixed sample
+            gen = Generator(ontology_csv, spec, seed)
+            sample = gen.resumes(parse_sample, prefix="sample")
+            for fmt in formats:
+                paths = [write_doc(d, os.path.join(workdir, "files", fmt), fmt) for d in sample]
+                for p in paths:
+                    extract(p, ontology_csv, use_cache=False)
+                rows += _collect(None, None, ["read"], {"read": f"read.{fmt}"})
+                log(f"read.{fmt}: {len(paths)} files")
+
+            for n in sizes:
+                gen = Generator(ontology_csv, spec, seed)
+                resumes, jds = gen.resumes(n), gen.jds(n_jds)
+
+                # parse + skill match + embed, once per size
+                docs = {d.name: parse_text(d.text, ontology_csv) for d in resumes}
+                jd_docs = [parse_text(d.text, ontology_csv) for d in jds]
+                recall = np.mean([len(set(docs[d.name].skills) & set(d.skills)) / max(1, len(d.skills))
+                                  for d in resumes])
+                corpus = ResumeCorpus(ontology_csv, backend="inmem", name=f"bench_{n}")
+                corpus.add(docs.items())
+                corpus_dir = os.path.join(workdir, f"corpus_{n}")
+                corpus.save(corpus_dir)
+                rows += _collect(n, None, ["sections", "skills", "embed"])
+                quality.append({"size": n, "skill_recall": float(recall), "vectors": int(len(corpus.vecs))})
+                del corpus
+
+                for backend in backends:
+                    c = ResumeCorpus.load(corpus_dir, ontology_csv, backend=backend, name=f"bench_{n}")
+                    for jd in jd_docs:
+                        with trace.span("match"):
+                            top = c.top_k(jd, k=k)
+                        for name, det in top:
+                            find_evidence_for_matches(docs[name].bullets, det.matched_skills, ontology_csv)
+                            suggest_gap_phrases(det.gaps, ontology_csv)
+                    rows += _collect(n, backend)
+                    log(f"n={n} {backend}: done")
+                    del c
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {"version": RESULTS_VERSION, "env": _env_info(model),
+            "config": {"sizes": list(sizes), "backends": list(backends), "skipped_backends": skipped,
+                       "formats": list(formats), "jds": n_jds, "k": k, "parse_sample": parse_sample,
+                       "seed": seed, "spec": vars(spec)},
+            "results": rows, "quality": quality}
+
+
+# ---------------- baseline comparison ----------------
+
+def _key(row: dict):
+    return row.get("size"), row.get("backend"), row["stage"]
+
+def compare(current: dict, baseline: dict, metric: str = "p50_ms", tolerance: float = 0.25,
+            floor_ms: float = 0.05) -> List[dict]:
+    """
+    One entry per stage present in both: baseline and current `metric`, their
+    ratio, and status "regression" when current > baseline × (1 + tolerance)
+    by more than floor_ms (sub-floor jitter is never flagged), "faster" for
+    the mirror case, else "ok".
+    """
+    if metric not in METRICS:
+        raise ValueError(f"metric must be one of {', '.join(METRICS)}")
+    base = {_key(r): r for r in baseline.get("results", [])}
+    out = []
+    for r in current.get("results", []):
+        b = base.get(_key(r))
+        if b is None:
+            continue
+        cur, old = float(r[metric]), float(b[metric])
+        ratio = cur / old if old > 0 else float("inf")
+        if cur > old * (1 + tolerance) and cur - old > floor_ms:
+            status = "regression"
+        elif cur < old / (1 + tolerance) and old - cur > floor_ms:
+            status = "faster"
+        else:
+            status = "ok"
+        out.append({"size": r.get("size"), "backend": r.get("backend"), "stage": r["stage"],
+                    "baseline": old, "current": cur, "ratio": ratio, "status": status})
+    return out
+
+def env_mismatch(current: dict, baseline: dict) -> List[str]:
+    """Machine fields (platform, cpus, python, numpy, model) on which the two runs differ."""
+    cur, old = current.get("env", {}), baseline.get("env", {})
+    return [f"{k}: {old.get(k)} -> {cur.get(k)}" for k in ("platform", "cpus", "python", "numpy", "model")
+            if old.get(k) != cur.get(k)]
+
+def format_results(doc: dict) -> str:
+    lines = [f"{'size':>7} {'backend':<7} {'stage':<10} {'count':>7} {'mean ms':>9} {'p50':>9} {'p90':>9} {'p99':>9}"]
+    for r in doc["results"]:
+        lines.append(f"{r['size'] if r['size'] is not None else '-':>7} {r['backend'] or '-':<7} {r['stage']:<10} "
+                     f"{r['count']:>7} {r['mean_ms']:>9.3f} {r['p50_ms']:>9.3f} {r['p90_ms']:>9.3f} {r['p99_ms']:>9.3f}")
+    for q in doc.get("quality", []):
+        lines.append(f"n={q['size']}: skill recall {q['skill_recall']:.3f}, {q['vectors']} vectors")
+    if doc["config"].get("skipped_backends"):
+        lines.append(f"skipped (not installed): {', '.join(doc['config']['skipped_backends'])}")
+    return "\n".join(lines)
+
+def format_comparison(rows: List[dict], metric: str) -> str:
+    lines = [f"{'size':>7} {'backend':<7} {'stage':<10} {'base ' + metric:>14} {'current':>10} {'ratio':>7}  status"]
+    for r in rows:
+        lines.append(f"{r['size'] if r['size'] is not None else '-':>7} {r['backend'] or '-':<7} {r['stage']:<10} "
+                     f"{r['baseline']:>14.3f} {r['current']:>10.3f} {r['ratio']:>7.2f}  {r['status']}")
+    n = sum(r["status"] == "regression" for r in rows)
+    lines.append(f"{n} regression(s) in {len(rows)} compared stages")
+    return "\n".join(lines)
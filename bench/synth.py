@@ -0,0 +1,144 @@
+# bench/synth.py
+"""
+Synthetic resumes and JDs drawn from the skills ontology, for benchmarks.
+
+Documents are laid out the way `core.extractor` reads them (an Experience
+section of "- " bullets, Education, a Skills line), so parsing, skill
+matching and embedding all do realistic work. Generation is deterministic
+for a given seed and spec.
+"""
+from __future__ import annotations
+import os, random, textwrap
+from dataclasses import dataclass
+from typing import List, NamedTuple, Optional
+
+from core.ontology_loader import get_ontology
+
+FORMATS = ("txt", "docx", "pdf")
+
+VERBS = ["Built", "Led", "Designed", "Migrated", "Automated", "Maintained", "Scaled", "Launched",
+         "Improved", "Delivered", "Owned", "Refactored", "Coordinated", "Streamlined", "Introduced"]
+OBJECTS = ["reporting pipelines", "customer onboarding flows", "billing services", "internal dashboards",
+           "data quality checks", "release processes", "field operations tooling", "support workflows",
+           "inventory tracking", "training programs", "vendor integrations", "audit trails",
+           "scheduling systems", "patient intake forms", "marketing campaigns", "cost models"]
+OUTCOMES = ["cutting turnaround by {n}%", "saving {n} hours a week", "for {n} regional teams",
+            "reducing errors by {n}%", "across {n} sites", "with {n}% fewer escalations",
+            "ahead of a {n}-week deadline", "serving {n}k monthly users"]
+FILLER = ["weekly", "cross-team", "end-to-end", "on-call", "quarterly", "self-service", "shared",
+          "legacy", "regulated", "high-volume", "multi-region", "remote", "hands-on", "documented"]
+JD_LEADS = ["You will", "The role will", "You'll help", "We need someone to", "This position will"]
+JD_VERBS = ["own", "build", "improve", "support", "run", "design", "maintain", "scale"]
+DEGREES = ["B.S. Computer Science", "B.A. Economics", "M.S. Information Systems", "B.S. Nursing",
+           "Associate of Applied Science", "B.Des. Interaction Design", "MBA"]
+SCHOOLS = ["State University", "City College", "Institute of Technology", "Community College"]
+
+
+@dataclass
+class SynthSpec:
+    bullets: int = 8            # experience bullets per document
+    skills: int = 10            # distinct ontology skills per document
+    density: float = 0.6        # share of the skills named in bullets (the rest only on the Skills line)
+    filler: int = 6             # extra filler words per bullet (document length)
+
+
+class SynthDoc(NamedTuple):
+    name: str
+    text: str
+    skills: List[str]           # ontology ids placed in the text
+
+
+class Generator:
+    def __init__(self, ontology_csv: str, spec: Optional[SynthSpec] = None, seed: int = 0):
+        onto = get_ontology(ontology_csv)
+        self.spec = spec or SynthSpec()
+        self.rng = random.Random(seed)
+        # category nodes are never reported as skills; skip them
+        self.skills = sorted((sid, s.label) for sid, s in onto.skills.items() if sid not in onto.category_ids)
+
+    def _pick(self) -> List[tuple]:
+        return self.rng.sample(self.skills, min(self.spec.skills, len(self.skills)))
+
+    def _filler(self) -> str:
+        return " ".join(self.rng.choice(FILLER) for _ in range(self.spec.filler))
+
+    def _outcome(self) -> str:
+        return self.rng.choice(OUTCOMES).format(n=self.rng.randint(2, 60))
+
+    def _split(self, picked):
+        n_inline = round(len(picked) * self.spec.density)
+        return picked[:n_inline], picked[n_inline:]
+
+    def resume(self, name: str) -> SynthDoc:
+        sp, r = self.spec, self.rng
+        picked = self._pick()
+        inline, listed = self._split(picked)
+        lines = [name.replace("_", " ").title(), "", "Experience"]
+        for i in range(sp.bullets):
+            using = f" using {inline[i][1]}" if i < len(inline) else ""
+            lines.append(f"- {r.choice(VERBS)} {self._filler()} {r.choice(OBJECTS)}{using}, {self._outcome()}")
+        # skills beyond the bullet count still need a mention
+        for _, label in inline[sp.bullets:]:
+            lines.append(f"- {r.choice(VERBS)} {r.choice(OBJECTS)} with {label}")
+        lines += ["", "Education", f"- {r.choice(DEGREES)}, {r.choice(SCHOOLS)}", "", "Skills",
+                  ", ".join(label for _, label in listed)]
+        return SynthDoc(name, "\n".join(lines) + "\n", [sid for sid, _ in picked])
+
+    def jd(self, name: str) -> SynthDoc:
+        sp, r = self.spec, self.rng
+        picked = self._pick()
+        inline, listed = self._split(picked)
+        lines = [f"Job posting {name}", ""]
+        for i in range(sp.bullets):
+            using = f" with {inline[i][1]}" if i < len(inline) else ""
+            lines.append(f"- {r.choice(JD_LEADS)} {r.choice(JD_VERBS)} {self._filler()} {r.choice(OBJECTS)}{using}")
+        for _, label in inline[sp.bullets:]:
+            lines.append(f"- Hands-on {label}")
+        lines += ["", "Skills", ", ".join(label for _, label in listed)]
+        return SynthDoc(name, "\n".join(lines) + "\n", [sid for sid, _ in picked])
+
+    def resumes(self, n: int, prefix: str = "resume") -> List[SynthDoc]:
+        return [self.resume(f"{prefix}_{i:06d}") for i in range(n)]
+
+    def jds(self, n: int, prefix: str = "jd") -> List[SynthDoc]:
+        return [self.jd(f"{prefix}_{i:06d}") for i in range(n)]
+
+
+# ---------------- writers ----------------
+
+def _write_docx(text: str, path: str):
+    from docx import Document
+    doc = Document()
+    for line in text.splitlines():
+        doc.add_paragraph(line)
+    doc.save(path)
+
+def _write_pdf(text: str, path: str, font_size: float = 9.0, width: int = 110):
+    import fitz  # PyMuPDF
+    pdf = fitz.open()
+    lines = [w for line in text.splitlines() for w in (textwrap.wrap(line, width) or [""])]
+    step = font_size * 1.4
+    per_page = int((842 - 2 * 56) // step)
+    for start in range(0, len(lines), per_page):
+        page = pdf.new_page(width=595, height=842)
+        y = 56 + font_size
+        for line in lines[start:start + per_page]:
+            page.insert_text((56, y), line, fontsize=font_size)
+            y += step
+    pdf.save(path)
+    pdf.close()
+
+def write_doc(doc: SynthDoc, directory: str, fmt: str) -> str:
+    """Write one document as <directory>/<name>.<fmt>; returns the path."""
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{doc.name}.{fmt}")
+    if fmt == "txt":
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(doc.text)
+    elif fmt == "docx":
+        _write_docx(doc.text, path)
+    else:
+        _write_pdf(doc.text, path)
+    return path
@@ -0,0 +1,503 @@
+# cli.py — batch entry points (python cli.py --help)
+
+import csv, glob, json, os, subprocess, sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+import typer
+
+from core.extractor import extract
+from core.scoring import AGGREGATIONS, score, score_block, score_components
+from core.components import ComponentStore, ComponentWriter
+from core.search_common import topk_indices
+from core.ontology_loader import get_ontology
+from core.hierarchy import get_hierarchy
+from core import skillbits, trace
+from core.config import load_weights
+from core.pipeline import embed_docs, pair_top_sims
+from core.schemas import ParsedDoc
+from core.corpus import ResumeCorpus
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+ONTOLOGY_CSV = os.path.join(ROOT, "ontology", "skills.csv")
+DOC_EXTS = (".pdf", ".docx", ".txt")
+BENCH_BASELINE = os.path.join(ROOT, "bench", "baseline.json")
+FIELDS = ["resume", "jd", "total", "semantic_sim", "coverage", "matched_skills", "gaps"]
+
+app = typer.Typer(help="JR Match batch tools.", no_args_is_help=True)
+
+
+@app.callback()
+def main():
+    """JR Match batch tools."""
+
+
+# ---------------- inputs ----------------
+
+def expand_inputs(specs: List[str]) -> List[str]:
+    """Directories (recursive) and glob patterns -> sorted unique document paths."""
+    out: Set[str] = set()
+    for spec in specs:
+        if os.path.isdir(spec):
+            for dirpath, _, names in os.walk(spec):
+                out.update(os.path.join(dirpath, n) for n in names if n.lower().endswith(DOC_EXTS))
+        else:
+            out.update(p for p in glob.glob(spec, recursive=True)
+                       if os.path.isfile(p) and p.lower().endswith(DOC_EXTS))
+    return sorted(os.path.abspath(p) for p in out)
+
+def _worker_init():
+    # pool workers are leaves: no nested PDF page pool inside them
+    os.environ["JR_PDF_WORKERS"] = "1"
+
+def _parse(args: Tuple[str, str, str]) -> Tuple[str, Optional[ParsedDoc], Optional[str]]:
+    path, ontology_csv, tag = args
+    try:
+        return path, extract(path, ontology_csv, dump_tag=tag), None
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+def parse_stream(pool: ProcessPoolExecutor, paths: List[str], ontology_csv: str, tag: str,
+                 window: int) -> Iterator[Tuple[str, ParsedDoc]]:
+    """Parse in the pool, in input order, with at most `window` documents in flight."""
+    pending = []
+    it = iter(paths)
+    for p in it:
+        pending.append(pool.submit(_parse, (p, ontology_csv, tag)))
+        if len(pending) >= window:
+            break
+    while pending:
+        path, doc, err = pending.pop(0).result()
+        nxt = next(it, None)
+        if nxt is not None:
+            pending.append(pool.submit(_parse, (nxt, ontology_csv, tag)))
+        if err:
+            typer.echo(f"[skip] {path}: {err}", err=True)
+            continue
+        yield path, doc
+
+
+# ---------------- outputs ----------------
+
+class _Writer:
+    def __init__(self, path: str, fmt: str, append: bool):
+        self.fmt = fmt
+        new = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        self.f = open(path, "a" if append else "w", encoding="utf-8", newline="")
+        self.csv = csv.DictWriter(self.f, fieldnames=FIELDS) if fmt == "csv" else None
+        if self.csv and new:
+            self.csv.writeheader()
+
+    def write(self, row: dict):
+        if self.csv:
+            self.csv.writerow({**row, "matched_skills": ";".join(row["matched_skills"]),
+                               "gaps": ";".join(row["gaps"])})
+        else:
+            self.f.write(json.dumps(row) + "\n")
+
+    def flush(self):
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    def close(self):
+        self.f.close()
+
+def completed_pairs(path: str, fmt: str) -> Set[Tuple[str, str]]:
+    """Pairs already in `path`; drops a torn last line left by an interrupted run."""
+    done: Set[Tuple[str, str]] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "rb+") as f:
+        data = f.read()
+        cut = data.rfind(b"\n") + 1
+        if cut < len(data):
+            f.truncate(cut)
+            data = data[:cut]
+    lines = data.decode("utf-8").splitlines()
+    if fmt == "csv":
+        for row in csv.DictReader(lines):
+            done.add((row["resume"], row["jd"]))
+    else:
+        for line in lines:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            done.add((row["resume"], row["jd"]))
+    return done
+
+
+# ---------------- commands ----------------
+
+@app.command()
+def match(
+    resumes: List[str] = typer.Option(..., "--resumes", "-r", help="Resume directory or glob (repeatable)."),
+    jds: List[str] = typer.Option(..., "--jds", "-j", help="JD directory or glob (repeatable)."),
+    out: str = typer.Option("matches.jsonl", "--out", "-o", help="Output file (.jsonl or .csv)."),
+    fmt: Optional[str] = typer.Option(None, "--format", help="jsonl | csv (default: from --out)."),
+    ontology: str = typer.Option(ONTOLOGY_CSV, help="Skills ontology CSV."),
+    workers: int = typer.Option(os.cpu_count() or 1, help="Parser processes."),
+    block: int = typer.Option(64, help="Resumes per embed/score block (bounds memory)."),
+    fresh: bool = typer.Option(False, "--fresh", help="Ignore existing output instead of resuming."),
+    top: int = typer.Option(0, "--top", help="Keep only the best N JDs per resume (0 = all pairs)."),
+    sim: str = typer.Option("max", "--sim", help="Semantic score: max | mean_best | topn_mean."),
+    trace_out: Optional[str] = typer.Option(None, "--trace", help="Write per-stage spans (JSONL) here and print a latency summary."),
+    components: Optional[str] = typer.Option(None, "--components", help="Also store every pair's score components here (see `rerank`)."),
+):
+    """Score every resume against every JD, streaming MatchDetail rows."""
+    if sim not in AGGREGATIONS:
+        raise typer.BadParameter(f"--sim must be one of {', '.join(AGGREGATIONS)}")
+    fmt = (fmt or ("csv" if out.lower().endswith(".csv") else "jsonl")).lower()
+    if fmt not in {"jsonl", "csv"}:
+        raise typer.BadParameter("format must be jsonl or csv")
+
+    r_paths = expand_inputs(resumes)
+    j_paths = expand_inputs(jds)
+    if not r_paths or not j_paths:
+        typer.echo("no resumes or no JDs found", err=True)
+        raise typer.Exit(1)
+
+    done = set() if fresh else completed_pairs(out, fmt)
+    if top > 0:
+        # top-N output is written per resume in one go; any row means done
+        started = {r for r, _ in done}
+        todo = [p for p in r_paths if p not in started]
+    else:
+        todo = [p for p in r_paths if any((p, j) not in done for j in j_paths)]
+    typer.echo(f"{len(r_paths)} resumes × {len(j_paths)} JDs; {len(r_paths) - len(todo)} resumes already done", err=True)
+    if not todo:
+        return
+
+    if trace_out:
+        if os.path.exists(trace_out):
+            os.remove(trace_out)
+        trace.add_sink(trace.JsonlSink(trace_out))
+        # parser processes inherit the sink through the environment
+        os.environ["JR_TRACE"] = ",".join(filter(None, [os.getenv("JR_TRACE"), f"jsonl:{trace_out}"]))
+
+    weights = load_weights()
+    writer = _Writer(out, fmt, append=not fresh)
+    comp_writer = None
+    n_rows = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init) as pool:
+            # JDs: parsed and embedded once, kept resident
+            jd_items = list(parse_stream(pool, j_paths, ontology, "jd", window=workers * 4))
+            jd_names = [p for p, _ in jd_items]
+            jd_docs = [d for _, d in jd_items]
+            if not jd_docs:
+                typer.echo("no JD could be parsed", err=True)
+                raise typer.Exit(1)
+            J, j_starts = embed_docs(jd_docs)
+            onto = get_ontology(ontology)
+            hier = get_hierarchy(onto)
+            skill_pos = onto.skill_pos
+            J_bits = skillbits.encode((d.skills for d in jd_docs), skill_pos)
+            if components:
+                try:
+                    comp_writer = ComponentWriter(components, {"ontology_version": onto.version,
+                                                               "hier_weights": list(hier.weights)}, fresh=fresh)
+                except ValueError as e:
+                    typer.echo(f"{e}; rerun with --fresh to start it over", err=True)
+                    raise typer.Exit(1)
+
+            # resumes: streamed in blocks
+            blk: List[Tuple[str, ParsedDoc]] = []
+
+            def flush_block():
+                nonlocal n_rows
+                R, r_starts = embed_docs([d for _, d in blk])
+                if top > 0 or comp_writer:
+                    R_bits = skillbits.encode((d.skills for _, d in blk), skill_pos)
+                if comp_writer:
+                    comps = score_components(R @ J.T, r_starts, j_starts, R_bits, J_bits, hierarchy=hier)
+                    comp_writer.write([n for n, _ in blk], jd_names, comps)
+                    sims = comps[f"sim_{sim}"]
+                else:
+                    sims = pair_top_sims(R, r_starts, J, j_starts, aggregation=sim)
+                if top > 0:
+                    # rank the whole block with bitset coverage; materialize only the kept pairs
+                    total = score_block(sims, R_bits, J_bits, weights, hierarchy=hier)[0]
+                    keep = topk_indices(total, top)
+                else:
+                    keep = [range(len(jd_docs))] * len(blk)
+                for ri, (rname, rdoc) in enumerate(blk):
+                    for ji in keep[ri]:
+                        jname, jdoc = jd_names[ji], jd_docs[ji]
+                        if (rname, jname) in done:
+                            continue
+                        d = score(rdoc, jdoc, float(sims[ri, ji]), weights=weights, hierarchy=hier)
+                        writer.write({"resume": rname, "jd": jname, "total": d.total,
+                                      "semantic_sim": d.semantic_sim, "coverage": d.coverage,
+                                      "matched_skills": d.matched_skills, "gaps": d.gaps})
+                        n_rows += 1
+                writer.flush()
+                blk.clear()
+
+            for item in parse_stream(pool, todo, ontology, "resume", window=max(block, workers * 4)):
+                blk.append(item)
+                if len(blk) >= block:
+                    flush_block()
+            if blk:
+                flush_block()
+    finally:
+        writer.close()
+    typer.echo(f"wrote {n_rows} rows to {out}", err=True)
+    if comp_writer:
+        typer.echo(f"score components in {components}", err=True)
+    if trace_out:
+        typer.echo(_trace_summary(trace_out), err=True)
+
+
+def _trace_summary(path: str) -> str:
+    hist = trace.Histogram()
+    hist.merge_records(trace.read_jsonl(path))
+    return hist.format()
+
+@app.command("trace-report")
+def trace_report(path: str = typer.Argument(..., help="JSONL span file (JR_TRACE=jsonl:<path> or match --trace).")):
+    """Per-stage latency histogram (count, total, p50/p90/p99) of a span file."""
+    typer.echo(_trace_summary(path))
+
+
+RERANK_FIELDS = ["resume", "jd", "total", "semantic_sim", "coverage", "n_matched", "n_gaps"]
+
+@app.command()
+def rerank(
+    store: str = typer.Argument(..., help="Component store written by `match --components`."),
+    out: str = typer.Option("reranked.jsonl", "--out", "-o", help="Output file (.jsonl or .csv)."),
+    sim_weight: Optional[float] = typer.Option(None, help="Semantic weight (default: config.json)."),
+    cov_weight: Optional[float] = typer.Option(None, help="Coverage weight (default: config.json)."),
+    sim: str = typer.Option("max", "--sim", help="Semantic score: max | mean_best | topn_mean."),
+    flat: bool = typer.Option(False, "--flat", help="Exact-match coverage instead of hierarchical."),
+    top: int = typer.Option(0, "--top", help="Keep only the best N per group (0 = all)."),
+    per: str = typer.Option("resume", help="Rank within each: resume | jd | all."),
+):
+    """Re-rank stored score components under new weights, without parsing or embedding."""
+    if sim not in AGGREGATIONS:
+        raise typer.BadParameter(f"--sim must be one of {', '.join(AGGREGATIONS)}")
+    if per not in ("resume", "jd", "all"):
+        raise typer.BadParameter("--per must be resume, jd or all")
+    w_sim, w_cov = load_weights()
+    weights = (w_sim if sim_weight is None else sim_weight, w_cov if cov_weight is None else cov_weight)
+    cs = ComponentStore.load(store)
+    total = cs.totals(weights, sim, hierarchical=not flat)
+    order = cs.rank(total, top, None if per == "all" else per)
+    with open(out, "w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=RERANK_FIELDS) if out.lower().endswith(".csv") else None
+        if w:
+            w.writeheader()
+        for row in cs.rows(order, total, sim, hierarchical=not flat):
+            if w:
+                w.writerow(row)
+            else:
+                f.write(json.dumps(row) + "\n")
+    typer.echo(f"{len(cs)} pairs; wrote {len(order)} rows to {out} (sim {weights[0]:g}, coverage {weights[1]:g})", err=True)
+
+
+@app.command("corpus-add")
+def corpus_add(
+    resumes: List[str] = typer.Option(..., "--resumes", "-r", help="Resume directory or glob (repeatable)."),
+    corpus: str = typer.Option(os.path.join(ROOT, "data", "corpus"), help="Corpus directory."),
+    ontology: str = typer.Option(ONTOLOGY_CSV, help="Skills ontology CSV."),
+    workers: int = typer.Option(os.cpu_count() or 1, help="Parser processes."),
+):
+    """Parse resumes and add (or replace) them in a persistent corpus."""
+    paths = expand_inputs(resumes)
+    c = (ResumeCorpus.load(corpus, ontology) if os.path.exists(os.path.join(corpus, "docs.json"))
+         else ResumeCorpus(ontology))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init) as pool:
+        c.add(parse_stream(pool, paths, ontology, "resume", window=workers * 4))
+    c.save(corpus)
+    typer.echo(f"corpus {corpus}: {len(c)} resumes, {len(c.rows)} vectors", err=True)
+
+
+@app.command()
+def rank(
+    jd: str = typer.Argument(..., help="Job description file."),
+    corpus: str = typer.Option(os.path.join(ROOT, "data", "corpus"), help="Corpus directory."),
+    k: int = typer.Option(10, "--top", "-k", help="Number of resumes to return."),
+    backend: str = typer.Option("inmem", help="inmem | sqlite | faiss | mmap"),
+    ontology: str = typer.Option(ONTOLOGY_CSV, help="Skills ontology CSV."),
+):
+    """Top-k resumes in the corpus for one JD (JSONL on stdout)."""
+    c = ResumeCorpus.load(corpus, ontology, backend=backend)
+    job = extract(jd, ontology, dump_tag="jd")
+    for name, d in c.top_k(job, k=k):
+        typer.echo(json.dumps({"resume": name, "jd": os.path.abspath(jd), "total": d.total,
+                               "semantic_sim": d.semantic_sim, "coverage": d.coverage,
+                               "matched_skills": d.matched_skills, "gaps": d.gaps}))
+
+
+def _report_vectors(corpus: Optional[str], n: int, dim: int, queries: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Corpus vectors (or clustered synthetic ones) plus lightly perturbed queries drawn from them."""
+    rng = np.random.default_rng(0)
+    if corpus:
+        X = np.load(os.path.join(corpus, "vectors.npy")).astype("float32")
+    else:
+        centers = rng.normal(size=(max(1, n // 200), dim))
+        X = (centers[rng.integers(0, len(centers), n)] + 0.5 * rng.normal(size=(n, dim))).astype("float32")
+        X /= np.linalg.norm(X, axis=1, keepdims=True)
+    Q = X[rng.choice(len(X), size=min(queries, len(X)), replace=False)]
+    Q = Q + 0.05 * rng.normal(size=Q.shape).astype("float32")
+    Q /= np.linalg.norm(Q, axis=1, keepdims=True)
+    return X, Q
+
+
+@app.command("faiss-report")
+def faiss_report(
+    corpus: Optional[str] = typer.Option(None, help="Corpus directory (uses its vectors.npy); default: synthetic."),
+    n: int = typer.Option(100000, help="Synthetic vectors when no corpus is given."),
+    dim: int = typer.Option(384, help="Synthetic vector width."),
+    queries: int = typer.Option(1000, help="Number of queries."),
+    k: int = typer.Option(10, "--top", "-k", help="Recall@k cut-off."),
+):
+    """Recall vs latency of FAISS index types against the exact flat index."""
+    from adapters.search_faiss import recall_report
+    X, Q = _report_vectors(corpus, n, dim, queries)
+    typer.echo(f"{len(X)} vectors × {X.shape[1]}d, {len(Q)} queries, recall@{k}")
+    typer.echo(f"{'config':<40} {'build s':>8} {'ms/query':>9} {'MiB':>8} {'recall':>7}")
+    for row in recall_report(X, Q, k):
+        cfg = " ".join(f"{a}={b}" for a, b in row["config"].items())
+        typer.echo(f"{cfg:<40} {row['build_s']:>8.2f} {row['query_ms']:>9.3f} "
+                   f"{row['bytes'] / 2**20:>8.1f} {row['recall']:>7.3f}")
+
+
+@app.command("quant-report")
+def quant_report(
+    corpus: Optional[str] = typer.Option(None, help="Corpus directory (uses its vectors.npy); default: synthetic."),
+    n: int = typer.Option(100000, help="Synthetic vectors when no corpus is given."),
+    dim: int = typer.Option(384, help="Synthetic vector width."),
+    queries: int = typer.Option(1000, help="Number of queries."),
+    k: int = typer.Option(10, "--top", "-k", help="Recall@k cut-off."),
+):
+    """Memory saved and top-k recall of float16 / int8 vector storage against float32."""
+    from core.quantize import recall_report
+    X, Q = _report_vectors(corpus, n, dim, queries)
+    typer.echo(f"{len(X)} vectors × {X.shape[1]}d, {len(Q)} queries, recall@{k}")
+    typer.echo(f"{'precision':<10} {'MiB':>8} {'saved':>7} {'recall':>7}")
+    for row in recall_report(X, Q, k):
+        typer.echo(f"{row['precision']:<10} {row['bytes'] / 2**20:>8.1f} {row['saved']:>7.1%} {row['recall']:>7.3f}")
+
+STARTUP_MODULES = ["core.schemas", "core.embed", "core.extractor", "core.corpus", "core.search_sqlite",
+                   "core.search_mmap", "adapters.search_faiss", "api.main", "cli"]
+HEAVY_MODULES = ["torch", "sentence_transformers", "docx", "faiss", "pdfplumber", "fitz", "streamlit"]
+
+@app.command("startup-bench")
+def startup_bench(
+    runs: int = typer.Option(5, help="Fresh interpreters per measurement (median is reported)."),
+    model: str = typer.Option("hash", help="Embedding model for the first-embed measurement."),
+):
+    """Import time of each entry module in a fresh interpreter, plus time to the first embedding."""
+    def measure(code: str) -> Tuple[float, str]:
+        times, heavy = [], ""
+        for _ in range(runs):
+            out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+            if out.returncode != 0:
+                return float("nan"), out.stderr.strip().splitlines()[-1]
+            t, heavy = out.stdout.strip().split("|")
+            times.append(float(t) * 1e3)
+        return float(np.median(times)), heavy
+
+    probe = ("import sys, time; t0 = time.perf_counter(); {body}; t = time.perf_counter() - t0; "
+             f"print(t, '|', ' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    typer.echo(f"{'target':<32} {'median ms':>10}  heavy modules loaded")
+    for m in STARTUP_MODULES:
+        ms, heavy = measure(probe.format(body=f"import {m}"))
+        typer.echo(f"import {m:<25} {ms:>10.1f}  {heavy.strip()}")
+    ms, heavy = measure(probe.format(body=f"from core.embed import embed; embed(['warm up'], {model!r}, use_cache=False)"))
+    typer.echo(f"{'first embed (' + model + ')':<32} {ms:>10.1f}  {heavy.strip()}")
+
+
+def _int_list(spec: str) -> List[int]:
+    try:
+        return [int(x) for x in spec.split(",") if x.strip()]
+    except ValueError:
+        raise typer.BadParameter(f"expected comma-separated integers, got {spec!r}")
+
+def _str_list(spec: str, allowed: Tuple[str, ...], name: str) -> List[str]:
+    items = [x.strip() for x in spec.split(",") if x.strip()]
+    bad = [x for x in items if x not in allowed]
+    if bad:
+        raise typer.BadParameter(f"{name}: unknown {', '.join(bad)}; expected {', '.join(allowed)}")
+    return items
+
+@app.command()
+def synth(
+    out: str = typer.Option(..., "--out", "-o", help="Directory for resumes/ and jds/."),
+    n_resumes: int = typer.Option(100, "--resumes", help="Number of resumes."),
+    n_jds: int = typer.Option(10, "--jds", help="Number of JDs."),
+    fmt: str = typer.Option("txt", "--format", help="txt | docx | pdf"),
+    bullets: int = typer.Option(8, help="Experience bullets per document."),
+    skills: int = typer.Option(10, help="Ontology skills per document."),
+    density: float = typer.Option(0.6, help="Share of skills named in bullets (rest only in the Skills section)."),
+    seed: int = typer.Option(0, help="Random seed."),
+    ontology: str = typer.Option(ONTOLOGY_CSV, help="Skills ontology CSV."),
+):
+    """Write a synthetic resume/JD corpus drawn from the ontology."""
+    from bench.synth import FORMATS, Generator, SynthSpec, write_doc
+    fmt = _str_list(fmt, FORMATS, "--format")[0]
+    gen = Generator(ontology, SynthSpec(bullets=bullets, skills=skills, density=density), seed)
+    for d in gen.resumes(n_resumes):
+        write_doc(d, os.path.join(out, "resumes"), fmt)
+    for d in gen.jds(n_jds):
+        write_doc(d, os.path.join(out, "jds"), fmt)
+    typer.echo(f"wrote {n_resumes} resumes and {n_jds} JDs ({fmt}) under {out}", err=True)
+
+@app.command()
+def bench(
+    sizes: str = typer.Option("10,100,1000", help="Corpus sizes (resumes), comma-separated; up to 100000."),
+    backends: str = typer.Option("inmem,sqlite,faiss", help="Vector backends to compare."),
+    formats: str = typer.Option("txt,docx,pdf", help="File formats for the read stage."),
+    n_jds: int = typer.Option(10, "--jds", help="JD queries per size and backend."),
+    k: int = typer.Option(10, help="Top-k resumes per JD."),
+    parse_sample: int = typer.Option(20, help="Files per format for the read stage."),
+    model: str = typer.Option("hash", help="Embedding model; the default hashing embedder needs no download."),
+    bullets: int = typer.Option(8, help="Experience bullets per document."),
+    skills: int = typer.Option(10, help="Ontology skills per document."),
+    density: float = typer.Option(0.6, help="Share of skills named in bullets."),
+    seed: int = typer.Option(0, help="Random seed."),
+    out: Optional[str] = typer.Option("bench_results.json", "--out", "-o", help="Results JSON."),
+    baseline: Optional[str] = typer.Option(BENCH_BASELINE, help="Baseline results JSON to compare against."),
+    metric: str = typer.Option("p50_ms", help="Compared metric: mean_ms | p50_ms | p90_ms | p99_ms."),
+    tolerance: float = typer.Option(0.25, help="Allowed slowdown before a stage is flagged (0.25 = +25%)."),
+    floor_ms: float = typer.Option(0.05, help="Ignore differences smaller than this."),
+    save_baseline: bool = typer.Option(False, "--save-baseline", help="Also write the results to --baseline."),
+    fail_on_regression: bool = typer.Option(False, "--fail-on-regression", help="Exit 1 if any stage regressed."),
+    ontology: str = typer.Option(ONTOLOGY_CSV, help="Skills ontology CSV."),
+):
+    """Time every pipeline stage on synthetic corpora across vector backends; compare with a baseline."""
+    from bench.synth import FORMATS, SynthSpec
+    from bench import harness
+    doc = harness.run(ontology, _int_list(sizes), _str_list(backends, harness.BACKENDS + ("mmap",), "--backends"),
+                      _str_list(formats, FORMATS, "--formats"), SynthSpec(bullets=bullets, skills=skills, density=density),
+                      n_jds=n_jds, k=k, parse_sample=parse_sample, model=model, seed=seed,
+                      log=lambda msg: typer.echo(msg, err=True))
+    typer.echo(harness.format_results(doc))
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=1)
+        typer.echo(f"results written to {out}", err=True)
+
+    regressions = 0
+    if baseline and os.path.exists(baseline) and not save_baseline:
+        with open(baseline, encoding="utf-8") as f:
+            base = json.load(f)
+        for d in harness.env_mismatch(doc, base):
+            typer.echo(f"warning: baseline from a different environment ({d})", err=True)
+        rows = harness.compare(doc, base, metric, tolerance, floor_ms)
+        typer.echo(harness.format_comparison(rows, metric))
+        regressions = sum(r["status"] == "regression" for r in rows)
+    elif baseline and save_baseline:
+        with open(baseline, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=1)
+        typer.echo(f"baseline written to {baseline}", err=True)
+    elif baseline:
+        typer.echo(f"no baseline at {baseline}; run with --save-baseline to create it", err=True)
+    if regressions and fail_on_regression:
+        raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,141 @@
+# core/components.py
+"""
+Columnar store of weight-independent score components (scoring.COMPONENTS)
+for every scored resume × JD pair, so any weight vector or aggregation
+re-ranks a whole result set in one vectorized pass: no parsing, no
+embedding, no skill matching.
+
+Layout of a store directory:
+
+  meta.json            format version, columns, ontology version, hierarchy weights
+  block-<n>.npz        one scored block: resume names, JD names and one
+                       (n_resumes, n_jds) array per column
+
+Blocks are written to a temp file and renamed, so an interrupted run loses
+at most the block in flight. A pair scored again in a later block
+supersedes the earlier one. meta.json is written when the store is
+created; a resumed run must bring the same meta, or its blocks would mix
+with ones scored under other settings.
+"""
+from __future__ import annotations
+import glob, json, os
+from typing import Dict, Iterator, List, Optional, Sequence
+import numpy as np
+
+from .scoring import COMPONENTS, combine
+from .search_common import topk_indices
+
+VERSION = 1
+
+
+class ComponentWriter:
+    def __init__(self, path: str, meta: Optional[dict] = None, fresh: bool = False):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        existing = sorted(glob.glob(os.path.join(path, "block-*.npz")))
+        if fresh:
+            for f in existing:
+                os.remove(f)
+            existing = []
+        self._next = int(os.path.basename(existing[-1])[6:-4]) + 1 if existing else 0
+        meta = json.loads(json.dumps({"version": VERSION, "columns": list(COMPONENTS), **(meta or {})}))
+        meta_path = os.path.join(path, "meta.json")
+        if existing:
+            try:
+                with open(meta_path, encoding="utf-8") as f:
+                    stored = json.load(f)
+            except (OSError, ValueError):
+                stored = None
+            if stored != meta:
+                diff = sorted(k for k in set(meta) | set(stored or {}) if (stored or {}).get(k) != meta.get(k))
+                raise ValueError(f"component store {path} was written with different settings "
+                                 f"({', '.join(diff)})")
+            return
+        tmp = meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, meta_path)
+
+    def write(self, resumes: Sequence[str], jds: Sequence[str], components: Dict[str, np.ndarray]):
+        """One block: components[col] is (len(resumes), len(jds))."""
+        cols = {c: np.asarray(components[c], dtype=np.int32 if c.startswith("n_") else np.float32)
+                for c in COMPONENTS}
+        name = os.path.join(self.path, f"block-{self._next:06d}.npz")
+        tmp = name + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, resumes=np.asarray(resumes, dtype=str), jds=np.asarray(jds, dtype=str), **cols)
+        os.replace(tmp, name)
+        self._next += 1
+
+
+class ComponentStore:
+    """One row per pair: `resume_idx`, `jd_idx` into `resumes` / `jds`, plus one array per column."""
+
+    def __init__(self, resumes: List[str], jds: List[str], resume_idx: np.ndarray, jd_idx: np.ndarray,
+                 columns: Dict[str, np.ndarray], meta: Optional[dict] = None):
+        self.resumes, self.jds = resumes, jds
+        self.resume_idx, self.jd_idx = resume_idx, jd_idx
+        self.columns = columns
+        self.meta = meta or {}
+
+    def __len__(self):
+        return len(self.resume_idx)
+
+    @classmethod
+    def load(cls, path: str) -> "ComponentStore":
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != VERSION:
+            raise ValueError(f"unsupported component store version {meta.get('version')}")
+        r_pos: Dict[str, int] = {}
+        j_pos: Dict[str, int] = {}
+        ri, ji, cols = [], [], {c: [] for c in COMPONENTS}
+        for fname in sorted(glob.glob(os.path.join(path, "block-*.npz"))):
+            with np.load(fname) as z:
+                r = np.array([r_pos.setdefault(n, len(r_pos)) for n in z["resumes"].tolist()], dtype=np.int64)
+                j = np.array([j_pos.setdefault(n, len(j_pos)) for n in z["jds"].tolist()], dtype=np.int64)
+                ri.append(np.repeat(r, len(j)))
+                ji.append(np.tile(j, len(r)))
+                for c in COMPONENTS:
+                    cols[c].append(z[c].reshape(-1))
+        if not ri:
+            empty = np.zeros(0, dtype=np.int64)
+            return cls([], [], empty, empty, {c: np.zeros(0) for c in COMPONENTS}, meta)
+        ri, ji = np.concatenate(ri), np.concatenate(ji)
+        # keep the last occurrence of each pair
+        key = ri * len(j_pos) + ji
+        _, last = np.unique(key[::-1], return_index=True)
+        keep = np.sort(len(key) - 1 - last)
+        return cls(list(r_pos), list(j_pos), ri[keep], ji[keep],
+                   {c: np.concatenate(v)[keep] for c, v in cols.items()}, meta)
+
+    def totals(self, weights=None, aggregation: str = "max", hierarchical: bool = True) -> np.ndarray:
+        return combine(self.columns, weights, aggregation, hierarchical)
+
+    def rank(self, total: np.ndarray, top: int = 0, per: Optional[str] = "resume") -> np.ndarray:
+        """
+        Row order by descending total, within each resume (`per="resume"`),
+        each JD (`per="jd"`) or overall (None); `top` > 0 keeps that many per group.
+        """
+        if per is None:
+            return (topk_indices(total[None, :], top)[0] if 0 < top < len(total)
+                    else np.argsort(-total, kind="stable"))
+        if per not in ("resume", "jd"):
+            raise ValueError("per must be 'resume', 'jd' or None")
+        group = self.resume_idx if per == "resume" else self.jd_idx
+        order = np.lexsort((-total, group))
+        if top > 0 and len(order):
+            g = group[order]
+            starts = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+            within = np.arange(len(g)) - np.repeat(starts, np.diff(np.r_[starts, len(g)]))
+            order = order[within < top]
+        return order
+
+    def rows(self, order: np.ndarray, total: np.ndarray, aggregation: str = "max",
+             hierarchical: bool = True) -> Iterator[dict]:
+        sims = self.columns[f"sim_{aggregation}"]
+        cov = self.columns["hier_coverage" if hierarchical else "coverage"]
+        for i in order.tolist():
+            yield {"resume": self.resumes[self.resume_idx[i]], "jd": self.jds[self.jd_idx[i]],
+                   "total": float(total[i]), "semantic_sim": float(sims[i]), "coverage": float(cov[i]),
+                   "n_matched": int(self.columns["n_matched"][i]), "n_gaps": int(self.columns["n_gaps"][i])}
@@ -3,10 +3,9 @@ import json, os
 USE_FAISS = True
 _DEFAULT = {"sim_weight": 0.6, "cov_weight": 0.4}
 
-def load_weights(cfg_path: str | None = None) -> tuple[float, float]:
-    """Load (sim_weight, cov_weight) from config.json with safe defaults."""
-    if cfg_path is None:
-        cfg_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config.json")
+_weights_cache: dict = {}   # path -> ((mtime_ns, size) or None, weights)
+
+def _read_weights(cfg_path: str) -> tuple[float, float]:
     try:
         with open(cfg_path, "r", encoding="utf-8") as f:
             cfg = json.load(f)
@@ -16,13 +15,33 @@ def load_weights(cfg_path: str | None = None) -> tuple[float, float]:
     except Exception:
         return _DEFAULT["sim_weight"], _DEFAULT["cov_weight"]
 
+def load_weights(cfg_path: str | None = None) -> tuple[float, float]:
+    """
+    (sim_weight, cov_weight) from config.json with safe defaults. The file
+    is parsed once and again only after it changes (one stat per call), so
+    long-running processes pick up edits without a restart.
+    """
+    if cfg_path is None:
+        cfg_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config.json")
+    try:
+        st = os.stat(cfg_path)
+        stamp = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = None
+    hit = _weights_cache.get(cfg_path)
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+    weights = _read_weights(cfg_path) if stamp else (_DEFAULT["sim_weight"], _DEFAULT["cov_weight"])
+    _weights_cache[cfg_path] = (stamp, weights)
+    return weights
+
 def backend_from_env() -> str:
     """
-    Returns one of: 'faiss', 'sqlite', 'inmem'
+    Returns one of: 'faiss', 'sqlite', 'inmem', 'mmap'
     Priority: ENV BACKEND → USE_FAISS → default 'inmem'
     """
     b = os.getenv("JR_BACKEND", "").strip().lower()
-    if b in {"faiss", "sqlite", "inmem"}:
+    if b in {"faiss", "sqlite", "inmem", "mmap"}:
         return b
     if USE_FAISS:
         return "faiss"
@@ -30,3 +49,182 @@ def backend_from_env() -> str:
 
 def sqlite_path_from_env() -> str:
     return os.getenv("JR_SQLITE_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "jr_match.sqlite3"))
+
+def ontology_csv_from_env() -> str:
+    """Skills ontology used when a caller names none (JR_ONTOLOGY_CSV, default ontology/skills.csv)."""
+    return os.getenv("JR_ONTOLOGY_CSV", os.path.join(os.path.dirname(os.path.dirname(__file__)), "ontology", "skills.csv"))
+
+def vector_store_dir_from_env() -> str:
+    """Root directory of memory-mapped vector stores (JR_VECTOR_STORE); one subdirectory per index name."""
+    return os.getenv("JR_VECTOR_STORE", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "vector_store"))
+
+def ontology_artifact_from_env() -> bool:
+    """Persist the compiled ontology next to skills.csv (JR_ONTOLOGY_ARTIFACT=1)."""
+    return os.getenv("JR_ONTOLOGY_ARTIFACT", "").strip().lower() in {"1", "true", "yes"}
+
+def embed_cache_from_env() -> tuple[str | None, int]:
+    """
+    (path, max_entries) for the persistent embedding cache.
+    JR_EMBED_CACHE=off disables it; JR_EMBED_CACHE_MAX bounds the row count.
+    """
+    p = os.getenv("JR_EMBED_CACHE", "").strip()
+    if p.lower() in {"0", "off", "false", "no"}:
+        return None, 0
+    if not p:
+        p = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "embed_cache.sqlite3")
+    try:
+        n = int(os.getenv("JR_EMBED_CACHE_MAX", "200000"))
+    except ValueError:
+        n = 200000
+    return p, n
+
+def doc_cache_from_env() -> tuple[bool, str | None, int, int]:
+    """
+    (enabled, disk_dir, mem_items, disk_bytes) for the parsed-document cache.
+    JR_DOC_CACHE=off disables it, =mem keeps it in memory only, any other
+    value is the on-disk directory (default data/doc_cache). JR_DOC_CACHE_MB
+    caps the directory; least recently used entries are evicted past it.
+    """
+    p = os.getenv("JR_DOC_CACHE", "").strip()
+    if p.lower() in {"0", "off", "false", "no"}:
+        return False, None, 0, 0
+    if p.lower() == "mem":
+        p = None
+    elif not p:
+        p = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "doc_cache")
+    try:
+        n = int(os.getenv("JR_DOC_CACHE_MEM", "256"))
+    except ValueError:
+        n = 256
+    try:
+        mb = float(os.getenv("JR_DOC_CACHE_MB", "512"))
+    except ValueError:
+        mb = 512.0
+    return True, p, n, int(mb * 2**20)
+
+def pdf_options_from_env() -> tuple[str, int, float, int]:
+    """
+    (strategy, workers, budget_seconds, pool_pages) for PDF extraction.
+    JR_PDF_STRATEGY: cascade | per_page | fastest; JR_PDF_WORKERS: pool size
+    (1 = in-process); JR_PDF_BUDGET: per-document time budget in seconds;
+    JR_PDF_POOL_PAGES: documents with fewer pages are read in-process.
+    """
+    strategy = os.getenv("JR_PDF_STRATEGY", "cascade").strip().lower() or "cascade"
+    try:
+        workers = int(os.getenv("JR_PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+    except ValueError:
+        workers = 1
+    try:
+        budget = float(os.getenv("JR_PDF_BUDGET", "30"))
+    except ValueError:
+        budget = 30.0
+    try:
+        pool_pages = int(os.getenv("JR_PDF_POOL_PAGES", "16"))
+    except ValueError:
+        pool_pages = 16
+    return strategy, workers, budget, pool_pages
+
+def faiss_options_from_env() -> dict:
+    """
+    FaissIndex settings. JR_FAISS_INDEX: flat | ivf | hnsw; JR_FAISS_NLIST
+    (0 = ~4·sqrt(n) at training time), JR_FAISS_NPROBE, JR_FAISS_HNSW_M,
+    JR_FAISS_EF_SEARCH.
+    """
+    kind = os.getenv("JR_FAISS_INDEX", "flat").strip().lower() or "flat"
+    out = {"kind": kind}
+    for key, env, default in (("nlist", "JR_FAISS_NLIST", 0), ("nprobe", "JR_FAISS_NPROBE", 16),
+                              ("hnsw_m", "JR_FAISS_HNSW_M", 32), ("ef_search", "JR_FAISS_EF_SEARCH", 64)):
+        try:
+            out[key] = int(os.getenv(env, str(default)))
+        except ValueError:
+            out[key] = default
+    return out
+
+def vector_precision_from_env() -> str:
+    """Default stored-vector precision for new indexes (JR_VECTOR_PRECISION: float32 | float16 | int8)."""
+    return os.getenv("JR_VECTOR_PRECISION", "float32").strip().lower() or "float32"
+
+def api_options_from_env() -> dict:
+    """
+    Limits for the FastAPI service (api/main.py):
+    JR_API_THREADS   encode/score thread pool size
+    JR_API_PARSERS   parser process pool size (0 = parse on the thread pool)
+    JR_API_INFLIGHT  requests in flight before new ones get 503
+    JR_API_QUEUE     parse/score jobs queued or running (timed-out requests'
+                     included) before new work gets 503
+    JR_API_TIMEOUT   per-request timeout in seconds
+    JR_API_MAX_MB    max size of one uploaded file
+    JR_API_MAX_BATCH max resumes in one /match/batch request
+    """
+    out = {}
+    for key, env, default, cast in (
+        ("threads", "JR_API_THREADS", 4, int),
+        ("parsers", "JR_API_PARSERS", min(4, os.cpu_count() or 1), int),
+        ("inflight", "JR_API_INFLIGHT", 32, int),
+        ("queue", "JR_API_QUEUE", 64, int),
+        ("timeout", "JR_API_TIMEOUT", 60.0, float),
+        ("max_mb", "JR_API_MAX_MB", 20.0, float),
+        ("max_batch", "JR_API_MAX_BATCH", 64, int),
+    ):
+        try:
+            out[key] = cast(os.getenv(env, str(default)))
+        except ValueError:
+            out[key] = default
+    return out
+
+def embed_batch_from_env() -> tuple[int, float]:
+    """(max_batch, max_wait_ms) for the embedding micro-batcher (JR_EMBED_BATCH, JR_EMBED_WAIT_MS)."""
+    try:
+        max_batch = int(os.getenv("JR_EMBED_BATCH", "64"))
+    except ValueError:
+        max_batch = 64
+    try:
+        max_wait = float(os.getenv("JR_EMBED_WAIT_MS", "5"))
+    except ValueError:
+        max_wait = 5.0
+    return max_batch, max_wait
+
+def embed_model_from_env() -> str:
+    """Embedding model name (JR_EMBED_MODEL), e.g. all-MiniLM-L6-v2 or hash:384 (see core.embedders)."""
+    return os.getenv("JR_EMBED_MODEL", "all-MiniLM-L6-v2").strip() or "all-MiniLM-L6-v2"
+
+def embed_window_from_env() -> tuple[int, int]:
+    """
+    (window, overlap) in words for splitting long texts before embedding
+    (JR_EMBED_WINDOW, JR_EMBED_OVERLAP). 128 words stays under MiniLM's
+    256-wordpiece limit for ordinary prose.
+    """
+    try:
+        window = max(8, int(os.getenv("JR_EMBED_WINDOW", "128")))
+    except ValueError:
+        window = 128
+    try:
+        overlap = int(os.getenv("JR_EMBED_OVERLAP", "32"))
+    except ValueError:
+        overlap = 32
+    return window, max(0, min(overlap, window // 2))
+
+def trace_sinks_from_env() -> list[str]:
+    """Trace sinks from JR_TRACE, comma-separated: memory, log, jsonl:<path> (see core.trace). Empty = none."""
+    return [s.strip() for s in os.getenv("JR_TRACE", "").split(",") if s.strip()]
+
+def dump_dir_from_env() -> str | None:
+    """Directory for debug dumps of extracted text (JR_DUMP_DIR); unset = no dumps."""
+    return os.getenv("JR_DUMP_DIR", "").strip() or None
+
+def hier_weights_from_env() -> tuple[float, ...]:
+    """
+    Coverage credit for a JD skill whose nearest resume skill is 1, 2, ...
+    ontology edges away (JR_HIER_WEIGHTS, comma-separated, e.g. 0.5,0.25).
+    Unset, "off", "0" or unparsable = exact matches only (the default).
+    """
+    raw = os.getenv("JR_HIER_WEIGHTS", "").strip().lower()
+    if raw in ("", "off", "0", "none"):
+        return ()
+    try:
+        weights = [min(1.0, max(0.0, float(w))) for w in raw.split(",") if w.strip()]
+    except ValueError:
+        return ()
+    while weights and weights[-1] == 0:
+        weights.pop()
+    return tuple(weights)
@@ -0,0 +1,215 @@
+# core/corpus.py
+from __future__ import annotations
+import json, os, uuid
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+
+from .schemas import ParsedDoc, MatchDetail
+from .scoring import score, score_block
+from . import skillbits
+from .config import load_weights, sqlite_path_from_env, vector_store_dir_from_env
+from .pipeline import bullet_texts, embed_bullets
+from .search_common import topk_indices
+from .ontology_loader import get_ontology
+from .hierarchy import get_hierarchy
+
+
+def make_index(backend: str, name: str = "corpus"):
+    """Fresh vector index for one of 'inmem' | 'sqlite' | 'faiss' | 'mmap'."""
+    if backend == "inmem":
+        from .search_inmem import InMemIndex
+        return InMemIndex()
+    if backend == "sqlite":
+        from .search_sqlite import SQLiteIndex
+        return SQLiteIndex(db_path=sqlite_path_from_env(), index_name=name)
+    if backend == "faiss":
+        from adapters.search_faiss import FaissIndex
+        return FaissIndex()
+    if backend == "mmap":
+        from .search_mmap import MmapIndex
+        return MmapIndex(os.path.join(vector_store_dir_from_env(), name))
+    raise ValueError(f"unknown backend: {backend}")
+
+
+class ResumeCorpus:
+    """
+    All resume bullets of a corpus in one vector index, each row tagged with
+    its document. `top_k(jd)` ranks every resume with the hybrid `score`
+    formula in one pass: one GEMM of the JD bullets against every row (or a
+    batched backend search when candidates are pruned), a per-document max
+    of row scores, and coverage from a popcount over document skill bitsets.
+
+    Persisted as a directory: docs.json (names + skills + generation),
+    vectors.npy and rows.npy (document position per vector row). On load the
+    backend index is rebuilt from vectors.npy, never re-embedded, unless it
+    is a persistent one (sqlite, mmap) whose `tag` already names this
+    generation with the same row count; vectors.npy is memory-mapped, so the
+    inmem backend shares its pages across processes.
+    """
+    def __init__(self, ontology_csv: str, backend: str = "inmem", name: str = "corpus"):
+        self.ontology_csv = ontology_csv
+        self.backend = backend
+        self.name = name
+        self.names: List[str] = []
+        self.skills: List[List[str]] = []
+        self.vecs = np.zeros((0, 0), dtype="float32")
+        self.rows = np.zeros((0,), dtype=np.int64)
+        self._index = make_index(backend, name)
+        self._skill_bits: Optional[np.ndarray] = None
+        self._expanded: Optional[tuple] = None
+        self.generation: Optional[str] = None   # what the backend holds; saved in docs.json
+
+    def __len__(self):
+        return len(self.names)
+
+    # ---------------- building ----------------
+
+    def _rebuild(self, generation: Optional[str] = None):
+        if hasattr(self._index, "clear"):
+            self._index.clear()
+        self.generation = generation or uuid.uuid4().hex
+        if len(self.vecs):
+            self._index.index(self.vecs, meta=[{"doc": self.names[r]} for r in self.rows.tolist()])
+            if hasattr(self._index, "tag"):
+                self._index.tag = self.generation
+        else:
+            self._index = make_index(self.backend, self.name)
+        self._skill_bits = None
+        self._expanded = None
+
+    def _holds(self, generation: Optional[str]) -> bool:
+        """Whether a persistent backend already stores exactly `generation`'s rows."""
+        return (generation is not None and hasattr(self._index, "tag")
+                and self._index.tag == generation and len(self._index) == len(self.rows))
+
+    def _drop(self, names: Iterable[str]):
+        names = set(names)
+        gone = {i for i, n in enumerate(self.names) if n in names}
+        if not gone:
+            return
+        keep_docs = [i for i in range(len(self.names)) if i not in gone]
+        remap = np.full(len(self.names), -1, dtype=np.int64)
+        remap[keep_docs] = np.arange(len(keep_docs))
+        keep_rows = remap[self.rows] >= 0
+        self.vecs = self.vecs[keep_rows]
+        self.rows = remap[self.rows[keep_rows]]
+        self.names = [self.names[i] for i in keep_docs]
+        self.skills = [self.skills[i] for i in keep_docs]
+
+    def add(self, docs: Iterable[Tuple[str, ParsedDoc]]):
+        """Add (or replace, by name) documents; all new bullets are embedded in one call."""
+        docs = list(docs)
+        self._drop(n for n, _ in docs)
+        texts, rows = [], []
+        for name, doc in docs:
+            units = bullet_texts(doc)
+            rows.extend([len(self.names)] * len(units))
+            texts.extend(units)
+            self.names.append(name)
+            self.skills.append(list(doc.skills))
+        if texts:
+            V = embed_bullets(texts)
+            self.vecs = V if not len(self.vecs) else np.vstack([self.vecs, V])
+            self.rows = np.concatenate([self.rows, np.asarray(rows, dtype=np.int64)])
+        self._rebuild()
+
+    def remove(self, names: Iterable[str]):
+        self._drop(list(names))
+        self._rebuild()
+
+    # ---------------- persistence ----------------
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        meta = {"names": self.names, "skills": self.skills, "generation": self.generation,
+                "ontology_version": get_ontology(self.ontology_csv).version}
+        # write-then-rename: vectors.npy may be mapped by this or another process
+        for fname, arr in (("vectors.npy", self.vecs), ("rows.npy", self.rows)):
+            tmp = os.path.join(path, f"{fname}.{os.getpid()}.tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, arr)
+            os.replace(tmp, os.path.join(path, fname))
+        tmp = os.path.join(path, "docs.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, "docs.json"))
+
+    @classmethod
+    def load(cls, path: str, ontology_csv: str, backend: str = "inmem", name: str = "corpus") -> "ResumeCorpus":
+        c = cls(ontology_csv, backend=backend, name=name)
+        with open(os.path.join(path, "docs.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        c.names, c.skills = meta["names"], meta["skills"]
+        c.vecs = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        c.rows = np.load(os.path.join(path, "rows.npy"))
+        if c._holds(meta.get("generation")):
+            c.generation = meta["generation"]
+        else:
+            c._rebuild(meta.get("generation"))
+        return c
+
+    # ---------------- ranking ----------------
+
+    def skill_bits(self) -> np.ndarray:
+        """(n_docs, n_words) uint64 skill bitsets over the ontology's index space."""
+        if self._skill_bits is None:
+            self._skill_bits = skillbits.encode(self.skills, get_ontology(self.ontology_csv).skill_pos)
+        return self._skill_bits
+
+    def expanded_bits(self, hierarchy) -> np.ndarray:
+        """hierarchy.expand(skill_bits()), kept until the corpus or the hierarchy changes."""
+        if self._expanded is None or self._expanded[0] is not hierarchy:
+            self._expanded = (hierarchy, hierarchy.expand(self.skill_bits()))
+        return self._expanded[1]
+
+    def doc_similarity(self, jd: ParsedDoc, candidates: Optional[int] = None) -> np.ndarray:
+        """
+        Best bullet-to-bullet cosine per document (max over resume bullets and
+        JD bullets). candidates=None is exact: one GEMM against every row, a
+        max over JD bullets, then a max-reduce over each document's row span
+        (`rows` is sorted by document). An int limits each JD bullet to its
+        top rows in the backend index (for approximate backends) and leaves
+        unseen docs at -inf.
+        """
+        sims = np.full(len(self.names), -np.inf)
+        if not len(self.rows):
+            return sims
+        Q = embed_bullets(bullet_texts(jd))
+        if not len(Q):
+            return sims
+        if candidates is None:
+            best = (np.asarray(self.vecs, dtype=np.float32) @ np.asarray(Q, dtype=np.float32).T).max(axis=1)
+            starts = np.flatnonzero(np.r_[True, self.rows[1:] != self.rows[:-1]])
+            sims[self.rows[starts]] = np.maximum.reduceat(best, starts).astype(np.float64)
+            return sims
+        k = min(candidates, len(self.rows))
+        D, I = self._index.search(Q, k)
+        D, I = np.asarray(D), np.asarray(I)
+        ok = I >= 0
+        np.maximum.at(sims, self.rows[I[ok]], D[ok].astype(np.float64))
+        return sims
+
+    def top_k(self, jd: ParsedDoc, k: int = 10, weights=None,
+              candidates: Optional[int] = None) -> List[Tuple[str, MatchDetail]]:
+        """Top-k resumes for a JD, ranked by the same total as `score()`."""
+        if not self.names:
+            return []
+        if weights is None:
+            weights = load_weights()
+        sims = self.doc_similarity(jd, candidates)
+
+        onto = get_ontology(self.ontology_csv)
+        hier = get_hierarchy(onto)
+        jd_bits = skillbits.encode([jd.skills], onto.skill_pos)
+        total = score_block(sims[:, None], self.skill_bits(), jd_bits, weights,
+                            hierarchy=hier, expanded=self.expanded_bits(hier))[0][:, 0]
+
+        seen = np.isfinite(total)
+        order = topk_indices(np.where(seen, total, -np.inf), k)[0]
+        out = []
+        for i in order.tolist():
+            if not seen[i]:
+                continue
+            r = ParsedDoc(text="", skills=self.skills[i])
+            out.append((self.names[i], score(r, jd, float(sims[i]), weights=weights, hierarchy=hier)))
+        return out
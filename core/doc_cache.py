@@ -0,0 +1,167 @@
+# core/doc_cache.py
+from __future__ import annotations
+import hashlib, os, threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from .schemas import ParsedDoc
+from .config import doc_cache_from_env
+
+# Bump when extract() output changes for the same input bytes.
+PARSER_VERSION = "2"
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def doc_key(digest: str, ext: str, ontology_version: str, pdf_strategy: str = "") -> str:
+    """
+    Content hash + file type (it picks the reader) + ontology version + parser
+    version + PDF strategy (JR_PDF_STRATEGY; each one yields different text).
+    """
+    raw = f"{digest}|{ext.lower()}|{ontology_version}|{PARSER_VERSION}|{pdf_strategy}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:40]
+
+class DocCache:
+    """
+    Two-tier ParsedDoc cache: in-memory LRU in front of one JSON file per
+    key under `disk_dir` (None = memory only). Returned docs are copies, so
+    callers may mutate them freely.
+
+    The disk tier holds at most `max_bytes`: a hit refreshes the file's
+    mtime, and a put that takes the directory past the cap deletes the
+    oldest files down to 90% of it.
+    """
+    def __init__(self, disk_dir: Optional[str] = None, max_items: int = 256,
+                 max_bytes: int = 512 * 2**20):
+        self.disk_dir = disk_dir
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._disk_bytes: Optional[int] = None   # estimate; rescanned when evicting
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._mem: "OrderedDict[str, ParsedDoc]" = OrderedDict()
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _scan(self) -> List[Tuple[float, int, str]]:
+        """(mtime, size, path) of every entry on disk, oldest first."""
+        out = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".json"):
+                path = os.path.join(self.disk_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                out.append((st.st_mtime, st.st_size, path))
+        return sorted(out)
+
+    def _grow(self, size: int):
+        """Account for `size` new bytes on disk; evict the oldest entries past max_bytes."""
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(s for _, s, _ in self._scan())
+            self._disk_bytes += size
+            if self._disk_bytes <= self.max_bytes:
+                return
+            # other processes may share the directory: recount before deleting
+            entries = self._scan()
+            total = sum(s for _, s, _ in entries)
+            for _, s, path in entries:
+                if total <= self.max_bytes * 0.9:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= s
+                self.evictions += 1
+            self._disk_bytes = total
+
+    def _remember(self, key: str, doc: ParsedDoc):
+        self._mem[key] = doc
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def get(self, key: str) -> Optional[ParsedDoc]:
+        with self._lock:
+            doc = self._mem.get(key)
+            if doc is not None:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return doc.model_copy(deep=True)
+        if self.disk_dir:
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    doc = ParsedDoc.model_validate_json(f.read())
+                os.utime(self._path(key))  # recently used: evicted last
+            except (OSError, ValueError):
+                doc = None
+            if doc is not None:
+                with self._lock:
+                    self._remember(key, doc)
+                    self.disk_hits += 1
+                return doc.model_copy(deep=True)
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, doc: ParsedDoc):
+        doc = doc.model_copy(deep=True)
+        with self._lock:
+            self._remember(key, doc)
+        if self.disk_dir:
+            tmp = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(doc.model_dump_json())
+                size = os.path.getsize(tmp)
+                os.replace(tmp, self._path(key))
+                self._grow(size)
+            except OSError:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+            self._disk_bytes = None
+        if self.disk_dir and os.path.isdir(self.disk_dir):
+            for name in os.listdir(self.disk_dir):
+                if name.endswith(".json"):
+                    try:
+                        os.remove(os.path.join(self.disk_dir, name))
+                    except OSError:
+                        pass
+
+    def stats(self) -> dict:
+        return {"mem_items": len(self._mem), "hits": self.hits,
+                "disk_hits": self.disk_hits, "misses": self.misses, "evictions": self.evictions}
+
+
+_cache: Optional[DocCache] = None
+_cache_lock = threading.Lock()
+
+def get_doc_cache() -> Optional[DocCache]:
+    """Process-wide cache from env (JR_DOC_CACHE / JR_DOC_CACHE_MEM / JR_DOC_CACHE_MB); None when disabled."""
+    global _cache
+    if _cache is None:
+        enabled, disk_dir, max_items, max_bytes = doc_cache_from_env()
+        if not enabled:
+            return None
+        with _cache_lock:
+            if _cache is None:
+                _cache = DocCache(disk_dir, max_items=max_items, max_bytes=max_bytes)
+    return _cache
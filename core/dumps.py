@@ -0,0 +1,51 @@
+# core/dumps.py
+"""
+Opt-in debug dumps of extracted document text.
+
+Off unless JR_DUMP_DIR is set. Writes happen on a background thread so
+parsing never waits on disk; `flush()` (also run at exit) waits for the
+queue to drain.
+"""
+import atexit, queue, threading
+from pathlib import Path
+from typing import Optional
+
+from .config import dump_dir_from_env
+
+_q: "queue.Queue" = queue.Queue()
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+
+
+def _run():
+    while True:
+        path, text = _q.get()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text, encoding="utf-8", errors="ignore")
+        except OSError:
+            pass  # best effort: a failed dump must not break parsing
+        finally:
+            _q.task_done()
+
+def _start():
+    global _thread
+    with _lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_run, name="jr-dumps", daemon=True)
+            _thread.start()
+            atexit.register(flush)
+
+def dump_text(tag: str, source_path: str, text: str) -> Optional[Path]:
+    """Queue `text` for <JR_DUMP_DIR>/dump_<tag>_<stem>.txt; returns the target path, or None when dumps are off."""
+    d = dump_dir_from_env()
+    if d is None:
+        return None
+    path = Path(d) / f"dump_{tag}_{Path(source_path).stem}.txt"
+    _start()
+    _q.put((path, text))
+    return path
+
+def flush():
+    if _thread is not None:
+        _q.join()
@@ -1,15 +1,43 @@
-from sentence_transformers import SentenceTransformer
 import numpy as np
+from .embed_cache import get_cache, text_key
+from .embedders import get_embedder, default_model
+from .trace import span
 
-_model = None
+def get_model(name: str = None):
+    # one instance per model name, so switching names never reuses another model
+    return get_embedder(name)
 
-def get_model(name: str = "all-MiniLM-L6-v2"):
-    global _model
-    if _model is None:
-        _model = SentenceTransformer(name)
-    return _model
+def _encode(texts, model_name):
+    # length-sorted, so each model batch holds similar lengths (little padding); order restored after
+    if len(texts) < 2:
+        return np.asarray(get_embedder(model_name).encode(list(texts)), dtype="float32")
+    order = np.argsort([len(t) for t in texts], kind="stable")
+    V = np.asarray(get_embedder(model_name).encode([texts[i] for i in order]), dtype="float32")
+    out = np.empty_like(V)
+    out[order] = V
+    return out
 
-def embed(texts, model_name="all-MiniLM-L6-v2"):
-    m = get_model(model_name)
-    vecs = m.encode(texts, normalize_embeddings=True)
-    return np.asarray(vecs, dtype="float32")
+def embed(texts, model_name=None, use_cache=True):
+    """Normalized float32 vectors; the model defaults to JR_EMBED_MODEL (see core.embedders)."""
+    model_name = model_name or default_model()
+    if isinstance(texts, str):
+        return embed([texts], model_name, use_cache)[0]
+    texts = list(texts)
+    with span("embed", texts=len(texts)) as rec:
+        cache = get_cache() if use_cache and get_embedder(model_name).cacheable else None
+        if cache is None or not texts:
+            return _encode(texts, model_name)
+
+        keys = [text_key(t) for t in texts]
+        found = cache.get_many(model_name, keys)
+        # encode each distinct missing text once
+        todo = {}
+        for k, t in zip(keys, texts):
+            if k not in found and k not in todo:
+                todo[k] = t
+        rec["encoded"] = len(todo)
+        if todo:
+            new = _encode(list(todo.values()), model_name)
+            cache.put_many(model_name, list(todo), new)
+            found.update(zip(todo, new))
+        return np.vstack([found[k] for k in keys]).astype("float32", copy=False)
@@ -0,0 +1,174 @@
+# core/embed_batcher.py
+"""
+Micro-batching front end for `embed()`.
+
+Callers on any thread (`embed`) or event loop (`aembed`) enqueue their
+texts and get a future; one worker thread drains the queue into model
+batches, flushed when `max_batch` texts are waiting or the oldest request
+has waited `max_wait_ms`, and routes each slice of the result back to
+its caller. Queueing delay is thus bounded by max_wait_ms plus one batch.
+"""
+from __future__ import annotations
+import asyncio, queue, threading, time
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Sequence
+import numpy as np
+
+from .config import embed_batch_from_env
+
+_STOP = object()
+
+
+class EmbedScheduler:
+    def __init__(self, model_name: Optional[str] = None, max_batch: int = 64,
+                 max_wait_ms: float = 5.0, max_queue: int = 0,
+                 encode: Optional[Callable[[List[str], str], np.ndarray]] = None):
+        """
+        encode(texts, model_name) does the actual work (default: core.embed.embed,
+        cache included). max_queue > 0 makes submit() block when that many
+        requests are waiting.
+        """
+        if encode is None:
+            from .embed import embed as encode
+        if model_name is None:
+            from .embedders import default_model
+            model_name = default_model()
+        self.model_name = model_name
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1e3
+        self._encode = encode
+        self._q: "queue.Queue" = queue.Queue(maxsize=max(0, max_queue))
+        self._held = None    # request pulled from the queue that did not fit the last batch
+        self._lock = threading.Lock()
+        self._closed = False
+        self.batches = 0
+        self.texts = 0
+        self._worker = threading.Thread(target=self._run, name="jr-embed-batcher", daemon=True)
+        self._worker.start()
+
+    # ---------------- callers ----------------
+
+    def submit(self, texts: Sequence[str]) -> Future:
+        """Future of the (len(texts), d) float32 matrix."""
+        fut: Future = Future()
+        texts = list(texts)
+        if not texts:
+            fut.set_result(np.zeros((0, 0), dtype="float32"))
+            return fut
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("embedding scheduler is closed")
+            # enqueued under the lock, so it lands before close()'s _STOP and
+            # the worker serves it (a full queue only waits for the worker)
+            self._q.put((texts, fut))
+        return fut
+
+    def embed(self, texts, timeout: Optional[float] = None) -> np.ndarray:
+        """Blocking; same contract as core.embed.embed (a str gives a 1-D vector)."""
+        if isinstance(texts, str):
+            return self.embed([texts], timeout)[0]
+        return self.submit(texts).result(timeout)
+
+    async def aembed(self, texts) -> np.ndarray:
+        if isinstance(texts, str):
+            return (await self.aembed([texts]))[0]
+        return await asyncio.wrap_future(self.submit(texts))
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._q.put(_STOP)
+        self._worker.join()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def stats(self) -> dict:
+        return {"batches": self.batches, "texts": self.texts,
+                "mean_batch": self.texts / max(1, self.batches), "queued": self._q.qsize()}
+
+    # ---------------- worker ----------------
+
+    def _next(self, timeout: Optional[float]):
+        if self._held is not None:
+            item, self._held = self._held, None
+            return item
+        return self._q.get(timeout=timeout) if timeout is None or timeout > 0 else self._q.get_nowait()
+
+    def _run(self):
+        while True:
+            first = self._next(None)
+            if first is _STOP:
+                return
+            batch, n = [first], len(first[0])
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while n < self.max_batch:
+                try:
+                    item = self._next(deadline - time.monotonic())
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                if n + len(item[0]) > self.max_batch:
+                    self._held = item   # starts the next batch
+                    break
+                batch.append(item)
+                n += len(item[0])
+            self._flush(batch)
+            if stop:
+                self._drain()
+                return
+
+    def _flush(self, batch):
+        # callers may have given up (timeout / task cancelled): skip their texts
+        batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        texts = [t for item in batch for t in item[0]]
+        try:
+            V = np.asarray(self._encode(texts, self.model_name), dtype="float32")
+        except BaseException as e:
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        self.batches += 1
+        self.texts += len(texts)
+        s = 0
+        for item_texts, fut in batch:
+            fut.set_result(V[s:s + len(item_texts)])
+            s += len(item_texts)
+
+    def _drain(self):
+        # the held request and anything still queued: serve them rather than leave futures hanging
+        rest = [self._held] if self._held is not None else []
+        self._held = None
+        while True:
+            try:
+                item = self._q.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                rest.append(item)
+        for item in rest:
+            self._flush([item])
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+def get_scheduler(model_name: Optional[str] = None) -> EmbedScheduler:
+    """Process-wide scheduler per model, sized from JR_EMBED_BATCH / JR_EMBED_WAIT_MS."""
+    if model_name is None:
+        from .embedders import default_model
+        model_name = default_model()
+    with _schedulers_lock:
+        s = _schedulers.get(model_name)
+        if s is None or s.closed:
+            max_batch, max_wait_ms = embed_batch_from_env()
+            s = _schedulers[model_name] = EmbedScheduler(model_name, max_batch, max_wait_ms)
+        return s
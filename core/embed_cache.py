@@ -0,0 +1,151 @@
+# core/embed_cache.py
+from __future__ import annotations
+import hashlib, os, sqlite3, threading, time, unicodedata
+from typing import Dict, Optional, Sequence
+import numpy as np
+from .config import embed_cache_from_env
+
+_SQL = """
+CREATE TABLE IF NOT EXISTS jr_embed_cache (
+    model TEXT NOT NULL,         -- model name; part of the key so a model swap never hits
+    key TEXT NOT NULL,           -- sha1 of the normalized text
+    dim INTEGER NOT NULL,
+    vec BLOB NOT NULL,           -- float32, contiguous
+    last_used REAL NOT NULL,     -- unix timestamp, drives LRU eviction
+    PRIMARY KEY (model, key)
+);
+CREATE INDEX IF NOT EXISTS idx_jr_embed_cache_lru ON jr_embed_cache(last_used);
+"""
+
+# the file is shared by the CLI, API parser processes and Streamlit
+_PRAGMAS = (
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA journal_mode=WAL",        # readers never block the writer
+    "PRAGMA synchronous=NORMAL",
+)
+
+def normalize_text(text: str) -> str:
+    """Key normalization: NFC + collapsed whitespace (case is preserved; cased models care)."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+def text_key(text: str) -> str:
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    """
+    Persistent content-addressed vector cache on SQLite.
+    Keyed by (model name, normalized-text hash); bounded to `max_entries`
+    rows with least-recently-used eviction. Writes keep a running row
+    estimate and the table is only counted (and cut back to 95% of the
+    bound) when that estimate passes the bound or every max_entries/20
+    inserts, which catches rows added by other processes; a put is not a
+    full COUNT(*).
+    """
+    def __init__(self, db_path: str, max_entries: int = 200_000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        d = os.path.dirname(db_path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._con = sqlite3.connect(db_path, check_same_thread=False, timeout=5.0)
+        for p in _PRAGMAS:
+            self._con.execute(p)
+        self._con.executescript(_SQL)
+        self._con.commit()
+        self._rows = self._count()   # this process's view of the row count
+        self._pending = 0            # inserts since the last count
+
+    def _count(self) -> int:
+        return self._con.execute("SELECT COUNT(*) FROM jr_embed_cache").fetchone()[0]
+
+    def get_many(self, model: str, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        uniq = list(dict.fromkeys(keys))
+        with self._lock:
+            for i in range(0, len(uniq), 500):
+                chunk = uniq[i:i + 500]
+                q = ",".join("?" * len(chunk))
+                rows = self._con.execute(
+                    f"SELECT key, dim, vec FROM jr_embed_cache WHERE model=? AND key IN ({q})",
+                    (model, *chunk)
+                ).fetchall()
+                for k, dim, b in rows:
+                    found[k] = np.frombuffer(b, dtype="float32", count=dim)
+            if found:
+                now = time.time()
+                self._con.executemany(
+                    "UPDATE jr_embed_cache SET last_used=? WHERE model=? AND key=?",
+                    [(now, model, k) for k in found]
+                )
+                self._con.commit()
+            self.hits += sum(1 for k in keys if k in found)
+            self.misses += sum(1 for k in keys if k not in found)
+        return found
+
+    def put_many(self, model: str, keys: Sequence[str], vecs: np.ndarray):
+        vecs = np.asarray(vecs, dtype="float32")
+        now = time.time()
+        rows = [(model, k, int(v.shape[0]), np.ascontiguousarray(v).tobytes(), now)
+                for k, v in zip(keys, vecs)]
+        with self._lock:
+            self._con.executemany(
+                "INSERT OR REPLACE INTO jr_embed_cache (model, key, dim, vec, last_used) VALUES (?,?,?,?,?)",
+                rows
+            )
+            self._rows += len(rows)
+            self._pending += len(rows)
+            if self._rows > self.max_entries or self._pending >= max(1, self.max_entries // 20):
+                self._evict()
+            self._con.commit()
+
+    def _evict(self):
+        n = self._count()
+        over = n - int(self.max_entries * 0.95) if n > self.max_entries else 0
+        if over > 0:
+            self._con.execute(
+                "DELETE FROM jr_embed_cache WHERE rowid IN "
+                "(SELECT rowid FROM jr_embed_cache ORDER BY last_used ASC LIMIT ?)",
+                (over,)
+            )
+            self.evictions += over
+        self._rows = n - over
+        self._pending = 0
+
+    def clear(self, model: Optional[str] = None):
+        with self._lock:
+            if model is None:
+                self._con.execute("DELETE FROM jr_embed_cache")
+            else:
+                self._con.execute("DELETE FROM jr_embed_cache WHERE model=?", (model,))
+            self._con.commit()
+            self._rows = self._count()
+
+    def stats(self) -> dict:
+        with self._lock:
+            n = self._count()
+        total = self.hits + self.misses
+        return {
+            "entries": n, "max_entries": self.max_entries,
+            "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> Optional[EmbeddingCache]:
+    """Process-wide cache from env (JR_EMBED_CACHE / JR_EMBED_CACHE_MAX); None when disabled."""
+    global _cache
+    if _cache is None:
+        path, max_entries = embed_cache_from_env()
+        if path is None:
+            return None
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache(path, max_entries=max_entries)
+    return _cache
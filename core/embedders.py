@@ -0,0 +1,122 @@
+# core/embedders.py
+"""
+Embedding backends behind one small protocol, chosen by model name:
+
+  "all-MiniLM-L6-v2", "st:<name>"  sentence-transformers (torch), loaded on first encode
+  "hash", "hash:<dim>"             hashed character n-grams, pure numpy, no model files
+
+Other backends plug in with `register_embedder(prefix, factory)`.
+"""
+from __future__ import annotations
+import threading
+from typing import Callable, Dict, List, Protocol, runtime_checkable
+import numpy as np
+
+from .config import embed_model_from_env
+
+
+@runtime_checkable
+class Embedder(Protocol):
+    name: str
+    cacheable: bool     # worth a persistent cache lookup (False when encoding is cheaper)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """(len(texts), dim) float32, L2-normalized rows."""
+        ...
+
+
+class SentenceTransformerEmbedder:
+    cacheable = True
+
+    def __init__(self, model: str):
+        self.name = model
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer  # imports torch
+                    self._model = SentenceTransformer(self.name)
+        return self._model
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        vecs = self._load().encode(texts, normalize_embeddings=True)
+        return np.asarray(vecs, dtype="float32")
+
+
+class HashingEmbedder:
+    """
+    Signed feature hashing of character 3–5-grams (words padded with
+    spaces), sublinear counts, L2-normalized. Deterministic across
+    processes and platforms; good enough for lexical similarity in
+    skills-only deployments and smoke tests.
+    """
+    cacheable = False
+    NGRAMS = (3, 4, 5)
+    _MUL = np.uint64(0x100000001B3)        # FNV-style polynomial base
+    _MIX = np.uint64(0x9E3779B97F4A7C15)
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.name = f"hash:{dim}"
+
+    def _vector(self, text: str) -> np.ndarray:
+        b = np.frombuffer((" " + " ".join(text.lower().split()) + " ").encode("utf-8"), dtype=np.uint8)
+        out = np.zeros(self.dim, dtype="float32")
+        with np.errstate(over="ignore"):
+            b = b.astype(np.uint64)
+            for n in self.NGRAMS:
+                if len(b) < n:
+                    continue
+                h = np.zeros(len(b) - n + 1, dtype=np.uint64)
+                for j in range(n):
+                    h = h * self._MUL + b[j:len(b) - n + 1 + j]
+                h = (h + np.uint64(n)) * self._MIX
+                idx = (h >> np.uint64(33)) % np.uint64(self.dim)
+                sign = np.where(h & np.uint64(1), 1.0, -1.0).astype("float32")
+                out += np.bincount(idx.astype(np.int64), weights=sign, minlength=self.dim).astype("float32")
+        out = np.sign(out) * np.log1p(np.abs(out))
+        norm = np.linalg.norm(out)
+        return out / norm if norm > 0 else out
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype="float32")
+        return np.vstack([self._vector(t) for t in texts]).astype("float32", copy=False)
+
+
+# ---------------- registry ----------------
+
+_FACTORIES: Dict[str, Callable[[str], Embedder]] = {
+    "st": SentenceTransformerEmbedder,
+    "hash": lambda arg: HashingEmbedder(int(arg) if arg else 384),
+}
+_instances: Dict[str, Embedder] = {}
+_lock = threading.Lock()
+
+def register_embedder(prefix: str, factory: Callable[[str], Embedder]):
+    """factory(arg) builds the embedder for model names "<prefix>" / "<prefix>:<arg>"."""
+    with _lock:
+        _FACTORIES[prefix] = factory
+
+def default_model() -> str:
+    return embed_model_from_env()
+
+def get_embedder(name: str | None = None) -> Embedder:
+    """One instance per model name; unknown prefixes are sentence-transformers model ids."""
+    name = name or default_model()
+    e = _instances.get(name)
+    if e is not None:
+        return e
+    with _lock:
+        e = _instances.get(name)
+        if e is None:
+            prefix, _, arg = name.partition(":")
+            if prefix in _FACTORIES:
+                e = _FACTORIES[prefix](arg)
+            else:
+                e = SentenceTransformerEmbedder(name)
+            _instances[name] = e
+    return e
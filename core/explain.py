@@ -1,48 +1,63 @@
-from typing import Dict, List, Optional
-import re
-from .schemas import Bullet
-from .ontology_loader import load_ontology
+from typing import Dict, Iterable, List, Optional, Set, Union
+from .schemas import Bullet, ParsedDoc, SkillSpan
+from .ontology_loader import get_ontology
+from .extractor import index_bullets
+from .config import ontology_csv_from_env
+from .trace import traced
 
-def _normalize(s: str) -> str:
-    return re.sub(r"\s+", " ", s.lower()).strip()
+# Evidence and alias hits are lookups over the skill-occurrence index that
+# extraction stores on each Bullet / ParsedDoc (`skills`, `spans`); only
+# bullets without one are scanned.
 
-def _skill_aliases(skills_csv: str) -> Dict[str, List[str]]:
-    """id -> aliases (alt_labels + label as fallback for evidence only)."""
-    skills = load_ontology(skills_csv)
-    id2aliases = {}
-    for sk in skills.values():
-        alts = [a.strip().lower() for a in sk.alt_labels if a.strip()]
-        # include label for evidence match (NOT for extraction)
-        if sk.label:
-            alts.append(sk.label.lower())
-        # dedupe
-        id2aliases[sk.id] = sorted(set([a for a in alts if a]))
-    return id2aliases
+def _indexed(bullets: List[Bullet], skills_csv: Optional[str]) -> List[Bullet]:
+    """
+    Bullets carrying their skill index. Unindexed ones (spans None) are
+    scanned here with the ontology's matcher; with no skills_csv, the
+    default ontology (JR_ONTOLOGY_CSV).
+    """
+    todo = [i for i, b in enumerate(bullets) if b.spans is None]
+    if not todo:
+        return bullets
+    onto = get_ontology(skills_csv or ontology_csv_from_env())
+    out = list(bullets)
+    scanned = index_bullets([bullets[i].model_copy() for i in todo], onto.matcher, onto.category_ids)
+    for i, b in zip(todo, scanned):
+        out[i] = b
+    return out
+
+def skill_bullets(bullets: List[Bullet]) -> Dict[str, List[int]]:
+    """skill id -> positions of the bullets that mention it, in document order."""
+    out: Dict[str, List[int]] = {}
+    for i, b in enumerate(bullets):
+        for sid in b.skills:
+            out.setdefault(sid, []).append(i)
+    return out
+
+@traced("explain")
+def evidence_bullets(
+    resume_bullets: List[Bullet],
+    matched_skill_ids: List[str],
+    skills_csv: Optional[str] = None
+) -> Dict[str, Optional[Bullet]]:
+    """{skill_id: first resume bullet that mentions it, or None}."""
+    bullets = _indexed(resume_bullets, skills_csv)
+    where = skill_bullets(bullets)
+    return {sid: bullets[where[sid][0]] if sid in where else None for sid in matched_skill_ids}
 
+@traced("explain")
 def find_evidence_for_matches(
     resume_bullets: List[Bullet],
     matched_skill_ids: List[str],
-    skills_csv: str
+    skills_csv: Optional[str] = None
 ) -> Dict[str, Optional[str]]:
     """Return {skill_id: best_resume_bullet_text or None}."""
-    id2aliases = _skill_aliases(skills_csv)
-    bullets_norm = [(b.text, _normalize(b.text)) for b in resume_bullets]
-    evidence = {}
-
-    for sid in matched_skill_ids:
-        found = None
-        aliases = id2aliases.get(sid, [])
-        # prefer alias-containing bullets
-        for raw, norm in bullets_norm:
-            if any(a in norm for a in aliases if a):
-                found = raw
-                break
-        evidence[sid] = found
-    return evidence
+    return {sid: (b.text if b is not None else None)
+            for sid, b in evidence_bullets(resume_bullets, matched_skill_ids, skills_csv).items()}
 
+@traced("explain")
 def suggest_gap_phrases(gap_ids: List[str], skills_csv: str) -> Dict[str, str]:
     """Return short suggested phrasing per missing skill."""
-    skills = load_ontology(skills_csv)
+    skills = get_ontology(skills_csv).skills
     out = {}
     for sid in gap_ids:
         label = skills[sid].label if sid in skills else sid
@@ -50,17 +65,35 @@ def suggest_gap_phrases(gap_ids: List[str], skills_csv: str) -> Dict[str, str]:
         out[sid] = f"Add a bullet that shows {label} (e.g., “Used {label} to …”)."
     return out
 
-def alias_hits(resume_text: str, matched_skill_ids: List[str], skills_csv: str) -> Dict[str, List[str]]:
-    id2aliases = _skill_aliases(skills_csv)
-    tokens = re.findall(r"[a-z0-9\+\#\.]+", resume_text.lower())
-    token_set = set(tokens)
-    joined = " ".join(tokens)
-    hits = {}
-    for sid in matched_skill_ids:
-        hits[sid] = []
-        for a in id2aliases.get(sid, []):
-            a_tokens = a.split()
-            if (len(a_tokens)==1 and a_tokens[0] in token_set) or \
-               (len(a_tokens)>1 and re.search(r"\b"+r"\s+".join(map(re.escape,a_tokens))+r"\b", joined)):
-                hits[sid].append(a)
-    return hits
\ No newline at end of file
+@traced("explain")
+def alias_hits(resume: Union[str, ParsedDoc], matched_skill_ids: List[str], skills_csv: str) -> Dict[str, List[str]]:
+    """{skill_id: distinct aliases found, in order of appearance}; a ParsedDoc uses its stored spans."""
+    if isinstance(resume, ParsedDoc) and resume.spans is not None:
+        spans: Iterable = resume.spans
+    else:
+        text = resume.text if isinstance(resume, ParsedDoc) else resume
+        spans = get_ontology(skills_csv).matcher.find(text)
+    hits: Dict[str, List[str]] = {sid: [] for sid in matched_skill_ids}
+    for sp in spans:
+        found = hits.get(sp.skill_id)
+        if found is not None and sp.alias not in found:
+            found.append(sp.alias)
+    return hits
+
+def highlight(text: str, spans: List[SkillSpan], skill_ids: Optional[Set[str]] = None,
+              before: str = "**", after: str = "**") -> str:
+    """`text` with each occurrence (of `skill_ids`, default all) wrapped; overlapping spans merge."""
+    ranges = sorted((sp.start, sp.end) for sp in spans or ()
+                    if (skill_ids is None or sp.skill_id in skill_ids) and 0 <= sp.start < sp.end <= len(text))
+    merged: List[List[int]] = []
+    for s, e in ranges:
+        if merged and s <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], e)
+        else:
+            merged.append([s, e])
+    out, pos = [], 0
+    for s, e in merged:
+        out += [text[pos:s], before, text[s:e], after]
+        pos = e
+    out.append(text[pos:])
+    return "".join(out)
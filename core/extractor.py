@@ -1,55 +1,29 @@
-from typing import List, Set, Dict
-import re, pathlib, unicodedata
-from pathlib import Path
-from docx import Document
-
-from .schemas import ParsedDoc, Sections, Bullet, Skill
-from .ontology_loader import alias_to_id_map, load_ontology, category_ids
+from typing import List, Optional, Set
+import os, re, pathlib
+from bisect import bisect_right
+
+from .schemas import ParsedDoc, Sections, Bullet, SkillSpan
+from .ontology_loader import get_ontology
+from .matcher import AliasMatcher
+from .doc_cache import get_doc_cache, doc_key, file_digest
+from .pdf_extract import read_pdf
+from .config import pdf_options_from_env
+from .trace import span
+from .dumps import dump_text
 
 # Regex patterns
 BULLET_RX = re.compile(r"^[\-\u2022\*\•]\s+")
 SKILL_SPLIT = re.compile(r"[,\|;/]")
 
-def _read_pdf(path: str) -> str:
-    """Try pdfplumber → PyMuPDF → pdfminer.six; return best text."""
-    text = ""
-
-    # 1) pdfplumber
-    try:
-        import pdfplumber
-        with pdfplumber.open(path) as pdf:
-            text = "\n".join((p.extract_text() or "") for p in pdf.pages).strip()
-    except Exception:
-        text = ""
-
-    # 2) PyMuPDF fallback
-    if len(text) < 200:
-        try:
-            import fitz  # PyMuPDF
-            t2 = []
-            with fitz.open(path) as doc:
-                for p in doc:
-                    t2.append(p.get_text("text"))
-            t2 = "\n".join(t2).strip()
-            if len(t2) > len(text):
-                text = t2
-        except Exception:
-            pass
-
-    # 3) pdfminer.six fallback
-    if len(text) < 200:
-        try:
-            from pdfminer.high_level import extract_text as pdfminer_extract_text
-            t3 = (pdfminer_extract_text(path) or "").strip()
-            if len(t3) > len(text):
-                text = t3
-        except Exception:
-            pass
-
-    print(f"[PDF] {path} -> {len(text)} chars")
-    return text
+def _read_pdf(path: str, rec: Optional[dict] = None) -> str:
+    """pdfplumber → PyMuPDF → pdfminer.six, page-parallel and time-bounded (see pdf_extract)."""
+    res = read_pdf(path)
+    if rec is not None:
+        rec.update(pages=len(res.pages), timed_out=res.timed_out)
+    return res.text
 
 def _read_docx(path: str) -> str:
+    from docx import Document  # python-docx is slow to import; only .docx inputs need it
     doc = Document(path)
     return "\n".join(p.text for p in doc.paragraphs)
 
@@ -77,23 +51,6 @@ def _split_sections(text: str) -> Sections:
         (current or exp).append(L)
     return Sections(experience=exp, education=edu, skills=skl)
 
-def _normalize_unicode(text: str) -> str:
-    t = text.replace("\u00A0", " ")
-    t = unicodedata.normalize("NFKD", t)
-    t = "".join(ch for ch in t if not unicodedata.combining(ch))
-    return t.lower()
-
-def _normalize_tokens(text: str) -> List[str]:
-    t = _normalize_unicode(text)
-    t1 = re.sub(r"[^a-z0-9\+\#\.\-\/]+", " ", t)
-    toks = [tok for tok in t1.split() if tok]
-    if not toks:
-        t2 = re.sub(r"[^A-Za-z0-9\+\#\.\-\/]+", " ", text)
-        toks = [tok.lower() for tok in t2.split() if tok]
-    if not toks and text.strip():
-        toks = text.strip().split()
-    return toks
-
 def _find_bullets(lines: List[str]) -> List[Bullet]:
     bullets = []
     for line in lines:
@@ -103,118 +60,117 @@ def _find_bullets(lines: List[str]) -> List[Bullet]:
                 bullets.append(Bullet(text=clean))
     return bullets
 
-def _match_skills_in_text(text: str, alias_map: Dict[str, str]) -> Set[str]:
-    """
-    Robust matcher:
-    - Normalize Unicode
-    - Token/variant route (if tokens exist)
-    - Always fall back to substring contains over normalized text
-    """
-    found_ids: Set[str] = set()
-    norm = _normalize_unicode(text)
-
-    tokens = _normalize_tokens(text)
-    token_set = set(tokens)
-    variant_token_set = set()
-
-    if token_set:
-        for t in token_set:
-            variant_token_set.add(t)
-            if "." in t:
-                variant_token_set.add(t.replace(".", ""))
-                parts = t.split(".")
-                if parts[0]:
-                    variant_token_set.add(parts[0])
-            if "-" in t:
-                variant_token_set.add(t.replace("-", " "))
-                variant_token_set.add(t.replace("-", ""))
-            if "/" in t:
-                variant_token_set.update(p for p in t.split("/") if p)
-        joined = " ".join(tokens)
-        joined_variants = " ".join(sorted(variant_token_set))
-        for alias, sid in alias_map.items():
-            a = alias
-            alias_tokens = a.split()
-            if len(alias_tokens) == 1:
-                if a in token_set or a in variant_token_set:
-                    found_ids.add(sid)
-            else:
-                pat = r"\b" + r"\s+".join(map(re.escape, alias_tokens)) + r"\b"
-                if re.search(pat, joined) or re.search(pat, joined_variants):
-                    found_ids.add(sid)
-
-    # Substring fallback
-    for alias, sid in alias_map.items():
-        a = alias
-        if a in norm:
-            found_ids.add(sid); continue
-        a_dotless = a.replace(".", "")
-        a_dashless = a.replace("-", "")
-        a_spaced = a.replace("-", " ")
-        if a_dotless and a_dotless in norm:
-            found_ids.add(sid); continue
-        if a_dashless and a_dashless in norm:
-            found_ids.add(sid); continue
-        if a_spaced and a_spaced in norm:
-            found_ids.add(sid); continue
-
-    return found_ids
-
-def extract(path: str, ontology_csv: str, dump_tag: str = "doc", **_ignored) -> ParsedDoc:
+def _match_skills_in_text(text: str, matcher: AliasMatcher) -> Set[str]:
+    """Ontology ids whose aliases (or their dotless/dashless/spaced forms) occur in text."""
+    return matcher.match(text)
+
+def extract(path: str, ontology_csv: str, dump_tag: str = "doc", use_cache: bool = True, **_ignored) -> ParsedDoc:
+    # Ontology (compiled once per CSV version)
+    onto = get_ontology(ontology_csv)
+
+    # Parsed-document cache: same bytes + same ontology -> same ParsedDoc
+    cache = get_doc_cache() if use_cache else None
+    key = None
+    if cache is not None:
+        ext = os.path.splitext(path)[1]
+        # the PDF reader (also the probe for extensionless files) varies with JR_PDF_STRATEGY
+        strategy = pdf_options_from_env()[0] if ext.lower() in (".pdf", "") else ""
+        key = doc_key(file_digest(path), ext, onto.version, strategy)
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+
     # Read file
-    p = path.lower()
-    if p.endswith(".pdf"):
-        text = _read_pdf(path)
-    elif p.endswith(".docx"):
-        text = _read_docx(path)
-    elif p.endswith(".txt"):
-        text = _read_txt(path)
-    else:
-        # probe when extension is missing
-        text = _read_pdf(path)
-        if len(text) < 50:
-            try:
-                text = _read_docx(path)
-            except Exception:
-                pass
-        if len(text) < 10:
+    with span("read", path=path) as rec:
+        p = path.lower()
+        if p.endswith(".pdf"):
+            text = _read_pdf(path, rec)
+        elif p.endswith(".docx"):
+            text = _read_docx(path)
+        elif p.endswith(".txt"):
             text = _read_txt(path)
-
-    # --- debug dumps (resume/JD) ---
-    dump_dir = Path("dumps")
-    dump_dir.mkdir(exist_ok=True)
-    stem = Path(path).stem
-    dump_txt = dump_dir / f"dump_{dump_tag}_{stem}.txt"
-    try:
-        dump_txt.write_text(text, encoding="utf-8", errors="ignore")
-    except Exception:
-        Path(f"dump_{dump_tag}_{stem}.txt").write_text(text, encoding="utf-8", errors="ignore")
-    print(f"[dump] wrote: {dump_txt if dump_txt.exists() else f'dump_{dump_tag}_{stem}.txt'}")
-
-    # quick head + token probe (prints to console)
-    from itertools import islice
-    print(f"[dump] wrote: {dump_txt if dump_txt.exists() else 'dump_' + stem + '.txt'}")
-    head = "\n".join(islice(text.splitlines(), 20))
-    print("[head]", head[:500].replace("\n", " | "))
+        else:
+            # probe when extension is missing
+            text = _read_pdf(path, rec)
+            if len(text) < 50:
+                try:
+                    text = _read_docx(path)
+                except Exception:
+                    pass
+            if len(text) < 10:
+                text = _read_txt(path)
+        rec["chars"] = len(text)
+
+    # opt-in debug dump (JR_DUMP_DIR), written in the background
+    dump_text(dump_tag, path, text)
+
+    doc = parse_text(text, ontology_csv)
+    # a read cut short by the time budget is partial; parse it again next time
+    if cache is not None and not rec.get("timed_out"):
+        cache.put(key, doc)
+    return doc
+
+def parse_text(text: str, ontology_csv: str) -> ParsedDoc:
+    """Sections, bullets and skills of already-extracted text (the part of `extract` after reading)."""
+    onto = get_ontology(ontology_csv)
 
     # Sections & bullets
-    sections = _split_sections(text)
-    bullets = _find_bullets(sections.experience) + _find_bullets(sections.education)
-
-    # Ontology + alias map
-    skills_dict: Dict[str, Skill] = load_ontology(ontology_csv)
-    alias_map = alias_to_id_map(skills_dict)
-
-    # Skills
-    skills_from_skills_section = _match_skills_in_text(" ".join(sections.skills), alias_map)
-    skills_from_full_text = _match_skills_in_text(text, alias_map)
-    all_skills = sorted(skills_from_skills_section | skills_from_full_text)
-    cat_ids = category_ids(skills_dict)
-    filtered_skills = [s for s in all_skills if s not in cat_ids]
+    with span("sections"):
+        sections = _split_sections(text)
+        exp_bullets, edu_bullets = _find_bullets(sections.experience), _find_bullets(sections.education)
+        bullets = exp_bullets + edu_bullets
+        starts = _locate(text, exp_bullets) + _locate(text, edu_bullets)
+
+    # Skills, with where they occur (document offsets, and per bullet)
+    with span("skills"):
+        hits = onto.matcher.find(text)
+        skills_from_skills_section = _match_skills_in_text(" ".join(sections.skills), onto.matcher)
+        skills_from_full_text = {h.skill_id for h in hits}
+        all_skills = sorted(skills_from_skills_section | skills_from_full_text)
+        cat_ids = onto.category_ids
+        filtered_skills = [s for s in all_skills if s not in cat_ids]
+        _assign_spans(hits, bullets, starts, onto.matcher, cat_ids)
 
     return ParsedDoc(
         text=text,
         skills=sorted(filtered_skills),
         bullets=bullets,
-        sections=sections
+        sections=sections,
+        spans=_spans(hits, cat_ids),
     )
+
+def _spans(hits, exclude: Set[str], shift: int = 0) -> List[SkillSpan]:
+    return [SkillSpan(skill_id=h.skill_id, alias=h.alias, start=h.start - shift, end=h.end - shift)
+            for h in hits if h.skill_id not in exclude]
+
+def _locate(text: str, bullets: List[Bullet]) -> List[int]:
+    """Offset of each bullet's text in `text` (bullets in document order); -1 if not found."""
+    out, pos = [], 0
+    for b in bullets:
+        i = text.find(b.text, pos)
+        out.append(i)
+        if i >= 0:
+            pos = i + len(b.text)
+    return out
+
+def _assign_spans(hits, bullets: List[Bullet], starts: List[int], matcher: AliasMatcher, exclude: Set[str]):
+    """Bullet skill index from the document's hits (no second matcher pass); unlocated bullets are matched alone."""
+    located = sorted((s, i) for i, s in enumerate(starts) if s >= 0)
+    keys = [s for s, _ in located]
+    per: List[list] = [[] for _ in bullets]
+    for h in hits:
+        j = bisect_right(keys, h.start) - 1
+        if j >= 0:
+            s, i = located[j]
+            if h.end <= s + len(bullets[i].text):
+                per[i].append(h)
+    for i, b in enumerate(bullets):
+        b.spans = _spans(per[i] if starts[i] >= 0 else matcher.find(b.text), exclude, max(starts[i], 0))
+        b.skills = sorted({sp.skill_id for sp in b.spans})
+
+def index_bullets(bullets: List[Bullet], matcher: AliasMatcher, exclude: Set[str] = frozenset()) -> List[Bullet]:
+    """Fill each bullet's `skills` and `spans` from one matcher pass over its text (in place)."""
+    for b in bullets:
+        b.spans = _spans(matcher.find(b.text), exclude)
+        b.skills = sorted({sp.skill_id for sp in b.spans})
+    return bullets
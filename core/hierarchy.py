@@ -0,0 +1,196 @@
+# core/hierarchy.py
+"""
+Partial-credit skill coverage from the ontology's parent links.
+
+`parent_id` may name another skill or a virtual category node (the
+O*NET/UNSPSC commodity codes in skills.csv); two skills are at distance
+d when the shortest path between them through a common ancestor has d
+edges: parent/child 1, siblings or grandparent 2, and so on. Nodes in
+`Ontology.category_ids` (the catch-all root) do not connect anything.
+
+A JD skill earns credit 1 when the resume has it, else the weight of its
+nearest related resume skill (JR_HIER_WEIGHTS, by distance 1, 2, ...; off by default),
+else 0. The closure is built once per ontology version and weights:
+
+  CSR table     skill position -> related skill positions and distances
+  level bitsets skills within distance <= d of each skill, d = 1..D
+
+A block of pairs costs one AND + popcount per distance level that holds
+pairs (one extra pass with this skills.csv, where every relation is a
+sibling under a category code) once the resume side is expanded; that
+expansion depends on the resumes only and is cached by ResumeCorpus.
+"""
+from __future__ import annotations
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from . import skillbits
+from .config import hier_weights_from_env
+
+
+class Hierarchy:
+    def __init__(self, onto, weights: Sequence[float]):
+        self.weights = tuple(float(w) for w in weights)      # by distance 1..D
+        self.max_distance = len(self.weights)
+        self.skill_ids: List[str] = onto.skill_ids
+        self.skill_pos: Dict[str, int] = onto.skill_pos
+        self._near: Dict[str, Dict[str, int]] = {}              # skill -> {related skill: distance}
+        self.indptr, self.indices, self.dist = self._closure(onto)
+        self.plan = self._plan()
+        self._levels: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def _ancestors(self, sid: str, parents: Dict[str, Optional[str]], stop) -> List[Tuple[str, int]]:
+        out, seen, node, depth = [(sid, 0)], {sid}, parents.get(sid), 1
+        while node and node not in stop and node not in seen and depth <= self.max_distance:
+            out.append((node, depth))
+            seen.add(node)
+            node, depth = parents.get(node), depth + 1
+        return out
+
+    def _closure(self, onto) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        D = self.max_distance
+        n = len(self.skill_ids)
+        if D == 0:
+            return np.zeros(n + 1, dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.uint8)
+        ancestors = [self._ancestors(sid, onto.parents, onto.category_ids) for sid in self.skill_ids]
+        below: Dict[str, List[Tuple[int, int]]] = {}      # node -> (skill position, depth under it)
+        for b, anc in enumerate(ancestors):
+            for node, depth in anc:
+                below.setdefault(node, []).append((b, depth))
+        indptr, indices, dist = [0], [], []
+        ids = self.skill_ids
+        for a, anc in enumerate(ancestors):
+            best: Dict[int, int] = {}
+            for node, da in anc:
+                for b, db in below[node]:
+                    d = da + db
+                    if b != a and d <= D and d < best.get(b, D + 1):
+                        best[b] = d
+            for b in sorted(best):
+                indices.append(b)
+                dist.append(best[b])
+            indptr.append(len(indices))
+            if best:
+                self._near[ids[a]] = {ids[b]: d for b, d in best.items()}
+        return (np.asarray(indptr, dtype=np.int64), np.asarray(indices, dtype=np.int32),
+                np.asarray(dist, dtype=np.uint8))
+
+    def related(self, sid: str) -> Dict[str, int]:
+        """Skills within max_distance of `sid` -> distance."""
+        return dict(self._near.get(sid, {}))
+
+    # ---------------- one pair ----------------
+
+    def credit(self, resume_skills, jd_skills) -> Tuple[float, Dict[str, str]]:
+        """
+        (summed credit over jd_skills, {jd skill without exact match: nearest
+        resume skill that earned it partial credit}).
+        """
+        r = set(resume_skills)
+        total, related = 0.0, {}
+        for j in set(jd_skills):
+            if j in r:
+                total += 1.0
+                continue
+            near = self._near.get(j)
+            if not near:
+                continue
+            hits = [(near[s], s) for s in r if s in near]
+            if hits:
+                d, s = min(hits)
+                if self.weights[d - 1] > 0:
+                    total += self.weights[d - 1]
+                    related[j] = s
+        return total, related
+
+    # ---------------- blocks ----------------
+
+    def _plan(self) -> List[Tuple[int, float]]:
+        """
+        (distance, coefficient) per cumulative level E_d a block needs.
+        Coverage telescopes: sum_d (w_d - w_{d+1}) |J ∩ E_d|, with w_0 = 1,
+        w_{D+1} = 0 and E_0 the resume's own skills; a distance no pair sits
+        at has E_d = E_{d-1} and folds into it, and zero terms are dropped.
+        """
+        w = (1.0,) + self.weights + (0.0,)
+        present = set(np.unique(self.dist).tolist())
+        plan: List[List] = []
+        for d in range(self.max_distance + 1):
+            if d == 0 or d in present:
+                plan.append([d, w[d] - w[d + 1]])
+            else:
+                plan[-1][1] += w[d] - w[d + 1]
+        return [(d, c) for d, c in plan if d == 0 or c]
+
+    def levels(self) -> np.ndarray:
+        """(len(plan) - 1, n_skills, n_words) bitsets: skills within distance <= d of each skill, per planned d."""
+        if self._levels is None:
+            with self._lock:
+                if self._levels is None:
+                    n, W = len(self.skill_ids), skillbits.n_words(len(self.skill_ids))
+                    dists = [d for d, _ in self.plan[1:]]
+                    L = np.zeros((len(dists), n, W), dtype=np.uint64)
+                    rows = np.repeat(np.arange(n), np.diff(self.indptr))
+                    one = np.uint64(1)
+                    for k, d in enumerate(dists):
+                        m = self.dist <= d
+                        cols = self.indices[m].astype(np.int64)
+                        np.bitwise_or.at(L[k], (rows[m], cols >> 6), one << (cols & 63).astype(np.uint64))
+                    self._levels = L
+        return self._levels
+
+    def expand(self, bits: np.ndarray) -> np.ndarray:
+        """
+        (len(plan), n_docs, n_words): the docs' skills, then everything
+        within each planned distance of them. Depends on the documents only,
+        so callers scoring one resume set against many JDs compute it once.
+        """
+        bits = np.atleast_2d(bits)
+        out = np.empty((len(self.plan),) + bits.shape, dtype=np.uint64)
+        out[0] = bits
+        if len(self.plan) == 1 or not len(bits):
+            out[1:] = bits
+            return out
+        flags = np.unpackbits(np.ascontiguousarray(bits).view(np.uint8), axis=1, bitorder="little")
+        doc, pos = np.divmod(np.flatnonzero(flags.view(bool)), flags.shape[1])
+        L = self.levels()
+        for k in range(1, len(self.plan)):
+            out[k] = bits
+            if len(pos):
+                # OR each doc's rows of the level table together (`doc` is sorted)
+                starts = np.flatnonzero(np.r_[True, doc[1:] != doc[:-1]])
+                out[k][doc[starts]] |= np.bitwise_or.reduceat(L[k - 1][pos], starts, axis=0)
+        return out
+
+    def coverage_block(self, R: np.ndarray, J: np.ndarray,
+                       expanded: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Like skillbits.coverage_block with partial credit: (coverage, exact
+        intersection, exact gaps), each (n_r, n_j); one AND + popcount pass
+        per planned level. `expanded` is `expand(R)` when the caller has it.
+        """
+        E = self.expand(R) if expanded is None else expanded
+        inter = skillbits.intersect_counts(E[0], J)
+        num = inter * self.plan[0][1]
+        for k in range(1, len(self.plan)):
+            num = num + self.plan[k][1] * skillbits.intersect_counts(E[k], J)
+        jc = skillbits.counts(J)
+        return num / np.maximum(1, jc)[None, :], inter, jc[None, :] - inter
+
+
+_cache: Dict[tuple, Hierarchy] = {}
+_lock = threading.Lock()
+
+def get_hierarchy(onto, weights: Optional[Sequence[float]] = None) -> Hierarchy:
+    """One closure per (ontology version, weights); weights default to JR_HIER_WEIGHTS."""
+    weights = tuple(hier_weights_from_env() if weights is None else weights)
+    key = (onto.version, weights)
+    h = _cache.get(key)
+    if h is None:
+        with _lock:
+            h = _cache.get(key)
+            if h is None:
+                h = _cache[key] = Hierarchy(onto, weights)
+    return h
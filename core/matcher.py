@@ -0,0 +1,239 @@
+"""
+Precompiled alias matcher (Aho-Corasick) for ontology skill extraction.
+
+Replaces the per-alias loops of the old `_match_skills_in_text` with three
+structures built once per alias map:
+  - a dict lookup for single-token aliases over token variants
+  - a word-boundary-aware automaton for multi-token aliases over the
+    space-joined token stream (and the sorted variant-token stream)
+  - a plain substring automaton over the normalized text for every alias
+    plus its dotless / dashless / spaced forms
+Each hit carries character offsets into the original (un-normalized) text.
+"""
+from bisect import bisect_right
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+import re, unicodedata
+
+TOKEN_RX = re.compile(r"[a-z0-9\+\#\.\-\/]+")
+
+
+class AliasHit(NamedTuple):
+    skill_id: str
+    alias: str
+    start: int   # offset into the original text (-1 when unknown)
+    end: int
+
+
+def _is_word(ch: str) -> bool:
+    # same definition as `\w` in unicode `re` patterns
+    return ch.isalnum() or ch == "_"
+
+
+def _at_boundary(s: str, i: int) -> bool:
+    """Equivalent of `re`'s `\\b` assertion at position i of s."""
+    before = i > 0 and _is_word(s[i - 1])
+    after = i < len(s) and _is_word(s[i])
+    return before != after
+
+
+class AhoCorasick:
+    """Minimal byte-free Aho-Corasick automaton over str patterns."""
+
+    def __init__(self, patterns: Iterable[Tuple[str, object]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, object]]] = [[]]   # (pattern_len, payload)
+        for pat, payload in patterns:
+            if pat:
+                self._add(pat, payload)
+        self._build()
+
+    def _add(self, pat: str, payload):
+        node = 0
+        for ch in pat:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        entry = (len(pat), payload)
+        if entry not in self._out[node]:
+            self._out[node].append(entry)
+
+    def _build(self):
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # inherit outputs of the failure state (BFS order guarantees it is final)
+                if self._out[self._fail[nxt]]:
+                    self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def __len__(self):
+        return len(self._goto)
+
+    def iter(self, text: str):
+        """Yield (start, end, payload) for every (overlapping) occurrence."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                end = i + 1
+                for n, payload in out[node]:
+                    yield end - n, end, payload
+
+
+def _normalize_unicode(text: str) -> str:
+    t = text.replace("\u00A0", " ")
+    t = unicodedata.normalize("NFKD", t)
+    t = "".join(ch for ch in t if not unicodedata.combining(ch))
+    return t.lower()
+
+
+def _source_map(text: str, norm: str) -> Optional[List[int]]:
+    """norm char index -> index of the original char that produced it."""
+    if text.isascii():
+        return None  # identity
+    src: List[int] = []
+    for i, ch in enumerate(text):
+        piece = unicodedata.normalize("NFKD", " " if ch == "\u00A0" else ch)
+        piece = "".join(c for c in piece if not unicodedata.combining(c)).lower()
+        src.extend([i] * len(piece))
+    if len(src) != len(norm):
+        return None
+    return src
+
+
+class _View:
+    """
+    A string built from segments of the normalized text, joined by single
+    spaces. `aligned` segments map char-for-char onto the normalized text;
+    other segments map as a whole to their source span.
+    """
+    def __init__(self, segments: List[Tuple[str, int, int, bool]]):
+        parts, starts, self._segs = [], [], segments
+        pos = 0
+        for s, *_ in segments:
+            starts.append(pos)
+            parts.append(s)
+            pos += len(s) + 1
+        self.text = " ".join(parts)
+        self._starts = starts
+
+    def norm_span(self, s: int, e: int) -> Tuple[int, int]:
+        i = bisect_right(self._starts, s) - 1
+        j = bisect_right(self._starts, e - 1) - 1
+        _, a0, a1, a_al = self._segs[i]
+        _, b0, b1, b_al = self._segs[j]
+        start = a0 + (s - self._starts[i]) if a_al else a0
+        end = b0 + (e - self._starts[j]) if b_al else b1
+        return start, max(start, end)
+
+
+def _token_variants(t: str) -> List[str]:
+    out = [t]
+    if "." in t:
+        out.append(t.replace(".", ""))
+        first = t.split(".")[0]
+        if first:
+            out.append(first)
+    if "-" in t:
+        out.append(t.replace("-", " "))
+        out.append(t.replace("-", ""))
+    if "/" in t:
+        out.extend(p for p in t.split("/") if p)
+    return out
+
+
+class AliasMatcher:
+    """
+    Build once per alias map (i.e. per ontology version); `find()` then costs
+    O(len(text) + hits) regardless of ontology size.
+    """
+    def __init__(self, alias_map: Dict[str, str]):
+        self._single: Dict[str, List[Tuple[str, str]]] = {}
+        phrases, substrings = [], []
+        for alias, sid in alias_map.items():
+            toks = alias.split()
+            if len(toks) == 1:
+                self._single.setdefault(alias, []).append((sid, alias))
+            elif toks:
+                phrases.append((" ".join(toks), (sid, alias)))
+            for form in {alias, alias.replace(".", ""), alias.replace("-", ""), alias.replace("-", " ")}:
+                substrings.append((form, (sid, alias)))
+        self._phrases = AhoCorasick(phrases)
+        self._substrings = AhoCorasick(substrings)
+
+    def _tokens(self, text: str, norm: str) -> Tuple[List[Tuple[str, int, int]], bool]:
+        """Tokens with spans; second value tells whether spans index `norm`."""
+        toks = [(m.group(0), m.start(), m.end()) for m in TOKEN_RX.finditer(norm)]
+        if toks or not text.strip():
+            return toks, True
+        # same last-resort route as the legacy tokenizer: raw whitespace split
+        out, pos = [], 0
+        for tok in text.split():
+            pos = text.find(tok, pos)
+            out.append((tok, pos, pos + len(tok)))
+            pos += len(tok)
+        return out, False
+
+    def find(self, text: str) -> List[AliasHit]:
+        """All alias occurrences in `text`, ordered by position."""
+        norm = _normalize_unicode(text)
+        src = _source_map(text, norm)
+
+        def to_orig(s: int, e: int) -> Tuple[int, int]:
+            if src is None or e <= s:
+                return s, e
+            return src[s], src[e - 1] + 1
+
+        found: Set[Tuple[str, str, int, int]] = set()
+        tokens, in_norm = self._tokens(text, norm)
+        span = to_orig if in_norm else (lambda s, e: (s, e))
+
+        # 1) single-token aliases against tokens and their variants
+        first_source: Dict[str, Tuple[int, int]] = {}
+        for tok, s, e in tokens:
+            for v in _token_variants(tok):
+                first_source.setdefault(v, (s, e))
+                for sid, alias in self._single.get(v, ()):
+                    found.add((sid, alias, *span(s, e)))
+
+        # 2) multi-token aliases, word-bounded, over joined tokens and joined variants
+        if tokens:
+            views = [_View([(t, s, e, True) for t, s, e in tokens])]
+            variant_segs = []
+            for v in sorted(first_source):
+                s, e = first_source[v]
+                for piece in v.split():
+                    variant_segs.append((piece, s, e, False))
+            if variant_segs:
+                views.append(_View(variant_segs))
+            for view in views:
+                vt = view.text
+                for s, e, (sid, alias) in self._phrases.iter(vt):
+                    if _at_boundary(vt, s) and _at_boundary(vt, e):
+                        found.add((sid, alias, *span(*view.norm_span(s, e))))
+
+        # 3) substring fallback over the normalized text
+        for s, e, (sid, alias) in self._substrings.iter(norm):
+            found.add((sid, alias, *to_orig(s, e)))
+
+        return sorted((AliasHit(*h) for h in found), key=lambda h: (h.start, h.end, h.skill_id))
+
+    def match(self, text: str) -> Set[str]:
+        return {h.skill_id for h in self.find(text)}
@@ -1,6 +1,8 @@
-import csv
-from typing import Dict
+import csv, hashlib, os, pickle, threading
+from typing import Dict, List, Optional, Tuple
 from .schemas import Skill
+from .matcher import AliasMatcher
+from .config import ontology_artifact_from_env
 
 def id_to_label_map(skills: dict) -> dict:
     return {sk.id: sk.label for sk in skills.values()}
@@ -59,3 +61,105 @@ def alias_to_id_map(skills: Dict[str, Skill]) -> Dict[str, str]:
 def category_ids(skills: Dict[str, Skill]) -> set:
     # Only treat the single root as category; keep its children.
     return {"SK000"}
+
+
+def evidence_aliases(skills: Dict[str, Skill]) -> Dict[str, List[str]]:
+    """id -> aliases (alt_labels + label as fallback for evidence only)."""
+    id2aliases = {}
+    for sk in skills.values():
+        alts = [a.strip().lower() for a in sk.alt_labels if a.strip()]
+        # include label for evidence match (NOT for extraction)
+        if sk.label:
+            alts.append(sk.label.lower())
+        # dedupe
+        id2aliases[sk.id] = sorted(set([a for a in alts if a]))
+    return id2aliases
+
+
+# ---------------- Compiled ontology registry ----------------
+
+ARTIFACT_VERSION = 2
+
+class Ontology:
+    """Everything derived from one version of skills.csv, built once."""
+    def __init__(self, csv_path: str, version: str, skills: Dict[str, Skill]):
+        self.csv_path = csv_path
+        self.version = version
+        self.skills = skills
+        self.id2label = id_to_label_map(skills)
+        # stable dense index space over skill ids (vectorized coverage)
+        self.skill_ids: List[str] = sorted(skills)
+        self.skill_pos: Dict[str, int] = {sid: i for i, sid in enumerate(self.skill_ids)}
+        self.alias_map = alias_to_id_map(skills)
+        self.category_ids = category_ids(skills)
+        self.parents: Dict[str, Optional[str]] = {sk.id: sk.parent_id for sk in skills.values()}
+        self.children: Dict[str, List[str]] = {}
+        for sid, pid in self.parents.items():
+            if pid:
+                self.children.setdefault(pid, []).append(sid)
+        self.evidence_aliases = evidence_aliases(skills)
+        self.matcher = AliasMatcher(self.alias_map)
+
+
+_REGISTRY: Dict[str, Tuple[Tuple[int, int], Ontology]] = {}  # abspath -> ((mtime_ns, size), ontology)
+_LOCK = threading.Lock()
+
+def _artifact_path(csv_path: str) -> str:
+    d, name = os.path.split(csv_path)
+    return os.path.join(d, f".{name}.compiled.pkl")
+
+def _load_artifact(path: str, version: str) -> Optional[Ontology]:
+    try:
+        with open(path, "rb") as f:
+            tag, ver, onto = pickle.load(f)
+        if tag == ARTIFACT_VERSION and ver == version:
+            return onto
+    except Exception:
+        pass
+    return None
+
+def _save_artifact(path: str, onto: Ontology):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            pickle.dump((ARTIFACT_VERSION, onto.version, onto), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+def get_ontology(csv_path: str, persist: Optional[bool] = None) -> Ontology:
+    """
+    Process-wide registry keyed by path + content hash.
+    A stat() per call; the CSV is only re-read when mtime/size change, and
+    only rebuilt when its content hash changes. With persist=True (default
+    from JR_ONTOLOGY_ARTIFACT) the compiled form is pickled next to the CSV.
+    """
+    key = os.path.abspath(csv_path)
+    st = os.stat(key)
+    stamp = (st.st_mtime_ns, st.st_size)
+    hit = _REGISTRY.get(key)
+    if hit and hit[0] == stamp:
+        return hit[1]
+
+    with _LOCK:
+        hit = _REGISTRY.get(key)
+        if hit and hit[0] == stamp:
+            return hit[1]
+        with open(key, "rb") as f:
+            version = hashlib.sha256(f.read()).hexdigest()[:16]
+        if hit and hit[1].version == version:
+            _REGISTRY[key] = (stamp, hit[1])
+            return hit[1]
+
+        if persist is None:
+            persist = ontology_artifact_from_env()
+        onto = _load_artifact(_artifact_path(key), version) if persist else None
+        if onto is None:
+            onto = Ontology(csv_path, version, load_ontology(key))
+            if persist:
+                _save_artifact(_artifact_path(key), onto)
+        _REGISTRY[key] = (stamp, onto)
+        return onto
@@ -0,0 +1,277 @@
+# core/pdf_extract.py
+"""
+Page-level PDF text extraction with a per-document time budget. Short
+documents (fewer than JR_PDF_POOL_PAGES pages) are read in-process; longer
+ones are split across one long-lived process pool, started with
+forkserver/spawn so that threaded hosts (Streamlit, the API thread pool)
+never fork mid-import. A document that runs out of its budget may leave
+workers stuck on a pathological page: it retires the pool, later documents
+get a fresh one, and the old pool is terminated once the documents still
+using it are done.
+
+Strategies:
+  - "cascade"  (default) same output as the old whole-document reader:
+               pdfplumber; if the document has < 200 chars, PyMuPDF; then
+               pdfminer.six; the longest text wins. Each pass runs per page.
+  - "per_page" every page falls back on its own (pdfplumber → PyMuPDF →
+               pdfminer) when it yields fewer than MIN_PAGE_CHARS.
+  - "fastest"  like per_page but starts with PyMuPDF, the fastest reader.
+"""
+from __future__ import annotations
+import multiprocessing as mp
+import threading, time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from .config import pdf_options_from_env
+
+MIN_DOC_CHARS = 200
+MIN_PAGE_CHARS = 20
+STRATEGIES = {
+    "cascade": ("pdfplumber", "pymupdf", "pdfminer"),
+    "per_page": ("pdfplumber", "pymupdf", "pdfminer"),
+    "fastest": ("pymupdf", "pdfplumber", "pdfminer"),
+}
+
+
+class PageStat(NamedTuple):
+    page: int
+    extractor: str
+    chars: int
+    seconds: float
+    status: str        # "ok" | "error" | "timeout"
+
+
+class PdfText(NamedTuple):
+    text: str
+    pages: List[PageStat]
+    seconds: float
+    timed_out: bool
+
+
+# ---------------- worker side ----------------
+
+def _page_count(path: str) -> int:
+    try:
+        import fitz  # PyMuPDF
+        with fitz.open(path) as doc:
+            return doc.page_count
+    except Exception:
+        pass
+    try:
+        import pdfplumber
+        with pdfplumber.open(path) as pdf:
+            return len(pdf.pages)
+    except Exception:
+        return 0
+
+def _extract_pages(path: str, pages: List[int], extractor: str) -> List[Tuple[int, Optional[str], float]]:
+    """(page, text or None on error, seconds) for each requested page."""
+    out = []
+    if extractor == "pdfplumber":
+        try:
+            import pdfplumber
+            with pdfplumber.open(path) as pdf:
+                for i in pages:
+                    t0 = time.perf_counter()
+                    try:
+                        out.append((i, pdf.pages[i].extract_text() or "", time.perf_counter() - t0))
+                    except Exception:
+                        out.append((i, None, time.perf_counter() - t0))
+        except Exception:
+            return [(i, None, 0.0) for i in pages]
+    elif extractor == "pymupdf":
+        try:
+            import fitz  # PyMuPDF
+            with fitz.open(path) as doc:
+                for i in pages:
+                    t0 = time.perf_counter()
+                    try:
+                        out.append((i, doc[i].get_text("text"), time.perf_counter() - t0))
+                    except Exception:
+                        out.append((i, None, time.perf_counter() - t0))
+        except Exception:
+            return [(i, None, 0.0) for i in pages]
+    elif extractor == "pdfminer":
+        try:
+            from pdfminer.high_level import extract_text as pdfminer_extract_text
+        except Exception:
+            return [(i, None, 0.0) for i in pages]
+        for i in pages:
+            t0 = time.perf_counter()
+            try:
+                # per-page output keeps pdfminer's trailing form feed, so
+                # concatenating pages reproduces the whole-document text
+                out.append((i, pdfminer_extract_text(path, page_numbers=[i]) or "", time.perf_counter() - t0))
+            except Exception:
+                out.append((i, None, time.perf_counter() - t0))
+    else:
+        raise ValueError(f"unknown extractor: {extractor}")
+    return out
+
+
+# ---------------- pool side ----------------
+
+def _context():
+    return mp.get_context("forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn")
+
+
+class _SharedPool:
+    def __init__(self, size: int):
+        self.pool = _context().Pool(size)
+        self.size = size
+        self.users = 0
+        self.retired = False
+
+_shared: Optional[_SharedPool] = None
+_shared_lock = threading.Lock()
+
+def _acquire(size: int) -> _SharedPool:
+    global _shared
+    stale = None
+    with _shared_lock:
+        if _shared is None or _shared.size != size:
+            if _shared is not None:
+                _shared.retired = True
+                stale = _shared if _shared.users == 0 else None
+            _shared = _SharedPool(size)
+        _shared.users += 1
+        sp = _shared
+    if stale is not None:
+        stale.pool.terminate()
+    return sp
+
+def _release(sp: _SharedPool, timed_out: bool):
+    """A timed-out document retires the pool; a retired pool ends with its last user."""
+    global _shared
+    with _shared_lock:
+        sp.users -= 1
+        if timed_out and sp is _shared:
+            _shared = None
+            sp.retired = True
+        done = sp.retired and sp.users == 0
+    if done:
+        sp.pool.terminate()
+
+def shutdown_pool():
+    """Terminate the shared pool (tests, hosts that want to reclaim the workers)."""
+    global _shared
+    with _shared_lock:
+        sp, _shared = _shared, None
+        if sp is not None:
+            sp.retired = True
+    if sp is not None and sp.users == 0:
+        sp.pool.terminate()
+
+def _chunks(pages: List[int], n: int) -> List[List[int]]:
+    n = max(1, min(n, len(pages)))
+    return [pages[i::n] for i in range(n)]
+
+def _run_pass(path: str, pages: List[int], extractor: str, pool, workers: int,
+              deadline: float) -> Tuple[Dict[int, Tuple[Optional[str], float]], bool]:
+    """Extract `pages` with one extractor; returns ({page: (text|None, secs)}, timed_out)."""
+    if not pages:
+        return {}, False
+    if pool is None:
+        res: Dict[int, Tuple[Optional[str], float]] = {}
+        for i in pages:
+            if time.monotonic() > deadline:
+                return res, True
+            for p, t, s in _extract_pages(path, [i], extractor):
+                res[p] = (t, s)
+        return res, False
+
+    jobs = [pool.apply_async(_extract_pages, (path, chunk, extractor))
+            for chunk in _chunks(pages, workers)]
+    res, timed_out = {}, False
+    for job in jobs:
+        try:
+            for p, t, s in job.get(timeout=max(0.0, deadline - time.monotonic())):
+                res[p] = (t, s)
+        except mp.TimeoutError:
+            timed_out = True
+    return res, timed_out
+
+
+# ---------------- strategies ----------------
+
+def _doc_text(order: List[int], res: Dict[int, Tuple[Optional[str], float]], sep: str) -> str:
+    # any failed page fails the whole pass, like the old whole-document reader
+    if any(res.get(i, ("", 0.0))[0] is None for i in order):
+        return ""
+    return sep.join(res.get(i, ("", 0.0))[0] for i in order)
+
+def _stats(extractor: str, order: List[int], res, timed_out: bool) -> List[PageStat]:
+    out = []
+    for i in order:
+        if i not in res:
+            out.append(PageStat(i, extractor, 0, 0.0, "timeout" if timed_out else "error"))
+        else:
+            t, s = res[i]
+            out.append(PageStat(i, extractor, len(t or ""), s, "ok" if t is not None else "error"))
+    return out
+
+def read_pdf(path: str, strategy: Optional[str] = None, workers: Optional[int] = None,
+             budget: Optional[float] = None) -> PdfText:
+    """Text of a PDF plus per-page timing stats; defaults come from JR_PDF_* env vars."""
+    env_strategy, env_workers, env_budget, pool_pages = pdf_options_from_env()
+    strategy = strategy or env_strategy
+    workers = env_workers if workers is None else workers
+    budget = env_budget if budget is None else budget
+    if strategy not in STRATEGIES:
+        raise ValueError(f"unknown PDF strategy: {strategy}")
+
+    t0 = time.monotonic()
+    deadline = t0 + budget
+    n = _page_count(path)
+    if workers <= 1 or n < max(2, pool_pages):
+        return _read(path, strategy, None, 1, n, t0, deadline)
+    sp = _acquire(workers)
+    timed_out = False
+    try:
+        res = _read(path, strategy, sp.pool, min(workers, n), n, t0, deadline)
+        timed_out = res.timed_out
+        return res
+    finally:
+        _release(sp, timed_out)
+
+def _read(path: str, strategy: str, pool, workers: int, n: int, t0: float, deadline: float) -> PdfText:
+    order = list(range(n))
+    stats: List[PageStat] = []
+    timed_out = False
+    chain = STRATEGIES[strategy]
+
+    if strategy == "cascade":
+        text = ""
+        for extractor in chain:
+            if len(text) >= MIN_DOC_CHARS:
+                break
+            if time.monotonic() > deadline:
+                timed_out = True
+                break
+            res, to = _run_pass(path, order, extractor, pool, workers, deadline)
+            timed_out |= to
+            stats += _stats(extractor, order, res, to)
+            sep = "" if extractor == "pdfminer" else "\n"
+            t = _doc_text(order, res, sep).strip()
+            if len(t) > len(text):
+                text = t
+        return PdfText(text, stats, time.monotonic() - t0, timed_out)
+
+    # per_page / fastest: only short pages move on to the next extractor
+    best: Dict[int, str] = {i: "" for i in order}
+    todo = order
+    for extractor in chain:
+        if not todo:
+            break
+        if time.monotonic() > deadline:
+            timed_out = True
+            break
+        res, to = _run_pass(path, todo, extractor, pool, workers, deadline)
+        timed_out |= to
+        stats += _stats(extractor, todo, res, to)
+        for i, (t, _) in res.items():
+            t = (t or "").replace("\x0c", "")
+            if len(t.strip()) > len(best[i].strip()):
+                best[i] = t
+        todo = [i for i in todo if len(best[i].strip()) < MIN_PAGE_CHARS]
+    text = "\n".join(best[i].rstrip("\n") for i in order).strip()
+    return PdfText(text, stats, time.monotonic() - t0, timed_out)
@@ -0,0 +1,79 @@
+from typing import List, Optional, Tuple
+import numpy as np
+from .schemas import ParsedDoc
+from .embed import embed
+from .config import embed_window_from_env
+from .scoring import block_sims
+
+def split_windows(text: str, window: Optional[int] = None, overlap: Optional[int] = None) -> List[str]:
+    """Overlapping word windows covering all of `text`; short texts come back whole."""
+    if window is None or overlap is None:
+        w, o = embed_window_from_env()
+        window = w if window is None else window
+        overlap = o if overlap is None else overlap
+    words = text.split()
+    if len(words) <= window:
+        return [text]
+    step = max(1, window - overlap)
+    out = []
+    for s in range(0, len(words), step):
+        out.append(" ".join(words[s:s + window]))
+        if s + window >= len(words):
+            break
+    return out
+
+def source_texts(doc: ParsedDoc) -> List[str]:
+    """What gets embedded for a document: bullets, else the skills section, else the whole text."""
+    return [b.text for b in doc.bullets if b.text.strip()] or (
+        [" ".join(doc.sections.skills)] if doc.sections.skills else [doc.text or ""]
+    )
+
+def bullet_texts(doc: ParsedDoc) -> List[str]:
+    """
+    A document's scoring units, one vector each: its bullets, or for a
+    document without bullets the windows of its fallback text (there is no
+    bullet to map back to). BulletMatch indices and corpus rows refer to
+    this list.
+    """
+    if any(b.text.strip() for b in doc.bullets):
+        return source_texts(doc)
+    return [w for t in source_texts(doc) for w in split_windows(t)]
+
+def bullet_units(texts: List[str]) -> Tuple[List[str], np.ndarray]:
+    """
+    Model-sized windows of `texts` -> (windows, owner) where owner[i] is the
+    text window i came from (non-decreasing, so usable with reduceat).
+    """
+    windows, owner = [], []
+    for i, t in enumerate(texts):
+        parts = split_windows(t)
+        windows.extend(parts)
+        owner.extend([i] * len(parts))
+    return windows, np.asarray(owner, dtype=np.int64)
+
+def pool_bullets(V: np.ndarray, owner: np.ndarray) -> np.ndarray:
+    """Per-text vectors: normalized mean of its windows (rows of V follow `owner`)."""
+    if not len(V):
+        return V
+    starts = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]])
+    sums = np.add.reduceat(V, starts, axis=0)
+    return (sums / (np.linalg.norm(sums, axis=1, keepdims=True) + 1e-12)).astype(V.dtype, copy=False)
+
+def embed_bullets(texts: List[str], embed_fn=embed) -> np.ndarray:
+    """One vector per text: all windows in one embed call, pooled back per text."""
+    windows, owner = bullet_units(texts)
+    V = embed_fn(windows)
+    return V if len(windows) == len(texts) else pool_bullets(V, owner)
+
+def embed_docs(docs: List[ParsedDoc], embed_fn=embed) -> Tuple[np.ndarray, np.ndarray]:
+    """Every unit (see `bullet_texts`) of `docs` in one embed call -> (vectors, start offset per doc)."""
+    texts, starts = [], []
+    for d in docs:
+        starts.append(len(texts))
+        texts.extend(bullet_texts(d))
+    return embed_bullets(texts, embed_fn), np.asarray(starts, dtype=np.int64)
+
+def pair_top_sims(R: np.ndarray, r_starts: np.ndarray, J: np.ndarray, j_starts: np.ndarray,
+                  aggregation: str = "max") -> np.ndarray:
+    """(n_resumes, n_jds) semantic scores (default: best bullet-to-bullet cosine), from one GEMM."""
+    return block_sims(R @ J.T, r_starts, j_starts, aggregation)
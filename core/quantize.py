@@ -0,0 +1,109 @@
+# core/quantize.py
+"""
+Reduced-precision vector storage shared by the index backends.
+
+  float32  4·d bytes/vector (unchanged)
+  float16  2·d bytes/vector
+  int8     d + 4 bytes/vector: symmetric codes with one float32 scale per
+           vector (x ≈ codes · scale, scale = max|x| / 127)
+
+Scoring dequantizes block by block (`scores`), so only a bounded float32
+slab exists at any time; the stored matrix stays compact.
+"""
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+PRECISIONS = ("float32", "float16", "int8")
+SCORE_BLOCK = 32768   # rows dequantized per GEMM
+
+def check(precision: str) -> str:
+    p = (precision or "float32").lower()
+    if p not in PRECISIONS:
+        raise ValueError(f"unknown vector precision: {precision}")
+    return p
+
+def encode(X: np.ndarray, precision: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """(codes, scales); scales is None except for int8."""
+    X = np.asarray(X, dtype="float32")
+    p = check(precision)
+    if p == "float32":
+        return np.ascontiguousarray(X), None
+    if p == "float16":
+        return X.astype(np.float16), None
+    scales = np.abs(X).max(axis=-1) / 127.0
+    scales = np.where(scales > 0, scales, 1.0).astype("float32")
+    codes = np.clip(np.rint(X / scales[..., None]), -127, 127).astype(np.int8)
+    return codes, scales
+
+def decode(codes: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+    out = codes.astype("float32")
+    if scales is not None:
+        out *= scales[..., None]
+    return out
+
+def precision_of(codes: np.ndarray) -> str:
+    return {np.dtype(np.float32): "float32", np.dtype(np.float16): "float16",
+            np.dtype(np.int8): "int8"}[codes.dtype]
+
+def scores(Q: np.ndarray, codes: np.ndarray, scales: Optional[np.ndarray],
+           block: int = SCORE_BLOCK) -> np.ndarray:
+    """(q, n) inner products of float32 queries with stored vectors."""
+    Q = np.asarray(Q, dtype="float32")
+    if codes.dtype == np.float32:
+        return Q @ codes.T
+    out = np.empty((Q.shape[0], codes.shape[0]), dtype="float32")
+    for s in range(0, codes.shape[0], block):
+        # int8: Q·(c·scale) = (Q·c)·scale, so the scale is applied to the scores
+        out[:, s:s + block] = Q @ codes[s:s + block].astype("float32").T
+        if scales is not None:
+            out[:, s:s + block] *= scales[s:s + block]
+    return out
+
+def nbytes(codes: np.ndarray, scales: Optional[np.ndarray]) -> int:
+    return int(codes.nbytes + (scales.nbytes if scales is not None else 0))
+
+# ---------------- blob format (SQLite) ----------------
+# A blob is the row's codes (+ its float32 scale for int8). The precision is
+# stored next to it, never inferred: lengths collide (int8 and float16 are
+# both 8 bytes at dim 4).
+
+def to_blobs(codes: np.ndarray, scales: Optional[np.ndarray]) -> List[bytes]:
+    if scales is None:
+        return [row.tobytes() for row in codes]
+    return [row.tobytes() + s.tobytes() for row, s in zip(codes, scales.astype("float32"))]
+
+def blob_size(dim: int, precision: str) -> int:
+    p = check(precision)
+    return 4 * dim if p == "float32" else 2 * dim if p == "float16" else dim + 4
+
+def from_blobs(blobs: Sequence[bytes], dim: int, precision: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Decode blobs of one precision back into (codes, scales)."""
+    p = check(precision)
+    size = blob_size(dim, p)
+    bad = next((len(b) for b in blobs if len(b) != size), None)
+    if bad is not None:
+        raise ValueError(f"{p} vector blob of {bad} bytes does not fit dim {dim}")
+    raw = b"".join(blobs)
+    if p == "int8":
+        rec = np.frombuffer(raw, dtype=[("c", np.int8, (dim,)), ("s", "<f4")])
+        return np.ascontiguousarray(rec["c"]), np.ascontiguousarray(rec["s"])
+    return np.frombuffer(raw, dtype=np.float32 if p == "float32" else np.float16).reshape(-1, dim), None
+
+# ---------------- reporting ----------------
+
+def recall_report(X: np.ndarray, Q: np.ndarray, k: int = 10,
+                  precisions: Sequence[str] = PRECISIONS) -> List[dict]:
+    """Memory and top-k recall of each storage precision against float32."""
+    from .search_common import topk_indices
+    X, Q = np.asarray(X, dtype="float32"), np.asarray(Q, dtype="float32")
+    truth = topk_indices(Q @ X.T, k)
+    base = X.nbytes
+    rows = []
+    for p in precisions:
+        codes, sc = encode(X, p)
+        I = topk_indices(scores(Q, codes, sc), k)
+        hits = sum(len(set(a.tolist()) & set(b.tolist())) for a, b in zip(I, truth))
+        size = nbytes(codes, sc)
+        rows.append({"precision": p, "bytes": size, "saved": 1.0 - size / max(1, base),
+                     "recall": hits / max(1, truth.size)})
+    return rows
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class Skill(BaseModel):
     id: str
@@ -7,10 +7,17 @@ class Skill(BaseModel):
     alt_labels: List[str] = Field(default_factory=list)
     parent_id: Optional[str] = None
 
+class SkillSpan(BaseModel):
+    skill_id: str
+    alias: str             # matched alias (normalized form)
+    start: int             # character offsets into the owning text (bullet or document)
+    end: int
+
 class Bullet(BaseModel):
     text: str
     embedding: Optional[list] = None
     skills: List[str] = Field(default_factory=list)  # ontology IDs
+    spans: Optional[List[SkillSpan]] = None  # where each skill occurs in `text` (None = not indexed)
 
 class Sections(BaseModel):
     experience: List[str] = Field(default_factory=list)
@@ -22,6 +29,12 @@ class ParsedDoc(BaseModel):
     skills: List[str] = Field(default_factory=list)
     bullets: List[Bullet] = Field(default_factory=list)
     sections: Sections = Sections()
+    spans: Optional[List[SkillSpan]] = None  # occurrences of `skills` in `text` (None = not indexed)
+
+class BulletMatch(BaseModel):
+    jd_bullet: int         # index into pipeline.bullet_texts(jd)
+    resume_bullet: int     # best-matching index into bullet_texts(resume)
+    sim: float
 
 class MatchDetail(BaseModel):
     semantic_sim: float
@@ -29,3 +42,6 @@ class MatchDetail(BaseModel):
     total: float
     gaps: List[str] = Field(default_factory=list)
     matched_skills: List[str] = Field(default_factory=list)
+    sim_metrics: Dict[str, float] = Field(default_factory=dict)   # every aggregation of the similarity matrix
+    best_matches: List[BulletMatch] = Field(default_factory=list)  # per JD bullet
+    related: Dict[str, str] = Field(default_factory=dict)          # gap -> resume skill earning partial credit
@@ -1,20 +1,157 @@
-from .schemas import MatchDetail, ParsedDoc
+import numpy as np
+from typing import Dict, Tuple
+from .schemas import BulletMatch, MatchDetail, ParsedDoc
 from .config import load_weights
+from .skillbits import coverage_block
+from .trace import traced
 
-def score(resume: ParsedDoc, jd: ParsedDoc, top_sim: float, weights=None) -> MatchDetail:
+# Ways to turn a resume × JD bullet similarity matrix into one semantic score.
+#   max        best single bullet pair (what `top_sim` has always been)
+#   mean_best  mean over JD bullets of each one's best resume match
+#   topn_mean  mean of the n highest per-JD-bullet best matches
+AGGREGATIONS = ("max", "mean_best", "topn_mean")
+
+@traced("score")
+def score(resume: ParsedDoc, jd: ParsedDoc, top_sim: float, weights=None, hierarchy=None) -> MatchDetail:
+    """
+    Hybrid total of semantic similarity and skill coverage. With a
+    `hierarchy` (core.hierarchy), JD skills the resume lacks still earn
+    partial coverage through related skills; matched_skills and gaps stay exact.
+    """
     if weights is None:
         weights = load_weights()
     w_sim, w_cov = weights
     r = set(resume.skills)
     j = set(jd.skills)
     inter = r & j
-    coverage = (len(inter) / max(1, len(j)))
+    related = {}
+    if hierarchy is not None and hierarchy.max_distance:
+        credit, related = hierarchy.credit(r, j)
+        coverage = credit / max(1, len(j))
+    else:
+        coverage = (len(inter) / max(1, len(j)))
     total = w_sim * top_sim + w_cov * coverage
     gaps = sorted(j - r)
-    print("RESUME skills:", r)
-    print("JD skills:", j)
-    print("Intersection:", inter)
     return MatchDetail(
         semantic_sim=top_sim, coverage=coverage, total=total,
-        gaps=gaps, matched_skills=sorted(inter)
+        gaps=gaps, matched_skills=sorted(inter), related=related
     )
+
+def similarity_matrix(R: np.ndarray, J: np.ndarray) -> np.ndarray:
+    """(n_resume_bullets, n_jd_bullets) cosine matrix of normalized vectors, one GEMM."""
+    return np.atleast_2d(np.asarray(R, dtype="float32")) @ np.atleast_2d(np.asarray(J, dtype="float32")).T
+
+def sim_metrics(S: np.ndarray, top_n: int = 3) -> Tuple[Dict[str, float], np.ndarray, np.ndarray]:
+    """
+    Every aggregation of one similarity matrix, plus each JD bullet's best
+    resume bullet: (metrics, best_resume_idx, best_sim), both (n_jd_bullets,).
+    """
+    S = np.atleast_2d(S)
+    if S.size == 0:
+        empty = np.zeros(S.shape[1] if S.ndim == 2 else 0)
+        return {a: 0.0 for a in AGGREGATIONS}, empty.astype(np.int64), empty
+    best_idx = S.argmax(axis=0)
+    best = S[best_idx, np.arange(S.shape[1])]
+    n = min(top_n, len(best))
+    top = np.partition(best, len(best) - n)[len(best) - n:]
+    metrics = {"max": float(best.max()), "mean_best": float(best.mean()), "topn_mean": float(top.mean())}
+    return metrics, best_idx, best
+
+@traced("score")
+def score_matrix(resume: ParsedDoc, jd: ParsedDoc, S: np.ndarray, weights=None,
+                 aggregation: str = "max", top_n: int = 3, hierarchy=None) -> MatchDetail:
+    """
+    `score()` from the full resume × JD bullet similarity matrix: the
+    chosen aggregation is the semantic score, all of them are reported in
+    sim_metrics, and best_matches explains each JD bullet.
+    """
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(f"unknown aggregation: {aggregation}")
+    metrics, best_idx, best = sim_metrics(S, top_n)
+    d = score(resume, jd, metrics[aggregation], weights=weights, hierarchy=hierarchy)
+    d.sim_metrics = metrics
+    d.best_matches = [BulletMatch(jd_bullet=j, resume_bullet=int(r), sim=float(s))
+                      for j, (r, s) in enumerate(zip(best_idx.tolist(), best.tolist()))]
+    return d
+
+def _aggregate(M: np.ndarray, j_starts: np.ndarray, aggregation: str, top_n: int) -> np.ndarray:
+    """(n_resumes, n_jds) from M, the best resume unit per (resume, JD unit)."""
+    if aggregation == "max":
+        return np.maximum.reduceat(M, j_starts, axis=1)
+    if aggregation == "mean_best":
+        counts = np.diff(np.r_[j_starts, M.shape[1]])
+        return np.add.reduceat(M, j_starts, axis=1) / counts[None, :]
+    out = np.empty((M.shape[0], len(j_starts)), dtype=M.dtype)
+    ends = np.r_[j_starts[1:], M.shape[1]]
+    for j, (s, e) in enumerate(zip(j_starts.tolist(), ends.tolist())):
+        n = min(top_n, e - s)
+        out[:, j] = np.partition(M[:, s:e], e - s - n, axis=1)[:, e - s - n:].mean(axis=1)
+    return out
+
+@traced("score")
+def block_sims(S: np.ndarray, r_starts: np.ndarray, j_starts: np.ndarray,
+               aggregation: str = "max", top_n: int = 3) -> np.ndarray:
+    """
+    (n_resumes, n_jds) semantic scores for many documents at once from the
+    stacked unit similarity matrix S (rows grouped by r_starts, columns by
+    j_starts), with the same aggregations as `sim_metrics`.
+    """
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(f"unknown aggregation: {aggregation}")
+    return _aggregate(np.maximum.reduceat(S, r_starts, axis=0), j_starts, aggregation, top_n)
+
+@traced("score")
+def block_sim_metrics(S: np.ndarray, r_starts: np.ndarray, j_starts: np.ndarray,
+                      top_n: int = 3) -> Dict[str, np.ndarray]:
+    """Every aggregation of `block_sims` from one reduction of S."""
+    M = np.maximum.reduceat(S, r_starts, axis=0)
+    return {a: _aggregate(M, j_starts, a, top_n) for a in AGGREGATIONS}
+
+@traced("score")
+def score_block(top_sims: np.ndarray, resume_bits: np.ndarray, jd_bits: np.ndarray, weights=None,
+                hierarchy=None, expanded=None):
+    """
+    Vectorized `score()` totals for a block of pairs from skill bitsets
+    (see core.skillbits), with the same optional `hierarchy`; `expanded` is
+    hierarchy.expand(resume_bits) when the caller keeps it. top_sims is (n_resumes, n_jds).
+    Returns (total, coverage, n_matched, n_gaps), each (n_resumes, n_jds).
+    """
+    if weights is None:
+        weights = load_weights()
+    w_sim, w_cov = weights
+    if hierarchy is not None and hierarchy.max_distance:
+        coverage, inter, gaps = hierarchy.coverage_block(resume_bits, jd_bits, expanded)
+    else:
+        coverage, inter, gaps = coverage_block(resume_bits, jd_bits)
+    total = w_sim * np.asarray(top_sims, dtype=np.float64) + w_cov * coverage
+    return total, coverage, inter, gaps
+
+# Weight-independent parts of a score, per pair (see core.components):
+#   sim_<aggregation>   semantic score under each aggregation
+#   coverage            exact skill coverage; hier_coverage with partial credit
+#   n_matched, n_gaps   exact matched / missing JD skills
+COMPONENTS = tuple(f"sim_{a}" for a in AGGREGATIONS) + ("coverage", "hier_coverage", "n_matched", "n_gaps")
+
+@traced("score")
+def score_components(S: np.ndarray, r_starts: np.ndarray, j_starts: np.ndarray,
+                     resume_bits: np.ndarray, jd_bits: np.ndarray, hierarchy=None,
+                     top_n: int = 3) -> Dict[str, np.ndarray]:
+    """Every COMPONENTS column for a block of pairs, each (n_resumes, n_jds)."""
+    out = {f"sim_{a}": v for a, v in block_sim_metrics(S, r_starts, j_starts, top_n).items()}
+    coverage, inter, gaps = coverage_block(resume_bits, jd_bits)
+    out.update(coverage=coverage, n_matched=inter, n_gaps=gaps)
+    if hierarchy is not None and hierarchy.max_distance:
+        out["hier_coverage"] = hierarchy.coverage_block(resume_bits, jd_bits)[0]
+    else:
+        out["hier_coverage"] = coverage
+    return out
+
+def combine(components, weights=None, aggregation: str = "max", hierarchical: bool = True) -> np.ndarray:
+    """`score()` totals from stored components (any mapping of COMPONENTS columns), vectorized."""
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(f"unknown aggregation: {aggregation}")
+    if weights is None:
+        weights = load_weights()
+    w_sim, w_cov = weights
+    cov = components["hier_coverage" if hierarchical else "coverage"]
+    return w_sim * np.asarray(components[f"sim_{aggregation}"], dtype=np.float64) + w_cov * np.asarray(cov, dtype=np.float64)
@@ -0,0 +1,26 @@
+import numpy as np
+
+def topk_indices(sims: np.ndarray, k: int) -> np.ndarray:
+    """
+    Row-wise top-k column indices of a (q, n) score matrix, best first.
+    argpartition keeps this O(n) per row; only the k winners get sorted.
+    """
+    sims = np.atleast_2d(sims)
+    n = sims.shape[1]
+    k = min(k, n)
+    if k <= 0:
+        return np.zeros((sims.shape[0], 0), dtype=np.int64)
+    if k < n:
+        part = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    else:
+        part = np.tile(np.arange(n), (sims.shape[0], 1))
+    order = np.argsort(-np.take_along_axis(sims, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1)
+
+def as_query_matrix(vectors) -> np.ndarray:
+    q = np.asarray(vectors, dtype="float32")
+    if q.ndim == 1:
+        q = q.reshape(1, -1)
+    if q.ndim != 2:
+        raise ValueError("queries must be 2D array of shape (q, d)")
+    return q
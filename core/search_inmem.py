@@ -1,22 +1,53 @@
 import numpy as np
+from typing import Optional
+from .search_common import topk_indices, as_query_matrix
+from . import quantize
+from .config import vector_precision_from_env
+from .trace import traced
 
 class InMemIndex:
-    def __init__(self):
-        self.vecs = None
+    def __init__(self, precision: Optional[str] = None):
+        """precision: float32 | float16 | int8 storage (default: JR_VECTOR_PRECISION)."""
+        self.precision = quantize.check(precision or vector_precision_from_env())
+        self.vecs = None      # stored codes in `precision`
+        self.scales = None    # per-vector int8 scales
         self.meta = []
 
+    @traced("index")
     def index(self, vectors: np.ndarray, meta):
         if vectors is None or len(vectors) == 0:
             self.vecs = np.zeros((0, 1), dtype="float32")
+            self.scales = None
             self.meta = []
             return
-        self.vecs = np.asarray(vectors, dtype="float32")
+        self.vecs, self.scales = quantize.encode(vectors, self.precision)
         self.meta = list(meta)
 
+    def nbytes(self) -> int:
+        """Resident bytes of the stored vectors."""
+        return 0 if self.vecs is None else quantize.nbytes(self.vecs, self.scales)
+
+    @traced("query")
     def query(self, vector: np.ndarray, k: int = 5):
         if self.vecs is None or len(self.vecs) == 0:
             return []
-        v = np.asarray(vector, dtype="float32").reshape(-1,)
-        sims = (self.vecs @ v)  # cosine if normalized
-        idx = np.argsort(-sims)[:k]
+        v = np.asarray(vector, dtype="float32").reshape(1, -1)
+        sims = quantize.scores(v, self.vecs, self.scales)[0]  # cosine if normalized
+        idx = topk_indices(sims, k)[0]
         return [(float(sims[i]), self.meta[i]) for i in idx]
+
+    @traced("query")
+    def search(self, vectors: np.ndarray, k: int = 5):
+        """Raw top-k: (scores, row positions) arrays of shape (q, k')."""
+        Q = as_query_matrix(vectors)
+        if self.vecs is None or len(self.vecs) == 0:
+            return np.zeros((len(Q), 0), dtype="float32"), np.zeros((len(Q), 0), dtype=np.int64)
+        S = quantize.scores(Q, self.vecs, self.scales)  # (q, n)
+        I = topk_indices(S, k)
+        return np.take_along_axis(S, I, axis=1), I
+
+    def query_batch(self, vectors: np.ndarray, k: int = 5):
+        """One GEMM for all queries; returns a result list per query row."""
+        D, I = self.search(vectors, k)
+        return [[(float(s), self.meta[i]) for s, i in zip(drow, irow)]
+                for drow, irow in zip(D.tolist(), I.tolist())]
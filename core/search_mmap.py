@@ -0,0 +1,306 @@
+# core/search_mmap.py
+"""
+File-backed vector store, memory-mapped read-only so every worker process
+on a host shares one page-cache copy of the vectors.
+
+Layout of a store directory (one generation is live at a time):
+
+  CURRENT         generation number of the live files
+  vec.<gen>.bin   64-byte header (magic, version, dtype, dim, count) + rows
+  scl.<gen>.bin   float32 per-vector scales (int8 stores only)
+  meta.<gen>.jsonl  one JSON document per row
+  off.<gen>.bin   uint64 end offset of each row's JSON in meta.<gen>.jsonl
+  TAG             optional caller label, valid for the generation and
+                  count it records (so any later write invalidates it)
+
+`add()` appends to the live generation; the header count is written last,
+so readers never see a partial row. `index()` writes a new generation and
+swaps CURRENT atomically; readers pick it up on their next query.
+"""
+from __future__ import annotations
+import json, os, struct, threading
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+import numpy as np
+
+from .search_common import topk_indices, as_query_matrix
+from . import quantize
+from .config import vector_precision_from_env
+from .trace import traced
+
+try:
+    import fcntl
+except ImportError:  # Windows: single writer assumed
+    fcntl = None
+
+MAGIC = b"JRVS"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIQ")   # magic, version, dtype code, dim, count
+HEADER_SIZE = 64
+_DTYPES = {0: "float32", 1: "float16", 2: "int8"}
+_CODES = {v: k for k, v in _DTYPES.items()}
+
+
+def _files(path: str, gen: int) -> Tuple[str, str, str, str]:
+    return tuple(os.path.join(path, f"{kind}.{gen}.{ext}")
+                 for kind, ext in (("vec", "bin"), ("scl", "bin"), ("meta", "jsonl"), ("off", "bin")))
+
+def _read_header(f) -> Tuple[str, int, int]:
+    f.seek(0)
+    magic, version, code, dim, count = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a vector store file (magic={magic!r}, version={version})")
+    return _DTYPES[code], dim, count
+
+def _write_header(f, precision: str, dim: int, count: int):
+    f.seek(0)
+    f.write(HEADER.pack(MAGIC, VERSION, _CODES[precision], dim, count).ljust(HEADER_SIZE, b"\0"))
+
+def _sync(f):
+    f.flush()
+    os.fsync(f.fileno())
+
+
+class MmapIndex:
+    """
+    Same interface as InMemIndex (index/query/search/query_batch) over a
+    shared on-disk store at `path`. Writers serialize on a lock file;
+    any number of processes can read concurrently.
+    """
+    def __init__(self, path: str, precision: Optional[str] = None):
+        """precision: float32 | float16 | int8 for new generations (default: JR_VECTOR_PRECISION)."""
+        self.path = path
+        self.precision = quantize.check(precision or vector_precision_from_env())
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._gen: Optional[int] = None
+        self._count = 0
+        self._vecs: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._offs: Optional[np.ndarray] = None
+        self._meta: Optional[np.ndarray] = None
+
+    # ---------------- writing ----------------
+
+    @contextmanager
+    def _writer(self):
+        with open(os.path.join(self.path, ".lock"), "a+") as lf:
+            if fcntl is not None:
+                fcntl.flock(lf, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lf, fcntl.LOCK_UN)
+
+    def _current(self) -> Optional[int]:
+        try:
+            with open(os.path.join(self.path, "CURRENT"), encoding="ascii") as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def _create(self, gen: int, precision: str, dim: int):
+        vec, scl, meta, off = _files(self.path, gen)
+        with open(vec, "wb") as f:
+            _write_header(f, precision, dim, 0)
+            _sync(f)
+        for p in (scl, meta, off):
+            open(p, "wb").close()
+
+    def _append(self, gen: int, vectors: np.ndarray, meta: List):
+        vec, scl, meta_p, off = _files(self.path, gen)
+        with open(vec, "r+b") as fv, open(scl, "r+b") as fs, open(meta_p, "r+b") as fm, open(off, "r+b") as fo:
+            precision, dim, count = _read_header(fv)
+            if vectors.shape[1] != dim:
+                raise ValueError(f"expected {dim}-d vectors, got {vectors.shape[1]}")
+            codes, scales = quantize.encode(vectors, precision)
+            # drop any torn tail past `count` left by an interrupted append
+            itemsize = np.dtype(precision).itemsize
+            fv.truncate(HEADER_SIZE + count * dim * itemsize)
+            fs.truncate(count * 4 if scales is not None else 0)
+            fo.truncate(count * 8)
+            end = 0
+            if count:
+                fo.seek((count - 1) * 8)
+                end = struct.unpack("<Q", fo.read(8))[0]
+            fm.truncate(end)
+
+            blobs = [json.dumps(m).encode("utf-8") + b"\n" for m in meta]
+            ends = end + np.cumsum([len(b) for b in blobs], dtype=np.uint64)
+            fv.seek(0, os.SEEK_END)
+            fv.write(np.ascontiguousarray(codes).tobytes())
+            if scales is not None:
+                fs.seek(0, os.SEEK_END)
+                fs.write(scales.astype("<f4").tobytes())
+            fm.seek(0, os.SEEK_END)
+            fm.write(b"".join(blobs))
+            fo.seek(0, os.SEEK_END)
+            fo.write(ends.astype("<u8").tobytes())
+            for f in (fs, fm, fo, fv):
+                _sync(f)
+            # commit point
+            _write_header(fv, precision, dim, count + len(codes))
+            _sync(fv)
+
+    def _swap(self, gen: int):
+        tmp = os.path.join(self.path, f"CURRENT.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="ascii") as f:
+            f.write(str(gen))
+            _sync(f)
+        os.replace(tmp, os.path.join(self.path, "CURRENT"))
+        # readers that still map older files keep them alive until they remap
+        for name in os.listdir(self.path):
+            parts = name.split(".")
+            if len(parts) == 3 and parts[1].isdigit() and int(parts[1]) < gen:
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass
+
+    @traced("index")
+    def index(self, vectors: np.ndarray, meta):
+        """Replace the whole store: write a new generation, then swap it in."""
+        vecs = as_query_matrix(vectors) if vectors is not None and len(vectors) else np.zeros((0, 1), dtype="float32")
+        meta = list(meta) if meta is not None else []
+        if len(meta) != len(vecs):
+            raise ValueError("meta length must match number of vectors")
+        with self._writer():
+            gen = (self._current() or 0) + 1
+            self._create(gen, self.precision, vecs.shape[1])
+            if len(vecs):
+                self._append(gen, vecs, meta)
+            self._swap(gen)
+
+    @traced("index")
+    def add(self, vectors: np.ndarray, meta):
+        """Append rows to the live generation (a new one if the store is empty)."""
+        vecs = as_query_matrix(vectors)
+        meta = list(meta)
+        if len(meta) != len(vecs):
+            raise ValueError("meta length must match number of vectors")
+        if not len(vecs):
+            return
+        with self._writer():
+            gen = self._current()
+            if gen is not None:
+                with open(_files(self.path, gen)[0], "rb") as f:
+                    empty = _read_header(f)[2] == 0
+            if gen is None or empty:
+                # nothing to keep: start a generation with this dim and precision
+                gen = (gen or 0) + 1
+                self._create(gen, self.precision, vecs.shape[1])
+                self._append(gen, vecs, meta)
+                self._swap(gen)
+            else:
+                self._append(gen, vecs, meta)
+
+    def clear(self):
+        self.index(None, [])
+
+    @property
+    def tag(self) -> Optional[str]:
+        """Caller's label for the store as it is now (e.g. a corpus generation); any write resets it."""
+        try:
+            with open(os.path.join(self.path, "TAG"), encoding="utf-8") as f:
+                rec = json.load(f)
+        except (OSError, ValueError):
+            return None
+        gen = self._current()
+        if gen is None or rec.get("gen") != gen:
+            return None
+        try:
+            with open(_files(self.path, gen)[0], "rb") as f:
+                count = _read_header(f)[2]
+        except (OSError, ValueError):
+            return None
+        return rec.get("tag") if rec.get("count") == count else None
+
+    @tag.setter
+    def tag(self, value: Optional[str]):
+        with self._writer():
+            gen = self._current()
+            count = 0
+            if gen is not None:
+                with open(_files(self.path, gen)[0], "rb") as f:
+                    count = _read_header(f)[2]
+            tmp = os.path.join(self.path, f"TAG.{os.getpid()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"gen": gen, "count": count, "tag": value}, f)
+            os.replace(tmp, os.path.join(self.path, "TAG"))
+
+    # ---------------- reading ----------------
+
+    def _map(self, gen: int):
+        vec, scl, meta, off = _files(self.path, gen)
+        with open(vec, "rb") as f:
+            precision, dim, count = _read_header(f)
+        if count == self._count and gen == self._gen:
+            return
+        if count == 0:
+            self._vecs, self._scales, self._offs, self._meta = None, None, None, None
+        else:
+            self._vecs = np.memmap(vec, dtype=precision, mode="r", offset=HEADER_SIZE, shape=(count, dim))
+            self._scales = np.memmap(scl, dtype="<f4", mode="r", shape=(count,)) if precision == "int8" else None
+            self._offs = np.memmap(off, dtype="<u8", mode="r", shape=(count,))
+            self._meta = np.memmap(meta, dtype=np.uint8, mode="r", shape=(int(self._offs[-1]),))
+        self._gen, self._count = gen, count
+
+    def refresh(self):
+        """Remap if the store was rebuilt or grew since the last call."""
+        self._snapshot()
+
+    def _snapshot(self):
+        """(vectors, scales, offsets, meta bytes) of the live generation, consistent with each other."""
+        with self._lock:
+            for _ in range(3):
+                gen = self._current()
+                if gen is None:
+                    self._gen, self._count = None, 0
+                    self._vecs = self._scales = self._offs = self._meta = None
+                    break
+                try:
+                    self._map(gen)
+                    break
+                except FileNotFoundError:
+                    continue  # swapped and cleaned up under us: re-read CURRENT
+            return self._vecs, self._scales, self._offs, self._meta
+
+    def __len__(self):
+        self.refresh()
+        return self._count
+
+    def nbytes(self) -> int:
+        """Bytes of mapped vectors (shared page cache, not private memory)."""
+        V, S, _, _ = self._snapshot()
+        return 0 if V is None else quantize.nbytes(V, S)
+
+    @staticmethod
+    def _meta_at(offs: np.ndarray, meta: np.ndarray, i: int):
+        start = int(offs[i - 1]) if i else 0
+        return json.loads(bytes(meta[start:int(offs[i])]))
+
+    @traced("query")
+    def _search(self, vectors: np.ndarray, k: int):
+        Q = as_query_matrix(vectors)
+        snap = self._snapshot()
+        V, S = snap[0], snap[1]
+        if V is None:
+            return np.zeros((len(Q), 0), dtype="float32"), np.zeros((len(Q), 0), dtype=np.int64), snap
+        sims = quantize.scores(Q, V, S)
+        I = topk_indices(sims, k)
+        return np.take_along_axis(sims, I, axis=1), I, snap
+
+    def search(self, vectors: np.ndarray, k: int = 5):
+        """Raw top-k: (scores, row positions) arrays of shape (q, k')."""
+        D, I, _ = self._search(vectors, k)
+        return D, I
+
+    def query(self, vector: np.ndarray, k: int = 5):
+        return self.query_batch(np.asarray(vector, dtype="float32").reshape(1, -1), k)[0]
+
+    def query_batch(self, vectors: np.ndarray, k: int = 5):
+        """One GEMM over the mapped matrix; only the hits' metadata is decoded."""
+        D, I, (_, _, offs, meta) = self._search(vectors, k)
+        return [[(float(s), self._meta_at(offs, meta, i)) for s, i in zip(drow, irow)]
+                for drow, irow in zip(D.tolist(), I.tolist())]
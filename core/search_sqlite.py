@@ -1,59 +1,403 @@
 # core/search_sqlite.py
 from __future__ import annotations
-import sqlite3, os, json, time
-from typing import Iterable, List, Tuple
+import sqlite3, os, json, threading, time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
 import numpy as np
+from .search_common import topk_indices, as_query_matrix
+from . import quantize
+from .trace import traced
+from .config import vector_precision_from_env
 
 _SQL = """
 CREATE TABLE IF NOT EXISTS jr_vecs (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     index_name TEXT NOT NULL,
     dim INTEGER NOT NULL,
-    vec BLOB NOT NULL,           -- float32, contiguous, normalized
+    vec BLOB NOT NULL,           -- normalized; float32, float16 or int8 codes + float32 scale
     meta TEXT NOT NULL,          -- JSON-encoded metadata (e.g., the text)
-    created_at REAL NOT NULL     -- unix timestamp
+    created_at REAL NOT NULL,    -- unix timestamp
+    precision TEXT               -- encoding of `vec`; NULL = float32 (rows from before the column)
 );
 CREATE INDEX IF NOT EXISTS idx_jr_vecs_index_name ON jr_vecs(index_name);
+CREATE TABLE IF NOT EXISTS jr_indexes (
+    name TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    expires_at REAL,             -- NULL = permanent; else purged by the janitor
+    tag TEXT                     -- caller's label for the current rows; reset by every write
+);
 """
 
+_PRAGMAS = (
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA journal_mode=WAL",        # readers never block the writer
+    "PRAGMA synchronous=NORMAL",      # durable at checkpoint; safe with WAL
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",       # 64 MiB page cache per connection
+    "PRAGMA mmap_size=268435456",     # 256 MiB memory-mapped reads
+)
+
+INSERT_CHUNK = 5000
+RESIDENT_MAX = 32   # resident indexes kept per process (least recently used are dropped)
+
+def _open(path: str) -> sqlite3.Connection:
+    con = sqlite3.connect(path, check_same_thread=False, isolation_level=None)  # explicit transactions
+    for p in _PRAGMAS:
+        con.execute(p)
+    return con
+
+class _Pool:
+    """Small thread-safe connection pool for one database file."""
+    def __init__(self, path: str, size: int = 8):
+        self.path = path
+        self.size = size
+        self._idle: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        with self._lock:
+            con = self._idle.pop() if self._idle else None
+        if con is None:
+            con = _open(self.path)
+        try:
+            yield con
+        finally:
+            if con.in_transaction:
+                con.rollback()
+            with self._lock:
+                if len(self._idle) < self.size:
+                    self._idle.append(con)
+                    con = None
+            if con is not None:
+                con.close()
+
+    @contextmanager
+    def transaction(self, immediate: bool = True):
+        with self.connection() as con:
+            con.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            try:
+                yield con
+            except BaseException:
+                con.rollback()
+                raise
+            con.commit()
+
+_POOLS: Dict[str, _Pool] = {}
+_POOLS_LOCK = threading.Lock()
+
+def _pool(path: str) -> _Pool:
+    key = os.path.abspath(path)
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            _ensure_db(key)
+            pool = _POOLS[key] = _Pool(key)
+        return pool
+
 def _ensure_db(path: str):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    con = sqlite3.connect(path)
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    con = sqlite3.connect(path, isolation_level=None)
     try:
+        # must precede WAL and table creation to take effect on a new file
+        con.execute("PRAGMA busy_timeout=5000")
+        con.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        for p in _PRAGMAS:
+            con.execute(p)
         con.executescript(_SQL)
-        con.commit()
+        for table, column in (("jr_vecs", "precision"), ("jr_indexes", "tag")):
+            if column not in {r[1] for r in con.execute(f"PRAGMA table_info({table})")}:
+                try:
+                    con.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+                except sqlite3.OperationalError:
+                    pass  # another process added it first
     finally:
         con.close()
 
-def _as_bytes(arr: np.ndarray) -> bytes:
-    a = np.asarray(arr, dtype="float32")
-    if a.ndim != 1:
-        a = a.reshape(-1,)
-    return a.tobytes(order="C")
 
-def _from_bytes(b: bytes, dim: int) -> np.ndarray:
-    return np.frombuffer(b, dtype="float32", count=dim)
+# ---------------- index lifecycle ----------------
+
+def list_indexes(db_path: str) -> List[dict]:
+    """Every index_name with row count, dim, approximate bytes and expiry."""
+    with _pool(db_path).connection() as con:
+        rows = con.execute(
+            "SELECT v.index_name, COUNT(*), MAX(v.dim), SUM(LENGTH(v.vec) + LENGTH(v.meta)), "
+            "       i.created_at, i.expires_at "
+            "FROM jr_vecs v LEFT JOIN jr_indexes i ON i.name = v.index_name "
+            "GROUP BY v.index_name ORDER BY v.index_name"
+        ).fetchall()
+    return [{"name": n, "rows": c, "dim": d, "bytes": b or 0, "created_at": ca, "expires_at": ea}
+            for n, c, d, b, ca, ea in rows]
+
+def db_size(db_path: str) -> int:
+    """On-disk bytes of the database including its WAL."""
+    return sum(os.path.getsize(p) for p in (db_path, db_path + "-wal") if os.path.exists(p))
+
+def drop_index(db_path: str, index_name: str, chunk: int = 20000) -> int:
+    """Delete an index's rows (in chunks, so writers are never blocked for long)."""
+    pool = _pool(db_path)
+    deleted = 0
+    while True:
+        with pool.transaction() as con:
+            n = con.execute(
+                "DELETE FROM jr_vecs WHERE id IN "
+                "(SELECT id FROM jr_vecs WHERE index_name=? LIMIT ?)", (index_name, chunk)
+            ).rowcount
+        deleted += n
+        if n < chunk:
+            break
+    with pool.transaction() as con:
+        con.execute("DELETE FROM jr_indexes WHERE name=?", (index_name,))
+    _forget(db_path, index_name)
+    return deleted
+
+def purge_expired(db_path: str, now: Optional[float] = None) -> List[str]:
+    """Drop every index whose TTL has passed, then hand freed pages back to the OS."""
+    now = time.time() if now is None else now
+    with _pool(db_path).connection() as con:
+        names = [r[0] for r in con.execute(
+            "SELECT name FROM jr_indexes WHERE expires_at IS NOT NULL AND expires_at < ?", (now,)
+        ).fetchall()]
+    for name in names:
+        drop_index(db_path, name)
+    if names:
+        vacuum(db_path)
+    return names
+
+def vacuum(db_path: str, full: bool = False):
+    """Incremental vacuum (cheap, online) or a full VACUUM (rewrites the file)."""
+    with _pool(db_path).connection() as con:
+        if full:
+            # also converts files created before auto_vacuum was enabled
+            con.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            con.execute("VACUUM")
+        else:
+            # sqlite3's execute() steps this pragma only once (one page);
+            # executescript runs it to completion
+            con.executescript("PRAGMA incremental_vacuum;")
+        con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+_JANITORS: Dict[str, threading.Thread] = {}
+
+def start_janitor(db_path: str, interval: float = 60.0) -> threading.Thread:
+    """Background daemon purging expired indexes every `interval` seconds (one per db file)."""
+    key = os.path.abspath(db_path)
+    with _POOLS_LOCK:
+        t = _JANITORS.get(key)
+        if t is not None and t.is_alive():
+            return t
+
+        def run():
+            while True:
+                try:
+                    purge_expired(key)
+                except sqlite3.Error:
+                    pass
+                time.sleep(interval)
+
+        t = threading.Thread(target=run, name=f"jr-sqlite-janitor:{os.path.basename(key)}", daemon=True)
+        _JANITORS[key] = t
+        t.start()
+        return t
+
+def _try_json(m):
+    # deserialize meta if it’s JSON; fall back to raw string
+    try:
+        return json.loads(m)
+    except Exception:
+        return m
+
+class _Resident:
+    """
+    Contiguous in-memory copy of one index_name's vectors, shared by every
+    SQLiteIndex on the same (db, index_name) in this process.
+    Refreshed incrementally from the highest row id already loaded;
+    PRAGMA data_version tells whether any other connection (or process)
+    committed since the last check, so an unchanged table costs one pragma.
+    Deletions are detected by row count and trigger a full reload.
+    Vectors stay in the precision they were stored in (the first row's).
+    """
+    def __init__(self, db_path: str, index_name: str):
+        self.index_name = index_name
+        self.lock = threading.Lock()
+        _pool(db_path)  # schema + pragmas
+        self.con: Optional[sqlite3.Connection] = _open(db_path)
+        self.data_version = None
+        self._reset()
+
+    def _reset(self):
+        self.buf = np.zeros((0, 0), dtype="float32")   # capacity-doubling backing store (codes)
+        self.sbuf: Optional[np.ndarray] = None          # int8 scales, same capacity
+        self.precision: Optional[str] = None
+        self.n = 0
+        self.metas: List[str] = []                       # raw JSON, decoded on demand
+        self.last_id = 0
+
+    def _decode(self, rows, dim: int):
+        blobs = [r[2] for r in rows]
+        precs = [r[4] or "float32" for r in rows]
+        if len(set(precs)) == 1:
+            codes, scales = quantize.from_blobs(blobs, dim, precs[0])
+            if self.precision in (None, precs[0]):
+                return codes, scales
+            return quantize.encode(quantize.decode(codes, scales), self.precision)
+        # rows written with different precisions: bring them to the resident one
+        X = np.vstack([quantize.decode(*quantize.from_blobs([b], dim, p)) for b, p in zip(blobs, precs)])
+        return quantize.encode(X, self.precision or "float32")
+
+    def _append(self, rows):
+        dim = rows[0][1]
+        if self.n and self.buf.shape[1] != dim:
+            raise ValueError(f"dimension mismatch in index {self.index_name!r}: {self.buf.shape[1]} vs {dim}")
+        new, scales = self._decode(rows, dim)
+        if self.precision is None:
+            self.precision = quantize.precision_of(new)
+        need = self.n + len(new)
+        if need > self.buf.shape[0]:
+            cap = max(need, 2 * self.buf.shape[0], 64)
+            grown = np.empty((cap, dim), dtype=new.dtype)
+            if self.n:
+                grown[:self.n] = self.buf[:self.n]
+            self.buf = grown
+            if scales is not None:
+                sgrown = np.empty((cap,), dtype="float32")
+                if self.n:
+                    sgrown[:self.n] = self.sbuf[:self.n]
+                self.sbuf = sgrown
+        self.buf[self.n:need] = new
+        if scales is not None:
+            self.sbuf[self.n:need] = scales
+        self.n = need
+        self.metas.extend(r[3] for r in rows)
+        self.last_id = rows[-1][0]
+
+    def refresh(self):
+        dv = self.con.execute("PRAGMA data_version").fetchone()[0]
+        if dv == self.data_version:
+            return
+        try:
+            self.con.execute("BEGIN")  # one snapshot for count + delta
+            cnt = self.con.execute(
+                "SELECT COUNT(*) FROM jr_vecs WHERE index_name=?", (self.index_name,)
+            ).fetchone()[0]
+            if cnt < self.n:
+                self._reset()
+            rows = self.con.execute(
+                "SELECT id, dim, vec, meta, precision FROM jr_vecs WHERE index_name=? AND id>? ORDER BY id",
+                (self.index_name, self.last_id)
+            ).fetchall()
+            if self.n + len(rows) != cnt:
+                # rows vanished below last_id (deleted and re-inserted): start over
+                self._reset()
+                rows = self.con.execute(
+                    "SELECT id, dim, vec, meta, precision FROM jr_vecs WHERE index_name=? ORDER BY id",
+                    (self.index_name,)
+                ).fetchall()
+        finally:
+            self.con.execute("COMMIT")
+        if rows:
+            self._append(rows)
+        self.data_version = dv
+
+    def matrix(self) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """(codes, int8 scales or None) of the loaded rows."""
+        return self.buf[:self.n], (self.sbuf[:self.n] if self.sbuf is not None else None)
+
+    def close(self):
+        """Free the matrix and connection; holders of this object must look it up again."""
+        with self.lock:
+            if self.con is not None:
+                self.con.close()
+                self.con = None
+            self._reset()
+
+
+_RESIDENT: "OrderedDict[Tuple[str, str], _Resident]" = OrderedDict()
+_RESIDENT_LOCK = threading.Lock()
+
+def _resident(db_path: str, index_name: str) -> _Resident:
+    key = (os.path.abspath(db_path), index_name)
+    evicted = []
+    with _RESIDENT_LOCK:
+        r = _RESIDENT.get(key)
+        if r is None:
+            r = _RESIDENT[key] = _Resident(db_path, index_name)
+            while len(_RESIDENT) > RESIDENT_MAX:
+                evicted.append(_RESIDENT.popitem(last=False)[1])
+        else:
+            _RESIDENT.move_to_end(key)
+    for old in evicted:
+        old.close()
+    return r
+
+def _forget(db_path: str, index_name: str):
+    """Drop an index's resident copy (after it was cleared, dropped or purged)."""
+    with _RESIDENT_LOCK:
+        r = _RESIDENT.pop((os.path.abspath(db_path), index_name), None)
+    if r is not None:
+        r.close()
 
 class SQLiteIndex:
     """
     Simple cosine-sim backend on SQLite.
     API matches other backends: index(), query().
     """
-    def __init__(self, db_path: str = "data/jr_match.sqlite3", index_name: str = "default"):
+    def __init__(self, db_path: str = "data/jr_match.sqlite3", index_name: str = "default",
+                 ttl: Optional[float] = None, precision: Optional[str] = None):
+        """
+        ttl (seconds): the index expires that long after its last write and is purged in the background.
+        precision: float32 | float16 | int8 for newly written rows (default: JR_VECTOR_PRECISION).
+        """
         self.db_path = db_path
         self.index_name = index_name
-        _ensure_db(self.db_path)
+        self.ttl = ttl
+        self.precision = quantize.check(precision or vector_precision_from_env())
+        self._pool = _pool(self.db_path)
         self._dim: int | None = None
+        if ttl is not None:
+            start_janitor(self.db_path, interval=min(60.0, max(1.0, ttl / 2)))
 
-    def _conn(self):
-        return sqlite3.connect(self.db_path)
+    def _touch(self, con: sqlite3.Connection, now: float):
+        expires = now + self.ttl if self.ttl is not None else None
+        con.execute(
+            "INSERT INTO jr_indexes (name, created_at, updated_at, expires_at) VALUES (?,?,?,?) "
+            "ON CONFLICT(name) DO UPDATE SET updated_at=excluded.updated_at, expires_at=excluded.expires_at, tag=NULL",
+            (self.index_name, now, now, expires)
+        )
 
     def clear(self):
-        with self._conn() as con:
+        with self._pool.transaction() as con:
             con.execute("DELETE FROM jr_vecs WHERE index_name=?", (self.index_name,))
-            con.commit()
+            con.execute("UPDATE jr_indexes SET tag=NULL WHERE name=?", (self.index_name,))
+        _forget(self.db_path, self.index_name)
+
+    def __len__(self):
+        with self._pool.connection() as con:
+            return con.execute("SELECT COUNT(*) FROM jr_vecs WHERE index_name=?", (self.index_name,)).fetchone()[0]
 
-    def index(self, vectors: np.ndarray, meta: Iterable[str]):
+    @property
+    def tag(self) -> Optional[str]:
+        """Caller's label for the rows as they are now (e.g. a corpus generation); any write resets it."""
+        with self._pool.connection() as con:
+            r = con.execute("SELECT tag FROM jr_indexes WHERE name=?", (self.index_name,)).fetchone()
+        return r[0] if r else None
+
+    @tag.setter
+    def tag(self, value: Optional[str]):
+        with self._pool.transaction() as con:
+            con.execute("UPDATE jr_indexes SET tag=? WHERE name=?", (value, self.index_name))
+
+    def drop(self):
+        """Delete this index's rows and registry entry."""
+        drop_index(self.db_path, self.index_name)
+
+    @traced("index")
+    def index(self, vectors: np.ndarray, meta: Iterable[str], replace: bool = False):
+        """Append rows; `replace` first deletes the existing ones in the same transaction."""
         vecs = np.asarray(vectors, dtype="float32")
         if vecs.ndim != 2:
             raise ValueError("vectors must be 2D array of shape (n, d)")
@@ -62,46 +406,66 @@ class SQLiteIndex:
         # ensure normalized (cosine)
         # (if upstream is already normalized, this is a no-op)
         norms = np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-12
-        vecs = vecs / norms
+        vecs = np.ascontiguousarray(vecs / norms, dtype="float32")
+        blobs = quantize.to_blobs(*quantize.encode(vecs, self.precision))
+        meta = list(meta)
 
+        # bulk ingest: chunked executemany inside one write transaction
         now = time.time()
-        rows = [(self.index_name, d, _as_bytes(vecs[i]), json.dumps(m), now)
-                for i, m in enumerate(list(meta))]
-        with self._conn() as con:
-            con.executemany(
-                "INSERT INTO jr_vecs (index_name, dim, vec, meta, created_at) VALUES (?,?,?,?,?)",
-                rows
-            )
-            con.commit()
+        with self._pool.transaction() as con:
+            if replace:
+                con.execute("DELETE FROM jr_vecs WHERE index_name=?", (self.index_name,))
+            for s in range(0, n, INSERT_CHUNK):
+                con.executemany(
+                    "INSERT INTO jr_vecs (index_name, dim, vec, meta, created_at, precision) VALUES (?,?,?,?,?,?)",
+                    ((self.index_name, d, blobs[i], json.dumps(meta[i]), now, self.precision)
+                     for i in range(s, min(n, s + INSERT_CHUNK)))
+                )
+            self._touch(con, now)
+
+    def _load(self):
+        """(codes, scales) of this index's vectors plus raw meta strings (resident, refreshed)."""
+        while True:
+            r = _resident(self.db_path, self.index_name)
+            with r.lock:
+                if r.con is None:
+                    continue  # evicted since the lookup; take the fresh entry
+                r.refresh()
+                if not r.n:
+                    return None, []
+                # safe without copying: appends only grow past n, resets swap in new objects
+                return r.matrix(), r.metas
+
+    def nbytes(self) -> int:
+        """Resident bytes of this index's vectors."""
+        M, _ = self._load()
+        return 0 if M is None else quantize.nbytes(*M)
 
     def query(self, vector: np.ndarray, k: int = 5) -> List[Tuple[float, str]]:
         q = np.asarray(vector, dtype="float32").reshape(-1,)
-        # normalize query
-        q = q / (np.linalg.norm(q) + 1e-12)
-
-        with self._conn() as con:
-            cur = con.execute(
-                "SELECT dim, vec, meta FROM jr_vecs WHERE index_name=?",
-                (self.index_name,)
-            )
-            rows = cur.fetchall()
-
-        if not rows:
-            return []
-
-        # determine dim from first row (all rows share dim)
-        dim = rows[0][0]
-        V = np.vstack([_from_bytes(b, dim) for _, b, _ in rows])  # (N, d)
-        metas = [m for *_, m in rows]
-
-        sims = V @ q  # cosine on normalized vectors
-        idx = np.argsort(-sims)[:k]
-        out = [(float(sims[i]), metas[i]) for i in idx]
-
-        # deserialize meta if it’s JSON; fall back to raw string
-        def _try(m):
-            try:
-                return json.loads(m)
-            except Exception:
-                return m
-        return [(s, _try(m)) for s, m in out]
+        return self.query_batch(q.reshape(1, -1), k=k)[0]
+
+    @traced("query")
+    def _search(self, vectors: np.ndarray, k: int):
+        Q = as_query_matrix(vectors)
+        # normalize queries
+        Q = Q / (np.linalg.norm(Q, axis=1, keepdims=True) + 1e-12)
+
+        M, metas = self._load()
+        if M is None:
+            return np.zeros((len(Q), 0), dtype="float32"), np.zeros((len(Q), 0), dtype=np.int64), metas
+
+        S = quantize.scores(Q, *M)  # cosine on normalized vectors
+        I = topk_indices(S, k)
+        return np.take_along_axis(S, I, axis=1), I, metas
+
+    def search(self, vectors: np.ndarray, k: int = 5):
+        """Raw top-k: (scores, row positions) arrays of shape (q, k'), rows in insertion order."""
+        D, I, _ = self._search(vectors, k)
+        return D, I
+
+    def query_batch(self, vectors: np.ndarray, k: int = 5) -> List[List[Tuple[float, str]]]:
+        """Score all queries with one matrix product over a single table read."""
+        D, I, metas = self._search(vectors, k)
+        return [[(float(s), _try_json(metas[i])) for s, i in zip(drow, irow)]
+                for drow, irow in zip(D.tolist(), I.tolist())]
@@ -0,0 +1,61 @@
+# core/skillbits.py
+"""
+Fixed-width skill bitsets over the ontology's dense index space
+(`Ontology.skill_pos`): one row of uint64 words per document, so pairwise
+coverage for a whole block of resume × JD pairs is one AND + popcount.
+"""
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+
+_POP8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def n_words(n_skills: int) -> int:
+    return max(1, (n_skills + 63) // 64)
+
+def encode(skill_lists: Iterable[Iterable[str]], skill_pos: Dict[str, int]) -> np.ndarray:
+    """(n_docs, n_words) uint64 bitsets; ids outside the ontology are ignored."""
+    skill_lists = list(skill_lists)
+    W = n_words(len(skill_pos))
+    bits = np.zeros((len(skill_lists), W), dtype=np.uint64)
+    for r, skills in enumerate(skill_lists):
+        for s in skills:
+            p = skill_pos.get(s)
+            if p is not None:
+                bits[r, p >> 6] |= np.uint64(1) << np.uint64(p & 63)
+    return bits
+
+def decode(row: np.ndarray, skill_ids: List[str]) -> List[str]:
+    """Sorted ids set in one bitset row (skill_ids is sorted, so order follows position)."""
+    as_bytes = np.ascontiguousarray(row, dtype=np.uint64).view(np.uint8)
+    flags = np.unpackbits(as_bytes, bitorder="little")[:len(skill_ids)]
+    return [skill_ids[i] for i in np.flatnonzero(flags)]
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """Per-element popcount of a uint64 array."""
+    if hasattr(np, "bitwise_count"):  # numpy >= 2.0
+        return np.bitwise_count(words)
+    w = np.ascontiguousarray(words, dtype=np.uint64)
+    return _POP8[w.view(np.uint8)].reshape(w.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+def counts(bits: np.ndarray) -> np.ndarray:
+    """Number of skills per row."""
+    return popcount(bits).sum(axis=-1, dtype=np.int64)
+
+def intersect_counts(R: np.ndarray, J: np.ndarray, max_words: int = 1 << 22) -> np.ndarray:
+    """(n_r, n_j) |R_i ∩ J_j|, computed in resume chunks of bounded temporary size."""
+    nr, nj, W = R.shape[0], J.shape[0], R.shape[1]
+    out = np.empty((nr, nj), dtype=np.int64)
+    step = max(1, max_words // max(1, nj * W))
+    for s in range(0, nr, step):
+        block = R[s:s + step, None, :] & J[None, :, :]
+        out[s:s + step] = popcount(block).sum(axis=-1, dtype=np.int64)
+    return out
+
+def coverage_block(R: np.ndarray, J: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (coverage, intersection, gaps) for every resume × JD pair, each (n_r, n_j).
+    coverage = |R ∩ J| / max(1, |J|), as in `score()`.
+    """
+    inter = intersect_counts(R, J)
+    jc = counts(J)
+    return inter / np.maximum(1, jc)[None, :], inter, jc[None, :] - inter
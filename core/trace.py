@@ -0,0 +1,230 @@
+# core/trace.py
+"""
+Timing spans for the matching pipeline.
+
+    with span("read", path=p) as rec:   # rec is the record; add fields to it
+        ...
+
+    @traced("score")
+    def score(...): ...
+
+Stages used by the pipeline: read, sections, skills, embed, index, query,
+score, explain. Every span is folded into a per-stage latency histogram
+(`stats()`, always on and cheap); records also go to any sinks, which
+come from JR_TRACE or `add_sink()`:
+
+  memory           keep the last records in process (`memory_sink().records`)
+  log              one line per span on the "jr_match.trace" logger (DEBUG)
+  jsonl:<path>     append one JSON object per span; safe across processes
+"""
+from __future__ import annotations
+import functools, json, logging, math, os, threading, time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+
+from .config import trace_sinks_from_env
+
+STAGES = ("read", "sections", "skills", "embed", "index", "query", "score", "explain")
+
+_parent: ContextVar[Optional[str]] = ContextVar("jr_trace_parent", default=None)
+
+
+# ---------------- histogram ----------------
+
+class Histogram:
+    """
+    Log-bucketed latency histogram per stage: 8 buckets per doubling from
+    1 µs, so quantiles are within ~9% of the true value at any scale.
+    """
+    PER_OCTAVE = 8
+    BASE_MS = 1e-3
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._h: Dict[str, dict] = {}
+
+    def _bucket(self, ms: float) -> int:
+        return max(0, int(math.log2(max(ms, self.BASE_MS) / self.BASE_MS) * self.PER_OCTAVE))
+
+    def _upper(self, b: int) -> float:
+        return self.BASE_MS * 2 ** ((b + 1) / self.PER_OCTAVE)
+
+    def record(self, stage: str, ms: float):
+        b = self._bucket(ms)
+        with self._lock:
+            h = self._h.get(stage)
+            if h is None:
+                h = self._h[stage] = {"count": 0, "total": 0.0, "max": 0.0, "buckets": {}}
+            h["count"] += 1
+            h["total"] += ms
+            h["max"] = max(h["max"], ms)
+            h["buckets"][b] = h["buckets"].get(b, 0) + 1
+
+    def merge_records(self, records):
+        """Fold span records (e.g. read back from a JSONL sink) into this histogram."""
+        for r in records:
+            self.record(r["stage"], float(r["ms"]))
+
+    def reset(self):
+        with self._lock:
+            self._h.clear()
+
+    def _quantile(self, h: dict, q: float) -> float:
+        rank = q * h["count"]
+        seen = 0
+        for b in sorted(h["buckets"]):
+            seen += h["buckets"][b]
+            if seen >= rank:
+                return min(self._upper(b), h["max"])
+        return h["max"]
+
+    def summary(self) -> Dict[str, dict]:
+        """stage -> count, total/mean/p50/p90/p99/max in ms; pipeline stages first."""
+        with self._lock:
+            snap = {s: {**h, "buckets": dict(h["buckets"])} for s, h in self._h.items()}
+        order = [s for s in STAGES if s in snap] + sorted(s for s in snap if s not in STAGES)
+        return {s: {"count": snap[s]["count"], "total_ms": snap[s]["total"],
+                    "mean_ms": snap[s]["total"] / snap[s]["count"],
+                    "p50_ms": self._quantile(snap[s], 0.50), "p90_ms": self._quantile(snap[s], 0.90),
+                    "p99_ms": self._quantile(snap[s], 0.99), "max_ms": snap[s]["max"]}
+                for s in order}
+
+    def format(self) -> str:
+        rows = self.summary()
+        if not rows:
+            return "(no spans recorded)"
+        lines = [f"{'stage':<10} {'count':>7} {'total ms':>10} {'mean':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}"]
+        for s, r in rows.items():
+            lines.append(f"{s:<10} {r['count']:>7} {r['total_ms']:>10.1f} {r['mean_ms']:>8.3f} {r['p50_ms']:>8.3f} "
+                         f"{r['p90_ms']:>8.3f} {r['p99_ms']:>8.3f} {r['max_ms']:>8.3f}")
+        return "\n".join(lines)
+
+HIST = Histogram()
+
+def stats() -> Dict[str, dict]:
+    return HIST.summary()
+
+
+# ---------------- sinks ----------------
+
+class MemorySink:
+    def __init__(self, maxlen: int = 10000):
+        self.records: deque = deque(maxlen=maxlen)
+
+    def emit(self, rec: dict):
+        self.records.append(rec)
+
+class LogSink:
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.DEBUG):
+        self.logger = logger or logging.getLogger("jr_match.trace")
+        self.level = level
+
+    def emit(self, rec: dict):
+        if self.logger.isEnabledFor(self.level):
+            extra = " ".join(f"{k}={v}" for k, v in rec.items() if k not in ("stage", "ms", "ts"))
+            self.logger.log(self.level, "%s %.3fms %s", rec["stage"], rec["ms"], extra)
+
+class JsonlSink:
+    """O_APPEND + one write per record, so processes sharing the file never interleave lines."""
+    def __init__(self, path: str):
+        self.path = path
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def emit(self, rec: dict):
+        os.write(self._fd, (json.dumps(rec, default=str) + "\n").encode("utf-8"))
+
+    def close(self):
+        os.close(self._fd)
+
+def read_jsonl(path: str) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+_SINK_TYPES: Dict[str, Callable[[str], object]] = {
+    "memory": lambda arg: MemorySink(int(arg) if arg else 10000),
+    "log": lambda arg: LogSink(),
+    "jsonl": JsonlSink,
+}
+_sinks: Optional[list] = None
+_sinks_lock = threading.Lock()
+
+def _active() -> list:
+    global _sinks
+    if _sinks is None:
+        with _sinks_lock:
+            if _sinks is None:
+                sinks = []
+                for spec in trace_sinks_from_env():
+                    kind, _, arg = spec.partition(":")
+                    if kind not in _SINK_TYPES:
+                        raise ValueError(f"unknown JR_TRACE sink {spec!r}; expected memory, log or jsonl:<path>")
+                    sinks.append(_SINK_TYPES[kind](arg))
+                _sinks = sinks
+    return _sinks
+
+def add_sink(sink):
+    """Any object with emit(record: dict)."""
+    global _sinks
+    _active()
+    with _sinks_lock:
+        _sinks = _sinks + [sink]
+    return sink
+
+def remove_sink(sink):
+    global _sinks
+    with _sinks_lock:
+        if _sinks is not None:
+            _sinks = [s for s in _sinks if s is not sink]
+
+def memory_sink() -> MemorySink:
+    """The first in-memory sink, added if there is none."""
+    for s in _active():
+        if isinstance(s, MemorySink):
+            return s
+    return add_sink(MemorySink())
+
+
+# ---------------- spans ----------------
+
+@contextmanager
+def span(stage: str, **fields):
+    rec = {"stage": stage, **fields}
+    parent = _parent.get()
+    if parent == stage:
+        # e.g. score_matrix -> score: time the outer call only, never count twice
+        yield rec
+        return
+    if parent is not None:
+        rec["parent"] = parent
+    token = _parent.set(stage)
+    t0 = time.perf_counter()
+    try:
+        yield rec
+    except BaseException as e:
+        rec["error"] = type(e).__name__
+        raise
+    finally:
+        ms = (time.perf_counter() - t0) * 1e3
+        _parent.reset(token)
+        HIST.record(stage, ms)
+        sinks = _active()
+        if sinks:
+            rec["ms"] = ms
+            rec["ts"] = time.time()
+            rec["pid"] = os.getpid()
+            for s in sinks:
+                s.emit(rec)
+
+def traced(stage: str):
+    """Decorator: run the function inside span(stage)."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage, fn=fn.__qualname__):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
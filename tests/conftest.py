@@ -0,0 +1,4 @@
+import os, sys
+
+# make `core` importable when pytest is run from anywhere
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
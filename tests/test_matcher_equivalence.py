@@ -0,0 +1,163 @@
+"""
+AliasMatcher must find exactly the skill ids the original per-alias
+matcher found. `_legacy_match` is that matcher, frozen as it was before
+the Aho-Corasick rewrite.
+"""
+import os, random, re, unicodedata
+from typing import Dict, List, Set
+
+import pytest
+
+from core.extractor import _read_docx, _read_pdf
+from core.matcher import AliasMatcher
+from core.ontology_loader import get_ontology
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ONTOLOGY_CSV = os.path.join(ROOT, "ontology", "skills.csv")
+SAMPLES = os.path.join(ROOT, "data", "sample")
+
+
+# ---------------- legacy matcher (frozen) ----------------
+
+def _normalize_unicode(text: str) -> str:
+    t = text.replace("\u00A0", " ")
+    t = unicodedata.normalize("NFKD", t)
+    t = "".join(ch for ch in t if not unicodedata.combining(ch))
+    return t.lower()
+
+def _normalize_tokens(text: str) -> List[str]:
+    t = _normalize_unicode(text)
+    t1 = re.sub(r"[^a-z0-9\+\#\.\-\/]+", " ", t)
+    toks = [tok for tok in t1.split() if tok]
+    if not toks:
+        t2 = re.sub(r"[^A-Za-z0-9\+\#\.\-\/]+", " ", text)
+        toks = [tok.lower() for tok in t2.split() if tok]
+    if not toks and text.strip():
+        toks = text.strip().split()
+    return toks
+
+def _legacy_match(text: str, alias_map: Dict[str, str]) -> Set[str]:
+    found_ids: Set[str] = set()
+    norm = _normalize_unicode(text)
+
+    tokens = _normalize_tokens(text)
+    token_set = set(tokens)
+    variant_token_set = set()
+
+    if token_set:
+        for t in token_set:
+            variant_token_set.add(t)
+            if "." in t:
+                variant_token_set.add(t.replace(".", ""))
+                parts = t.split(".")
+                if parts[0]:
+                    variant_token_set.add(parts[0])
+            if "-" in t:
+                variant_token_set.add(t.replace("-", " "))
+                variant_token_set.add(t.replace("-", ""))
+            if "/" in t:
+                variant_token_set.update(p for p in t.split("/") if p)
+        joined = " ".join(tokens)
+        joined_variants = " ".join(sorted(variant_token_set))
+        for alias, sid in alias_map.items():
+            alias_tokens = alias.split()
+            if len(alias_tokens) == 1:
+                if alias in token_set or alias in variant_token_set:
+                    found_ids.add(sid)
+            else:
+                pat = r"\b" + r"\s+".join(map(re.escape, alias_tokens)) + r"\b"
+                if re.search(pat, joined) or re.search(pat, joined_variants):
+                    found_ids.add(sid)
+
+    for alias, sid in alias_map.items():
+        if alias in norm:
+            found_ids.add(sid); continue
+        a_dotless = alias.replace(".", "")
+        a_dashless = alias.replace("-", "")
+        a_spaced = alias.replace("-", " ")
+        if a_dotless and a_dotless in norm:
+            found_ids.add(sid); continue
+        if a_dashless and a_dashless in norm:
+            found_ids.add(sid); continue
+        if a_spaced and a_spaced in norm:
+            found_ids.add(sid); continue
+
+    return found_ids
+
+
+# ---------------- inputs ----------------
+
+FILLER = ["led", "built", "the", "team", "using", "and", "with", "for", "data", "on", "a", "to",
+          "café", "naïve", "résumé", "x", "c", "go", "js", "ai", "ml", "ui", "ux", "-", "/", "."]
+SEPARATORS = [" ", " ", " ", ", ", "; ", " / ", "/", "-", ".", "\n", " ", " (", ") ", " | ", "  "]
+
+def _mangle(alias: str, rng: random.Random) -> str:
+    """An alias as it might appear in a document: cased, re-punctuated, accented."""
+    a = alias
+    r = rng.random()
+    if r < 0.15:
+        a = a.replace(" ", "-")
+    elif r < 0.3:
+        a = a.replace(" ", ".")
+    elif r < 0.4:
+        a = a.replace(".", "")
+    elif r < 0.5:
+        a = a.replace("-", " ")
+    if rng.random() < 0.4:
+        a = a.upper() if rng.random() < 0.3 else a.title()
+    if rng.random() < 0.1:
+        a = a.replace("e", "é")
+    if rng.random() < 0.1:
+        a = a + rng.choice([".js", "s", "-based", "/", "."])
+    return a
+
+def _random_texts(aliases: List[str], n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        parts = []
+        for _ in range(rng.randint(1, 25)):
+            parts.append(_mangle(rng.choice(aliases), rng) if rng.random() < 0.4 else rng.choice(FILLER))
+            parts.append(rng.choice(SEPARATORS))
+        out.append("".join(parts))
+    # edge cases: empty, punctuation only, non-latin only
+    return out + ["", "   ", "-./", "日本語のテキスト", "c++ / c# . go-lang", "node.js,vue.js;react-native"]
+
+def _sample_texts() -> List[str]:
+    texts = []
+    for d in ("resumes", "jds"):
+        folder = os.path.join(SAMPLES, d)
+        for name in sorted(os.listdir(folder)) if os.path.isdir(folder) else []:
+            path = os.path.join(folder, name)
+            try:
+                texts.append(_read_pdf(path) if name.endswith(".pdf") else _read_docx(path))
+            except Exception:
+                continue
+    return texts
+
+
+@pytest.fixture(scope="module")
+def alias_map() -> Dict[str, str]:
+    return get_ontology(ONTOLOGY_CSV).alias_map
+
+
+def _mismatches(texts: List[str], alias_map: Dict[str, str]) -> List[tuple]:
+    matcher = AliasMatcher(alias_map)
+    out = []
+    for t in texts:
+        old, new = _legacy_match(t, alias_map), matcher.match(t)
+        if old != new:
+            out.append((t[:80], sorted(old - new), sorted(new - old)))
+    return out
+
+
+def test_random_texts_match_legacy(alias_map):
+    texts = _random_texts(sorted(alias_map), n=150)
+    assert _mismatches(texts, alias_map) == []
+
+
+def test_sample_documents_match_legacy(alias_map):
+    texts = _sample_texts()
+    if not texts:
+        pytest.skip("no readable sample documents")
+    assert _mismatches(texts, alias_map) == []
@@ -1,15 +1,13 @@
-import os, sys, tempfile
+import os, sys
 # add project root to sys.path so "core" imports work when Streamlit runs from /ui
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 import streamlit as st
-from core.extractor import extract
-from core.embed import embed
-from core.search_inmem import InMemIndex
-from core.scoring import score
-from core.ontology_loader import load_ontology, id_to_label_map
-from core.explain import find_evidence_for_matches, suggest_gap_phrases
+from core.scoring import score_matrix, similarity_matrix
+from core.hierarchy import get_hierarchy
+from core.explain import evidence_bullets, highlight, suggest_gap_phrases
 from core.config import load_weights
+from ui.cache import doc_vectors, embedder, ontology, parsed
 
 
 st.set_page_config(page_title="JR Match", layout="wide")
@@ -18,43 +16,27 @@ st.title("JR Match")
 ROOT = os.path.dirname(os.path.dirname(__file__))
 ONTOLOGY_CSV = os.path.join(ROOT, "ontology", "skills.csv")
 
-skills = load_ontology(ONTOLOGY_CSV)
-id2label = id_to_label_map(skills)
+onto = ontology(ONTOLOGY_CSV)
+id2label = onto.id2label
+embedder()
 
 resume_file = st.file_uploader("Upload Resume (.pdf/.docx)", type=["pdf", "docx"], key="resume")
 jd_file = st.file_uploader("Upload Job Description (.pdf/.docx)", type=["pdf", "docx"], key="jd")
 
 if st.button("Run Match") and resume_file and jd_file:
-    # save uploads to temp files
-    r_ext = os.path.splitext(resume_file.name)[1].lower()
-    j_ext = os.path.splitext(jd_file.name)[1].lower()
-    with tempfile.NamedTemporaryFile(delete=False, suffix=r_ext) as rf:
-        rf.write(resume_file.read())
-        rpath = rf.name
-    with tempfile.NamedTemporaryFile(delete=False, suffix=j_ext) as jf:
-        jf.write(jd_file.read())
-        jpath = jf.name
-
-    # parse
-    res = extract(rpath, ONTOLOGY_CSV)
-    job = extract(jpath, ONTOLOGY_CSV)
-
-    # bullets and embeddings
-    res_bullets = [b.text for b in res.bullets] or [""]
-    jd_bullets = [b.text for b in job.bullets] or [""]
-
-    idx = InMemIndex()
-    idx.index(embed(jd_bullets), meta=jd_bullets)
-
-    # best semantic similarity from resume bullets to JD bullets
-    sims = []
-    for bt in res_bullets:
-        v = embed([bt])[0]
-        sims.append(idx.query(v, k=1)[0][0])
-    top_sim = max(sims) if sims else 0.0
+    # parse (cached by content hash: an unchanged upload is not re-parsed)
+    r_key, res = parsed(resume_file, ONTOLOGY_CSV, "resume")
+    j_key, job = parsed(jd_file, ONTOLOGY_CSV, "jd")
+
+    # bullets and embeddings (cached the same way)
+    res_bullets, res_vecs = doc_vectors(r_key, res)
+    jd_bullets, jd_vecs = doc_vectors(j_key, job)
+
+    # resume × JD bullet similarities in one GEMM; every metric is read from it
+    S = similarity_matrix(res_vecs, jd_vecs)
 
     # score and display
-    detail = score(res, job, top_sim)
+    detail = score_matrix(res, job, S, hierarchy=get_hierarchy(onto))
     matched_pairs = sorted([(sid, id2label.get(sid, sid)) for sid in detail.matched_skills], key=lambda x: x[1].lower())
     gap_pairs = sorted([(sid, id2label.get(sid, sid)) for sid in detail.gaps], key=lambda x: x[1].lower())
     sim_w, cov_w = load_weights()
@@ -66,19 +48,30 @@ if st.button("Run Match") and resume_file and jd_file:
 
     st.subheader("Gaps")
     st.write([f"{sid} — {lbl}" for sid, lbl in gap_pairs])
+    if detail.related:
+        st.caption("Partial credit from related resume skills: " + "; ".join(
+            f"{id2label.get(g, g)} ← {id2label.get(r, r)}" for g, r in sorted(detail.related.items())))
+
+    m = detail.sim_metrics
+    st.caption(f"Semantic — best pair: {m['max']:.3f} · mean best per JD bullet: {m['mean_best']:.3f} "
+               f"· top-3 mean: {m['topn_mean']:.3f}")
+    with st.expander("Closest resume bullet for each JD bullet"):
+        for bm in sorted(detail.best_matches, key=lambda x: -x.sim):
+            st.markdown(f"- **{bm.sim:.2f}** · JD: {jd_bullets[bm.jd_bullet][:160]}  \n"
+                        f"  Resume: {res_bullets[bm.resume_bullet][:160]}")
 
 
     # ---- Explainability ----
     st.subheader("Evidence & Suggestions")
 
     # Evidence sentences for matched skills
-    evidence = find_evidence_for_matches(res.bullets, detail.matched_skills, ONTOLOGY_CSV)
+    evidence = evidence_bullets(res.bullets, detail.matched_skills, ONTOLOGY_CSV)
     if any(evidence.values()):
         with st.expander("Evidence sentences (from resume bullets)"):
             for sid, lbl in matched_pairs:
                 ev = evidence.get(sid)
                 if ev:
-                    st.markdown(f"- **{lbl}**: {ev}")
+                    st.markdown(f"- **{lbl}**: {highlight(ev.text, ev.spans, {sid})}")
     else:
         st.caption("No direct alias hits found in bullets for matched skills.")
 
@@ -0,0 +1,142 @@
+# backends_app.py — Streamlit UI with pluggable vector backends (inmem / sqlite / faiss)
+
+import os, sys
+
+# Make sure "core" is importable whether App.py lives at repo root or in /ui
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(THIS_DIR)
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
+import numpy as np
+import streamlit as st
+
+from core.scoring import score
+from core.hierarchy import get_hierarchy
+from core.explain import evidence_bullets, highlight, suggest_gap_phrases
+from core.config import load_weights
+from core.embedders import default_model
+from ui.cache import doc_vectors, embedder, jd_index, ontology, parsed
+
+# ---- Optional backends (tolerate missing modules) ----
+FaissIndex = None
+try:
+    # Try the potential locations, depending on where you placed the file
+    from adapters.search_faiss import FaissIndex
+except Exception:
+    try:
+        from core.search_faiss import FaissIndex
+    except Exception:
+        try:
+            from search_faiss import FaissIndex
+        except Exception:
+            FaissIndex = None
+
+SQLiteIndex = None
+try:
+    from core.search_sqlite import SQLiteIndex  # requires you added core/search_sqlite.py
+except Exception:
+    SQLiteIndex = None
+
+# ---- Streamlit setup ----
+st.set_page_config(page_title="JR Match", layout="wide")
+st.title("JR Match")
+
+ROOT = REPO_ROOT
+ONTOLOGY_CSV = os.path.join(ROOT, "ontology", "skills.csv")
+os.makedirs(os.path.join(ROOT, "data"), exist_ok=True)
+
+# -------- Sidebar controls --------
+backend_choice = st.sidebar.radio(
+    "Vector backend",
+    options=["inmem", "sqlite", "faiss"],
+    index=0,
+    help="SQLite persists vectors (zero external deps). FAISS is fastest if available."
+)
+
+if backend_choice == "sqlite" and SQLiteIndex is None:
+    st.sidebar.warning("SQLite backend not found. Did you add core/search_sqlite.py?")
+if backend_choice == "faiss" and FaissIndex is None:
+    st.sidebar.warning("FAISS not available. Install faiss-cpu or switch backend.")
+
+db_path = st.sidebar.text_input(
+    "SQLite DB path",
+    value=os.getenv("JR_SQLITE_PATH", os.path.join(ROOT, "data", "jr_match.sqlite3")),
+    help="Only used when backend = sqlite"
+)
+
+sim_w, cov_w = load_weights()
+st.sidebar.caption(f"Scoring weights → Semantic: **{sim_w:.2f}**  |  Coverage: **{cov_w:.2f}**")
+
+# -------- Load ontology --------
+onto = ontology(ONTOLOGY_CSV)
+id2label = onto.id2label
+embedder()
+
+# -------- Inputs --------
+resume_file = st.file_uploader("Upload Resume (.pdf/.docx)", type=["pdf", "docx"], key="resume")
+jd_file = st.file_uploader("Upload Job Description (.pdf/.docx)", type=["pdf", "docx"], key="jd")
+
+run = st.button("Run Match", type="primary")
+
+if run and resume_file and jd_file:
+    # Parse docs (cached by content hash: an unchanged upload is not re-parsed)
+    r_key, res = parsed(resume_file, ONTOLOGY_CSV, "resume")
+    j_key, job = parsed(jd_file, ONTOLOGY_CSV, "jd")
+
+    # Bullet texts (with sensible fallbacks) and their embeddings, cached the same way
+    res_bullets, res_vecs = doc_vectors(r_key, res)
+    jd_bullets, jd_vecs = doc_vectors(j_key, job)
+
+    # -------- Select backend --------
+    backend_name = backend_choice
+    if (backend_choice == "sqlite" and SQLiteIndex is None) or (backend_choice == "faiss" and FaissIndex is None):
+        st.info("Falling back to InMem backend.")
+        backend_name = "inmem"
+
+    # -------- JD index (built once per JD and backend, reused across resumes) --------
+    idx = jd_index(j_key, default_model(), backend_name, db_path, jd_bullets, jd_vecs)
+
+    # -------- Compute best semantic similarity --------
+    # all resume bullets in one batched index query
+    D, _ = idx.search(res_vecs, k=1)
+    top_sim = float(np.max(D)) if np.size(D) else 0.0
+
+    # -------- Score --------
+    detail = score(res, job, top_sim, hierarchy=get_hierarchy(onto))
+
+    # -------- Display --------
+    st.metric("Total Score", f"{detail.total:.3f}")
+    st.caption(f"Backend: **{backend_name}**  ·  Resume bullets: {len(res_bullets)}  ·  JD bullets: {len(jd_bullets)}")
+
+    matched_pairs = sorted([(sid, id2label.get(sid, sid)) for sid in detail.matched_skills], key=lambda x: x[1].lower())
+    gap_pairs = sorted([(sid, id2label.get(sid, sid)) for sid in detail.gaps], key=lambda x: x[1].lower())
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Matched Skills")
+        st.write([f"{sid} — {lbl}" for sid, lbl in matched_pairs] or "—")
+    with col2:
+        st.subheader("Gaps")
+        st.write([f"{sid} — {lbl}" for sid, lbl in gap_pairs] or "—")
+
+    st.caption(f"Weights — Semantic: {sim_w:.2f}, Coverage: {cov_w:.2f}")
+
+    # -------- Explainability --------
+    st.subheader("Evidence & Suggestions")
+
+    evidence = evidence_bullets(res.bullets, detail.matched_skills, ONTOLOGY_CSV)
+    if any(evidence.values()):
+        with st.expander("Evidence sentences (from resume bullets)"):
+            for sid, lbl in matched_pairs:
+                ev = evidence.get(sid)
+                if ev:
+                    st.markdown(f"- **{lbl}**: {highlight(ev.text, ev.spans, {sid})}")
+    else:
+        st.caption("No direct alias hits found in bullets for matched skills.")
+
+    gap_suggestions = suggest_gap_phrases(detail.gaps, ONTOLOGY_CSV)
+    if gap_suggestions:
+        with st.expander("Suggested phrasing for missing skills"):
+            for sid, lbl in gap_pairs:
+                st.markdown(f"- **{lbl}**: {gap_suggestions.get(sid)}")
@@ -0,0 +1,91 @@
+# ui/cache.py — Streamlit caches shared by the UI pages
+"""
+Streamlit re-runs the whole page script on every interaction. Work that
+does not depend on the interaction is cached here:
+
+  resources (one per server process)  ontology registry, embedding model, JD indexes
+  data (pickled, per key)             parsed uploads, bullet texts + embeddings
+
+Uploads are keyed by the SHA-1 of their bytes, so changing only the
+resume re-uses the parsed JD, its embeddings and its index.
+"""
+import hashlib, os, tempfile
+from typing import List, Optional, Tuple
+
+import numpy as np
+import streamlit as st
+
+from core.extractor import extract
+from core.embed import embed
+from core.embedders import default_model, get_embedder
+from core.ontology_loader import get_ontology
+from core.pipeline import bullet_texts, embed_bullets
+from core.schemas import ParsedDoc
+
+INDEX_TTL = 15 * 60  # seconds; per-JD SQLite indexes expire this long after they were written
+
+
+def content_key(upload) -> str:
+    """SHA-1 of an UploadedFile's bytes."""
+    return hashlib.sha1(upload.getvalue()).hexdigest()
+
+@st.cache_resource(show_spinner=False)
+def ontology(csv_path: str):
+    return get_ontology(csv_path)
+
+@st.cache_resource(show_spinner="Loading embedding model…")
+def embedder(model_name: Optional[str] = None):
+    e = get_embedder(model_name)
+    e.encode(["warm up"])  # load weights now, not on the first Run Match
+    return e
+
+@st.cache_data(show_spinner="Parsing…", max_entries=64)
+def parse_upload(key: str, _data: bytes, ext: str, csv_path: str, tag: str = "doc") -> ParsedDoc:
+    """`key` (content hash) stands in for the bytes, which are not hashed by Streamlit."""
+    fd, path = tempfile.mkstemp(suffix=ext or ".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_data)
+        return extract(path, csv_path, dump_tag=tag)
+    finally:
+        os.remove(path)
+
+def parsed(upload, csv_path: str, tag: str = "doc") -> Tuple[str, ParsedDoc]:
+    """(content key, ParsedDoc) of an UploadedFile."""
+    key = content_key(upload)
+    ext = os.path.splitext(upload.name)[1].lower()
+    return key, parse_upload(key, upload.getvalue(), ext, csv_path, tag)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def bullet_vectors(key: str, model: str, _doc: ParsedDoc) -> Tuple[List[str], np.ndarray]:
+    """Bullet texts of a parsed upload and their embeddings."""
+    texts = bullet_texts(_doc)
+    return texts, embed_bullets(texts, lambda t: embed(t, model_name=model))
+
+def doc_vectors(key: str, doc: ParsedDoc) -> Tuple[List[str], np.ndarray]:
+    model = default_model()
+    embedder(model)
+    return bullet_vectors(key, model, doc)
+
+@st.cache_resource(show_spinner="Indexing JD…", ttl=INDEX_TTL // 2, max_entries=16)
+def jd_index(key: str, model: str, backend: str, db_path: str, _texts: List[str], _vecs: np.ndarray):
+    """
+    Index of one JD's bullet vectors, shared by every resume run against it.
+    The entry is dropped well before its SQLite index can expire; a rebuild
+    replaces (and so renews) the rows of the same named index.
+    """
+    if backend == "sqlite":
+        from core.search_sqlite import SQLiteIndex
+        name = "ui_" + hashlib.sha1(f"{key}:{model}".encode()).hexdigest()[:16]
+        idx = SQLiteIndex(db_path=db_path, index_name=name, ttl=INDEX_TTL)
+        # the name is stable across rebuilds and restarts: replace its rows, never append
+        idx.index(_vecs, meta=_texts, replace=True)
+        return idx
+    if backend == "faiss":
+        from adapters.search_faiss import FaissIndex
+        idx = FaissIndex()
+    else:
+        from core.search_inmem import InMemIndex
+        idx = InMemIndex()
+    idx.index(_vecs, meta=_texts)
+    return idx